@@ -1,10 +1,12 @@
 import sys
 import os
+import io
+import hashlib
 import pandas as pd
 
 from fastapi import FastAPI, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from starlette.responses import RedirectResponse
 from uvicorn import run as app_run
 
@@ -12,6 +14,7 @@ from fastapi.templating import Jinja2Templates
 
 from groundwater.decision.preset_scenarios import PRESET_SCENARIOS
 from groundwater.decision.alert_engine import AlertEngine
+from groundwater.decision.alert_state import AlertStateStore
 from groundwater.decision.decision_engine import GroundwaterDecisionEngine
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
@@ -21,12 +24,15 @@ from groundwater.decision.scenario_simulator import ScenarioSimulator, ScenarioC
 from groundwater.decision.dashboard_aggregator import DashboardAggregator
 from groundwater.decision.hotspot_detector import HotspotDetector
 from groundwater.decision.trend_analyzer import TrendAnalyzer
-from groundwater.decision.geojson_builder import GeoJSONBuilder
+from groundwater.decision.geojson_builder import GeoJSONBuilder, BINARY_DEFAULT_PRECISION
+from groundwater.decision.station_clusterer import StationClusterer
 from groundwater.decision.pdf_report_generator import PDFReportGenerator
+from groundwater.utils.report_cache import ReportCache
 from fastapi.responses import FileResponse
 
 
 from pydantic import BaseModel
+from typing import List, Optional
 
 class ScenarioRequest(BaseModel):
     availability_change_pct: float = 0.0  # e.g. -0.3 for -30%
@@ -69,7 +75,18 @@ from data_loader import (
     get_stress_index_trend,
     get_zone_distribution,
     get_seasonal_pattern,
-    get_stress_vs_water_scatter
+    get_stress_vs_water_scatter,
+    get_percentiles,
+    get_percentiles_by_region,
+    get_map_clusters,
+    get_stations_binary,
+    get_fastest_declining_stations,
+    reload_dataset,
+    get_dataset_version,
+    add_yoy_decline,
+    _normalize_station_id,
+    DEFAULT_HISTORY_POINTS,
+    DEFAULT_SCATTER_POINTS
 )
 
 @app.get("/api/dashboard/stats", tags=["dashboard-live"])
@@ -80,16 +97,39 @@ async def dashboard_stats():
         raise GroundwaterException(e, sys)
 
 @app.get("/api/map/stations", tags=["dashboard-live"])
-async def map_stations():
+async def map_stations(format: str = "json", precision: int = BINARY_DEFAULT_PRECISION):
     try:
+        if format == "binary":
+            return Response(get_stations_binary(precision), media_type="application/octet-stream")
         return get_stations_for_map()
     except Exception as e:
         raise GroundwaterException(e, sys)
 
+@app.get("/api/map/clusters", tags=["dashboard-live"])
+async def map_clusters(
+    zoom: int,
+    min_lat: float = -90.0,
+    min_lon: float = -180.0,
+    max_lat: float = 90.0,
+    max_lon: float = 180.0,
+    limit: int = StationClusterer.DEFAULT_LIMIT
+):
+    try:
+        return get_map_clusters(
+            zoom=zoom,
+            min_lat=min_lat,
+            min_lon=min_lon,
+            max_lat=max_lat,
+            max_lon=max_lon,
+            limit=limit
+        )
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
 @app.get("/api/trends/history", tags=["dashboard-live"])
-async def trends_history():
+async def trends_history(max_points: int = DEFAULT_HISTORY_POINTS):
     try:
-        return get_historical_trends()
+        return get_historical_trends(max_points=max_points)
     except Exception as e:
         raise GroundwaterException(e, sys)
 
@@ -114,6 +154,9 @@ async def train_route():
         train_pipeline = TrainingPipeline()
         train_pipeline.run_pipeline()
 
+        # Rebuild the materialized forecasts for the new model
+        forecasting_pipeline.start_precompute()
+
         return Response("Training completed successfully")
 
     except Exception as e:
@@ -161,20 +204,10 @@ async def predict_route(request: Request, file: UploadFile = File(...)):
             if col not in df.columns:
                 raise Exception(f"Required column missing for decision engine: {col}")
 
-        zones = []
-        stress_indexes = []
-
-        for _, row in df.iterrows():
-            demand = float(row["Annual_Ground_Water_Draft_Total"])
-            availability = float(row["Net_Ground_Water_Availability"])
-
-            decision = GroundwaterDecisionEngine.evaluate(
-                demand=demand,
-                availability=availability
-            )
-
-            zones.append(decision.zone)
-            stress_indexes.append(decision.stress_index)
+        stress_indexes, zones = GroundwaterDecisionEngine.evaluate_batch(
+            demand=df["Annual_Ground_Water_Draft_Total"].astype(float).to_numpy(),
+            availability=df["Net_Ground_Water_Availability"].astype(float).to_numpy()
+        )
 
         df["stress_index"] = stress_indexes
         df["zone"] = zones
@@ -182,34 +215,12 @@ async def predict_route(request: Request, file: UploadFile = File(...)):
         # ===============================
         # Alert Engine
         # ===============================
-        all_alerts = []
-        alert_summaries = []
+        evaluation = AlertEngine.evaluate(add_yoy_decline(df))
 
-        for i in range(len(df)):
-            zone = df.loc[i, "zone"]
-            stress_index = df.loc[i, "stress_index"]
+        alert_summaries = evaluation.summaries()
 
-            alerts = AlertEngine.generate_alerts(
-                zone=zone,
-                stress_index=stress_index
-            )
-
-            if len(alerts) == 0:
-                alert_summaries.append("NO_ALERT")
-            else:
-                # Combine messages
-                messages = [alert.message for alert in alerts]
-                alert_summaries.append(" | ".join(messages))
-
-                # Store detailed alerts (optional, for API / DB later)
-                for alert in alerts:
-                    all_alerts.append({
-                        "row": int(i),
-                        "level": alert.level,
-                        "zone": alert.zone,
-                        "stress_index": alert.stress_index,
-                        "message": alert.message,
-                    })
+        # Store detailed alerts (optional, for API / DB later)
+        all_alerts = evaluation.records(zone_col="zone", stress_col="stress_index")
 
         df["alerts"] = alert_summaries
 
@@ -272,60 +283,31 @@ async def simulate_route(
         )
 
         # ===============================
-        # Run simulation row by row
+        # Run simulation over all rows
         # ===============================
-        old_stress = []
-        old_zone = []
-        new_stress = []
-        new_zone = []
-        new_demand_list = []
-        new_availability_list = []
-        scenario_alerts = []
-
-        for _, row in df.iterrows():
-            demand = float(row["Annual_Ground_Water_Draft_Total"])
-            availability = float(row["Net_Ground_Water_Availability"])
+        demand = df["Annual_Ground_Water_Draft_Total"].astype(float).to_numpy()
+        availability = df["Net_Ground_Water_Availability"].astype(float).to_numpy()
 
-            # ---- Before scenario ----
-            decision_before = GroundwaterDecisionEngine.evaluate(
-                demand=demand,
-                availability=availability,
-            )
-
-            # ---- Apply scenario ----
-            scenario_result = ScenarioSimulator.simulate(
-                demand=demand,
-                availability=availability,
-                scenario=scenario,
-            )
+        # ---- Before scenario ----
+        old_stress, old_zone = GroundwaterDecisionEngine.evaluate_batch(demand, availability)
 
-            # ---- After scenario ----
-            decision_after = GroundwaterDecisionEngine.evaluate(
-                demand=scenario_result.new_demand,
-                availability=scenario_result.new_availability,
-            )
-            
-            # Generate alerts for scenario result
-            alerts_after = AlertEngine.generate_alerts(
-                zone=decision_after.zone,
-                stress_index=decision_after.stress_index
-            )
-
-            if len(alerts_after) == 0:
-                alert_summary = "NO_ALERT"
-            else:
-                alert_summary = " | ".join([a.message for a in alerts_after])
-
-            scenario_alerts.append(alert_summary)
-            # Collect results
-            old_stress.append(decision_before.stress_index)
-            old_zone.append(decision_before.zone)
+        # ---- Apply scenario ----
+        new_demand_list, new_availability_list = ScenarioSimulator.simulate_batch(
+            demand=demand,
+            availability=availability,
+            scenario=scenario,
+        )
 
-            new_stress.append(decision_after.stress_index)
-            new_zone.append(decision_after.zone)
+        # ---- After scenario ----
+        new_stress, new_zone = GroundwaterDecisionEngine.evaluate_batch(
+            new_demand_list, new_availability_list
+        )
 
-            new_demand_list.append(scenario_result.new_demand)
-            new_availability_list.append(scenario_result.new_availability)
+        # Generate alerts for scenario result
+        # The scenario leaves Water_Level as is, so yoy_decline still applies
+        scenario_alerts = AlertEngine.evaluate(
+            add_yoy_decline(df.assign(zone=new_zone, stress_index=new_stress))
+        ).summaries()
 
         # ===============================
         # Append results to dataframe
@@ -360,6 +342,78 @@ async def simulate_route(
     except Exception as e:
         raise GroundwaterException(e, sys)
 
+@app.post("/alerts/evaluate", tags=["alerts"])
+async def evaluate_alerts_route(file: UploadFile = File(...)):
+    """
+    Runs the configured alert rules over an uploaded CSV and reports
+    matches and evaluation time per rule.
+    """
+    try:
+        df = pd.read_csv(file.file)
+
+        evaluation = AlertEngine.evaluate(add_yoy_decline(df))
+
+        return {
+            "rows": evaluation.n_rows,
+            "rules": evaluation.timing_report(),
+            "skipped_rules": evaluation.skipped,
+            "total_eval_ms": round(sum(evaluation.timings.values()) * 1000, 4),
+        }
+
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+alert_state_store = AlertStateStore.from_config()
+
+@app.post("/alerts/ingest", tags=["alerts"])
+async def ingest_alert_readings(file: UploadFile = File(...)):
+    """
+    Feeds new station readings into the per-station alert state and
+    returns only the zone transitions they caused.
+    """
+    try:
+        df = pd.read_csv(file.file)
+
+        if "station_id" in df.columns:
+            station_ids = df["station_id"].astype(str)
+        elif "LAT" in df.columns and "LON" in df.columns:
+            station_ids = df["LAT"].astype(str) + "_" + df["LON"].astype(str)
+        else:
+            return Response("CSV must contain 'station_id' or 'LAT'/'LON' columns", status_code=400)
+
+        if "Date" not in df.columns:
+            return Response("CSV must contain 'Date' column", status_code=400)
+
+        if "stress_index" in df.columns:
+            stress = df["stress_index"]
+        elif "Stress_Index" in df.columns:
+            stress = df["Stress_Index"]
+        elif "Annual_Ground_Water_Draft_Total" in df.columns and "Net_Ground_Water_Availability" in df.columns:
+            stress, _ = GroundwaterDecisionEngine.evaluate_batch(
+                df["Annual_Ground_Water_Draft_Total"].astype(float).to_numpy(),
+                df["Net_Ground_Water_Availability"].astype(float).to_numpy()
+            )
+        else:
+            return Response("CSV must contain 'stress_index' or demand / availability columns", status_code=400)
+
+        result = alert_state_store.ingest(station_ids, df["Date"], stress)
+
+        return {
+            "processed": result["processed"],
+            "ignored": result["ignored"],
+            "transitions": [t.to_dict() for t in result["transitions"]],
+        }
+
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/alerts/state", tags=["alerts"])
+async def alert_state(station_id: str = None):
+    try:
+        return alert_state_store.snapshot(station_id)
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
 @app.post("/summary/zones", tags=["dashboard"])
 async def zone_summary_route(file: UploadFile = File(...)):
     try:
@@ -451,41 +505,23 @@ async def simulate_preset_route(
         # ===============================
         # Run simulation
         # ===============================
-        old_zone = []
-        old_stress = []
-        new_zone = []
-        new_stress = []
-        alerts_list = []
-
-        for _, row in df.iterrows():
-            demand = float(row["Annual_Ground_Water_Draft_Total"])
-            availability = float(row["Net_Ground_Water_Availability"])
+        demand = df["Annual_Ground_Water_Draft_Total"].astype(float).to_numpy()
+        availability = df["Net_Ground_Water_Availability"].astype(float).to_numpy()
 
-            before = GroundwaterDecisionEngine.evaluate(demand, availability)
+        old_stress, old_zone = GroundwaterDecisionEngine.evaluate_batch(demand, availability)
 
-            scenario_result = ScenarioSimulator.simulate(
-                demand=demand,
-                availability=availability,
-                scenario=scenario,
-            )
-
-            after = GroundwaterDecisionEngine.evaluate(
-                scenario_result.new_demand,
-                scenario_result.new_availability
-            )
-
-            alerts = AlertEngine.generate_alerts(after.zone, after.stress_index)
+        new_demand, new_availability = ScenarioSimulator.simulate_batch(
+            demand=demand,
+            availability=availability,
+            scenario=scenario,
+        )
 
-            if len(alerts) == 0:
-                alert_summary = "NO_ALERT"
-            else:
-                alert_summary = " | ".join([a.message for a in alerts])
+        new_stress, new_zone = GroundwaterDecisionEngine.evaluate_batch(new_demand, new_availability)
 
-            old_zone.append(before.zone)
-            old_stress.append(before.stress_index)
-            new_zone.append(after.zone)
-            new_stress.append(after.stress_index)
-            alerts_list.append(alert_summary)
+        # The scenario leaves Water_Level as is, so yoy_decline still applies
+        alerts_list = AlertEngine.evaluate(
+            add_yoy_decline(df.assign(zone=new_zone, stress_index=new_stress))
+        ).summaries()
 
         # ===============================
         # Append
@@ -657,47 +693,123 @@ async def trend_by_region_api(
 
     except Exception as e:
         raise GroundwaterException(e, sys)
-@app.post("/map/geojson", tags=["map"])
-async def geojson_map_api(
+@app.post("/trends/all", tags=["trends"])
+async def all_trends_api(
     file: UploadFile = File(...),
-    lat_col: str = "LAT",
-    lon_col: str = "LON"
+    date_col: str = "Date",
+    value_col: str = "Water_Level",
+    region_col: str = None
 ):
     try:
         df = pd.read_csv(file.file)
 
-        required_cols = [lat_col, lon_col, "zone", "stress_index"]
+        required_cols = [date_col, value_col] + ([region_col] if region_col else [])
         for col in required_cols:
             if col not in df.columns:
                 return Response(f"CSV must contain '{col}' column", status_code=400)
 
-        geojson = GeoJSONBuilder.build_point_geojson(
+        # Yearly, monthly and per-region trends from one pass over the data
+        trends = TrendAnalyzer.multi_trend(
             df=df,
-            lat_col=lat_col,
-            lon_col=lon_col
+            date_col=date_col,
+            value_col=value_col,
+            region_col=region_col,
         )
 
-        return geojson
+        return {
+            "region_column": region_col,
+            "date_column": date_col,
+            "value_column": value_col,
+            **trends
+        }
 
     except Exception as e:
         raise GroundwaterException(e, sys)
-@app.post("/report/policy-pdf", tags=["report"])
-async def generate_policy_report_api(file: UploadFile = File(...)):
+@app.post("/map/geojson", tags=["map"])
+async def geojson_map_api(
+    file: UploadFile = File(...),
+    lat_col: str = "LAT",
+    lon_col: str = "LON",
+    precision: int = None,
+    zoom: int = None,
+    min_lat: float = -90.0,
+    min_lon: float = -180.0,
+    max_lat: float = 90.0,
+    max_lon: float = 180.0,
+    format: str = "geojson"
+):
     try:
         df = pd.read_csv(file.file)
 
-        required_cols = ["zone", "stress_index"]
+        required_cols = [lat_col, lon_col, "zone", "stress_index"]
         for col in required_cols:
             if col not in df.columns:
                 return Response(f"CSV must contain '{col}' column", status_code=400)
 
-        output_path = os.path.join("reports", "groundwater_policy_report.pdf")
+        # With a zoom level, return only the clusters visible in the bbox
+        if zoom is not None:
+            clusterer = StationClusterer.from_frame(df, lat_col=lat_col, lon_col=lon_col)
+            clusters = clusterer.query(
+                zoom=zoom,
+                min_lat=min_lat,
+                min_lon=min_lon,
+                max_lat=max_lat,
+                max_lon=max_lon
+            )
+            return GeoJSONBuilder.build_cluster_geojson(clusters)
+
+        if format == "binary":
+            payload = GeoJSONBuilder.build_point_binary(
+                df=df,
+                lat_col=lat_col,
+                lon_col=lon_col,
+                precision=BINARY_DEFAULT_PRECISION if precision is None else precision
+            )
+            return Response(payload, media_type="application/octet-stream")
+
+        # Stream the FeatureCollection instead of building one large dict
+        return StreamingResponse(
+            GeoJSONBuilder.iter_point_geojson(
+                df=df,
+                lat_col=lat_col,
+                lon_col=lon_col,
+                precision=precision
+            ),
+            media_type="application/json"
+        )
 
-        PDFReportGenerator.generate_policy_report(
-            df=df,
-            output_path=output_path,
-            title="Real-Time Groundwater Decision Support Report"
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+policy_report_cache = ReportCache(os.path.join("reports", "cache"))
+
+@app.post("/report/policy-pdf", tags=["report"])
+async def generate_policy_report_api(file: UploadFile = File(...)):
+    try:
+        raw = await file.read()
+        title = "Real-Time Groundwater Decision Support Report"
+
+        # Identical upload + title + template -> identical report
+        key = ReportCache.make_key(
+            "policy", hashlib.sha256(raw).hexdigest(), title, PDFReportGenerator.TEMPLATE_VERSION
         )
+        output_path = policy_report_cache.get(key)
+
+        if output_path is None:
+            df = pd.read_csv(io.BytesIO(raw))
+
+            required_cols = ["zone", "stress_index"]
+            for col in required_cols:
+                if col not in df.columns:
+                    return Response(f"CSV must contain '{col}' column", status_code=400)
+
+            output_path = policy_report_cache.put(
+                key,
+                lambda path: PDFReportGenerator.generate_policy_report(
+                    df=df,
+                    output_path=path,
+                    title=title
+                )
+            )
 
         return FileResponse(
             path=output_path,
@@ -762,43 +874,196 @@ async def seasonal_pattern(station_id: str = None):
         raise GroundwaterException(e, sys)
 
 @app.get("/api/analytics/scatter/stress-water", tags=["analytics"])
-async def scatter_stress_water(station_id: str = None):
+async def scatter_stress_water(station_id: str = None, max_points: int = DEFAULT_SCATTER_POINTS):
     try:
         if station_id == "all": station_id = None
-        return get_stress_vs_water_scatter(station_id)
+        return get_stress_vs_water_scatter(station_id, max_points=max_points)
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/api/analytics/trend/declining-stations", tags=["analytics"])
+async def declining_stations(top_n: int = 20, alpha: float = 0.05):
+    try:
+        return get_fastest_declining_stations(top_n=top_n, alpha=alpha)
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/api/analytics/percentiles", tags=["analytics"])
+async def analytics_percentiles(
+    metric: str = "stress_index",
+    station_id: str = None,
+    region_col: str = None,
+    region: str = None
+):
+    try:
+        if station_id == "all": station_id = None
+        result = get_percentiles(
+            metric=metric,
+            station_id=station_id,
+            region_col=region_col,
+            region=region
+        )
+        if result is None:
+            return Response("No data for the requested station/region", status_code=404)
+        return result
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/api/analytics/percentiles/by-region", tags=["analytics"])
+async def analytics_percentiles_by_region(metric: str = "stress_index", region_col: str = "District"):
+    try:
+        return get_percentiles_by_region(metric=metric, region_col=region_col)
     except Exception as e:
         raise GroundwaterException(e, sys)
 
 
 # ===============================
 
-from groundwater.pipeline.forecasting import ForecastingPipeline
+from groundwater.pipeline.forecasting import ForecastingPipeline, FORECAST_SCENARIOS
+from groundwater.pipeline.monte_carlo import (
+    MonteCarloConfig, MonteCarloForecaster, DEFAULT_SIMULATIONS, MONTE_CARLO_ROW_BUDGET
+)
+
+# Shared so the model is unpickled once (reloaded when the model file changes)
+forecasting_pipeline = ForecastingPipeline()
 
 @app.get("/api/predict/forecast", tags=["prediction"])
 async def predict_forecast(
     station_id: str = None, 
     years: int = 5,
     demand_change_pct: float = 0.0, 
-    supply_change_pct: float = 0.0
+    supply_change_pct: float = 0.0,
+    scenario: Optional[str] = None
 ):
+    """
+    The default scenario and the presets (by name: a one-off demand /
+    supply change at the start, as in /simulate/preset) are read from the
+    materialized forecast store; custom annual growth rates are forecast
+    live.
+    """
     try:
-        pipeline = ForecastingPipeline()
         if station_id == "all": station_id = None
+
+        demand_shock_pct = supply_shock_pct = 0.0
+        if scenario is not None:
+            if scenario not in FORECAST_SCENARIOS:
+                raise Exception(f"Unknown scenario '{scenario}'. Choose from {list(FORECAST_SCENARIOS)}")
+            demand_change_pct, supply_change_pct, demand_shock_pct, supply_shock_pct = FORECAST_SCENARIOS[scenario]
         
-        forecast = pipeline.predict_future(
+        forecast = forecasting_pipeline.predict_future(
             station_id=station_id,
             years=years,
             demand_change_pct=demand_change_pct,
-            supply_change_pct=supply_change_pct
+            supply_change_pct=supply_change_pct,
+            demand_shock_pct=demand_shock_pct,
+            supply_shock_pct=supply_shock_pct
         )
         return forecast
     except Exception as e:
         raise GroundwaterException(e, sys)
 
+class BulkForecastRequest(BaseModel):
+    station_ids: Optional[List[str]] = None
+    district: Optional[str] = None
+    state: Optional[str] = None
+    years: int = 5
+    demand_change_pct: float = 0.0
+    supply_change_pct: float = 0.0
+
+@app.post("/api/predict/forecast/bulk", tags=["prediction"])
+async def predict_forecast_bulk(request: BulkForecastRequest):
+    """
+    Forecasts every selected station (ids and/or District / State; all
+    stations if no filter) in one batched pass: one model call per step.
+    Requested ids without a forecast (unknown, or outside the District /
+    State filter) are listed in missing.
+    """
+    try:
+        forecasts = forecasting_pipeline.predict_future_batch(
+            station_ids=request.station_ids,
+            district=request.district,
+            state=request.state,
+            years=request.years,
+            demand_change_pct=request.demand_change_pct,
+            supply_change_pct=request.supply_change_pct
+        )
+        requested = dict.fromkeys(_normalize_station_id(s) for s in request.station_ids or [])
+        missing = [station_id for station_id in requested if station_id not in forecasts]
+        return {"count": len(forecasts), "forecasts": forecasts, "missing": missing}
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+class MonteCarloRequest(BaseModel):
+    station_ids: Optional[List[str]] = None
+    district: Optional[str] = None
+    state: Optional[str] = None
+    years: int = 5
+    n_simulations: int = DEFAULT_SIMULATIONS
+    demand_drift_pct: float = 0.0
+    demand_volatility_pct: float = 5.0
+    supply_drift_pct: float = 0.0
+    supply_volatility_pct: float = 5.0
+    seed: int = 42
+    budget: int = MONTE_CARLO_ROW_BUDGET
+
+# Plain def: FastAPI runs the CPU-bound simulation in its threadpool
+# instead of on the event loop
+@app.post("/api/predict/forecast/montecarlo", tags=["prediction"])
+def predict_forecast_montecarlo(request: MonteCarloRequest):
+    """
+    P10 / P50 / P90 water-level and stress fans plus zone probabilities
+    per quarter, from stochastic demand / supply growth.
+    """
+    try:
+        config = MonteCarloConfig(
+            n_simulations=request.n_simulations,
+            years=request.years,
+            demand_drift_pct=request.demand_drift_pct,
+            demand_volatility_pct=request.demand_volatility_pct,
+            supply_drift_pct=request.supply_drift_pct,
+            supply_volatility_pct=request.supply_volatility_pct,
+            seed=request.seed,
+            budget=request.budget
+        )
+        return MonteCarloForecaster.run(
+            config,
+            station_ids=request.station_ids,
+            district=request.district,
+            state=request.state
+        )
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/api/predict/forecast/cache", tags=["prediction"])
+async def forecast_cache_stats():
+    return forecasting_pipeline.cache.stats()
+
+@app.get("/api/predict/forecast/store", tags=["prediction"])
+async def forecast_store_stats():
+    return forecasting_pipeline.store.stats(
+        model_version=forecasting_pipeline.get_model_version(),
+        dataset_version=get_dataset_version()
+    )
+
+@app.post("/api/dataset/reload", tags=["dashboard-live"])
+async def dataset_reload():
+    """
+    Re-reads dataset.csv, drops derived views and rebuilds the materialized
+    forecast store for the new data in the background.
+    """
+    try:
+        version = reload_dataset()
+        precompute_started = forecasting_pipeline.start_precompute()
+        return {"dataset_version": version, "precompute_started": precompute_started}
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
 from groundwater.pipeline.model_analysis import ModelAnalysis
 
+# Plain def: a model without a saved analysis builds it on first request,
+# which FastAPI then runs in its threadpool instead of on the event loop
 @app.get("/api/model/analysis", tags=["prediction"])
-async def model_analysis():
+def model_analysis():
     try:
         analysis = ModelAnalysis()
         return analysis.get_analysis_data()
@@ -813,10 +1078,52 @@ async def generate_report(station_id: str):
     try:
         generator = ReportGenerator()
         file_path = generator.generate_report(station_id)
-        return FileResponse(file_path, media_type='application/pdf', filename=os.path.basename(file_path))
+        return FileResponse(file_path, media_type='application/pdf', filename=f"Report_{station_id}.pdf")
     except Exception as e:
         raise GroundwaterException(e, sys)
 
+
+from groundwater.utils.report_generator import BulkReportGenerator
+
+class BulkReportRequest(BaseModel):
+    station_ids: Optional[List[str]] = None
+    district: Optional[str] = None
+    state: Optional[str] = None
+
+bulk_report_generator = BulkReportGenerator()
+
+@app.post("/api/reports/bulk", tags=["report"])
+async def start_bulk_reports(request: BulkReportRequest):
+    """
+    Starts a bulk report job for the selected stations (ids and/or District / State).
+    Poll /api/reports/bulk/{job_id} for progress, then download the zip.
+    """
+    try:
+        job = bulk_report_generator.submit(
+            station_ids=request.station_ids,
+            district=request.district,
+            state=request.state,
+        )
+        return job.to_dict()
+    except Exception as e:
+        raise GroundwaterException(e, sys)
+
+@app.get("/api/reports/bulk/{job_id}", tags=["report"])
+async def bulk_report_status(job_id: str):
+    job = bulk_report_generator.get_job(job_id)
+    if job is None:
+        return Response("Unknown job", status_code=404)
+    return job.to_dict()
+
+@app.get("/api/reports/bulk/{job_id}/download", tags=["report"])
+async def download_bulk_reports(job_id: str):
+    job = bulk_report_generator.get_job(job_id)
+    if job is None:
+        return Response("Unknown job", status_code=404)
+    if job.status != "done":
+        return Response(f"Job is {job.status}", status_code=409)
+    return FileResponse(job.zip_path, media_type='application/zip', filename=f"Reports_{job_id}.zip")
+
 # ===============================
 # Farmer Module Endpoints
 # ===============================
@@ -1,14 +1,41 @@
 import pandas as pd
+import numpy as np
 import os
 import math
+import bisect
+
+from groundwater.decision.geojson_builder import GeoJSONBuilder, BINARY_DEFAULT_PRECISION
+from groundwater.decision.quantile_sketch import QuantileSketch, DEFAULT_QUANTILES
+from groundwater.decision.station_clusterer import StationClusterer
+from groundwater.decision.trend_analyzer import TrendAnalyzer
+from groundwater.decision.zone_engine import get_zone_engine
+from groundwater.utils.downsample import lttb_indices, density_sample_indices
+from groundwater.utils.main_utils.utils import get_file_version
 
 DATASET_PATH = "dataset.csv"
 _CACHE_DF = None
+_CACHE_VERSION = None
+
+# Derived results keyed by name, each stamped with the dataset version it was built from
+_VERSIONED_CACHE = {}
 
+# Friendly metric names accepted by the percentile endpoints
+SKETCH_METRICS = {
+    "stress_index": "Stress_Index",
+    "water_level": "Water_Level",
+}
+SKETCH_REGION_COLUMNS = ["District", "State"]
+
+# Chart point budgets; requests are rounded down to one of CHART_POINT_BUDGETS
+# so the cached views per endpoint stay few
+DEFAULT_HISTORY_POINTS = 100
+DEFAULT_SCATTER_POINTS = 2000
+MAX_CHART_POINTS = 10000
+CHART_POINT_BUDGETS = (10, 25, 50, 100, 250, 500, 1000, 2000, 5000, MAX_CHART_POINTS)
 
 
 def load_dataset():
-    global _CACHE_DF
+    global _CACHE_DF, _CACHE_VERSION
     if _CACHE_DF is not None:
         return _CACHE_DF
     
@@ -16,6 +43,9 @@ def load_dataset():
         raise FileNotFoundError(f"{DATASET_PATH} not found.")
     
     try:
+        # Taken before the read, so a file replaced meanwhile gets a new version
+        version = get_file_version(DATASET_PATH)
+
         # Dataset has headers: LAT, LON, Date, Water_Level, ...
         # Columns 8: Annual_Ground_Water_Draft_Total (Demand)
         # Column 10: Net_Ground_Water_Availability (Supply)
@@ -30,15 +60,9 @@ def load_dataset():
             else:
                 df['Stress_Index'] = 0
 
-        # Ensure 'zone' column exists
+        # Ensure 'zone' column exists (dashboard labels: Safe / Semi-Critical / Critical)
         if 'zone' not in df.columns:
-            # > 80% is Critical, > 50% is Warning, else Safe (Simplified)
-            def classify_zone(stress):
-                if stress > 0.8: return "Critical"
-                if stress > 0.5: return "Semi-Critical" 
-                return "Safe"
-                
-            df['zone'] = df['Stress_Index'].apply(classify_zone)
+            df['zone'] = get_zone_engine().classify(df['Stress_Index'], field='label', nan_unknown=True)
 
     except Exception as e:
         print(f"Error loading dataset: {e}")
@@ -50,8 +74,42 @@ def load_dataset():
          print(f"Warning: Dataset missing standard columns. Found: {df.columns.tolist()}")
 
     _CACHE_DF = df
+    # Version changes whenever the file on disk is replaced or rewritten
+    _CACHE_VERSION = version
     return df
 
+def get_dataset_version():
+    load_dataset()
+    return _CACHE_VERSION
+
+def reload_dataset():
+    """
+    Drops the cached dataset and every view built from it, then reads
+    dataset.csv again. Returns the new dataset version.
+    """
+    global _CACHE_DF, _CACHE_VERSION
+    _CACHE_DF = None
+    _CACHE_VERSION = None
+    _VERSIONED_CACHE.clear()
+    load_dataset()
+    return _CACHE_VERSION
+
+def _versioned(key, builder):
+    """
+    Returns builder() cached against the current dataset version.
+    """
+    version = get_dataset_version()
+    entry = _VERSIONED_CACHE.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = builder()
+    _VERSIONED_CACHE[key] = (version, value)
+    return value
+
+def _station_ids(df):
+    return df['LAT'].astype(str) + "_" + df['LON'].astype(str)
+
 def get_dashboard_stats():
     df = load_dataset()
     
@@ -64,7 +122,8 @@ def get_dashboard_stats():
     stress_col = 'Stress_Index' if 'Stress_Index' in df.columns else 'col_15'
     critical_count = 0
     if stress_col in latest_df.columns:
-        critical_count = latest_df[latest_df[stress_col] > 0.8].shape[0]
+        # Missing stress is UNKNOWN, never counted as critical
+        critical_count = (get_zone_engine().classify(latest_df[stress_col], nan_unknown=True) == "CRITICAL").sum()
     
     return {
         "avg_level": round(avg_level, 2),
@@ -73,47 +132,111 @@ def get_dashboard_stats():
         "supply_gap": 18
     }
 
+def _latest_station_frame():
+    """
+    Latest reading per station with its map status, built once per dataset version.
+    """
+    def build():
+        df = load_dataset()
+        latest = df.groupby(['LAT', 'LON']).last().reset_index()
+
+        stress = latest['Stress_Index'] if 'Stress_Index' in latest.columns else pd.Series(0, index=latest.index)
+        latest['status'] = get_zone_engine().classify(stress, field='status', nan_unknown=True)
+        return latest
+
+    return _versioned("latest_station_frame", build)
+
 def get_stations_for_map():
-    df = load_dataset()
-    latest_readings = df.groupby(['LAT', 'LON']).last().reset_index()
-    
+    latest_readings = _latest_station_frame()
+
     stations = []
-    for _, row in latest_readings.iterrows():
-        status = "Safe"
-        stress_val = row.get('Stress_Index', 0)
-        if stress_val > 0.8:
-            status = "Critical"
-        elif stress_val > 0.5:
-            status = "Warning"
-            
+    for lat, lon, level, status in zip(
+        latest_readings['LAT'].tolist(),
+        latest_readings['LON'].tolist(),
+        latest_readings['Water_Level'].tolist(),
+        latest_readings['status'].tolist(),
+    ):
         stations.append({
-            "id": f"{row['LAT']}_{row['LON']}", 
-            "name": f"Station {row['LAT']:.2f}, {row['LON']:.2f}",
-            "lat": row['LAT'],
-            "lng": row['LON'],
-            "level": row['Water_Level'],
+            "id": f"{lat}_{lon}", 
+            "name": f"Station {lat:.2f}, {lon:.2f}",
+            "lat": lat,
+            "lng": lon,
+            "level": level,
             "status": status
         })
 
     return stations
 
+def get_stations_binary(precision=BINARY_DEFAULT_PRECISION):
+    """
+    Station layer as a GWB1 binary payload: dictionary-encoded status
+    and the latest water level as the value column.
+    """
+    return GeoJSONBuilder.build_point_binary(
+        _latest_station_frame(),
+        precision=precision,
+        zone_col='status',
+        value_col='Water_Level',
+    )
+
+def get_station_clusterer():
+    """
+    Grid cluster hierarchy over the latest reading of every station,
+    built once per dataset version.
+    """
+    def build():
+        df = load_dataset()
+        latest = df.groupby(['LAT', 'LON']).last().reset_index()
+        latest['station_id'] = _station_ids(latest)
+        return StationClusterer.from_frame(
+            latest,
+            stress_col='Stress_Index',
+            zone_col='zone',
+            level_col='Water_Level',
+            id_col='station_id',
+        )
+
+    return _versioned("station_clusterer", build)
+
+def get_map_clusters(zoom, min_lat=-90.0, min_lon=-180.0, max_lat=90.0, max_lon=180.0,
+                     limit=StationClusterer.DEFAULT_LIMIT):
+    return get_station_clusterer().query(
+        zoom=zoom,
+        min_lat=min_lat,
+        min_lon=min_lon,
+        max_lat=max_lat,
+        max_lon=max_lon,
+        limit=limit,
+    )
+
+
+
+def _chart_points(max_points):
+    # Largest budget not above the request; the smallest for tiny requests
+    i = bisect.bisect_right(CHART_POINT_BUDGETS, int(max_points)) - 1
+    return CHART_POINT_BUDGETS[max(i, 0)]
+
+def get_historical_trends(max_points=DEFAULT_HISTORY_POINTS):
+    """
+    Average water level by date over the whole record, reduced to at most
+    max_points with LTTB so the shape of the series is kept.
+    """
+    max_points = _chart_points(max_points)
+
+    def build():
+        df = load_dataset()
+        # Aggregate avg water level by date
+        trend = df['Water_Level'].groupby(pd.to_datetime(df['Date'])).mean()
 
+        keep = lttb_indices(trend.index.to_numpy(), trend.to_numpy(dtype=np.float64), max_points)
+        trend = trend.iloc[keep]
 
-def get_historical_trends():
-    df = load_dataset()
-    # Aggregate avg water level by date
-    # Construct a Date column if needed, dataset has 'Date'
-    df['Date'] = pd.to_datetime(df['Date'])
-    trend = df.groupby('Date')['Water_Level'].mean().reset_index()
-    
-    history = []
-    for _, row in trend.iterrows():
-        history.append({
-            "date": row['Date'].strftime('%b %Y'),
-            "level": round(row['Water_Level'], 2)
-        })
-    # Sample last 50 points for visual clarity
-    return history[-50:]
+        return [
+            {"date": date.strftime('%b %Y'), "level": round(level, 2)}
+            for date, level in zip(trend.index, trend.tolist())
+        ]
+
+    return _versioned(("historical_trends", max_points), build)
 
 def get_nearest_station(user_lat, user_lon):
     df = load_dataset()
@@ -143,12 +266,8 @@ def get_nearest_station(user_lat, user_lon):
             nearest_station = row
             
     if nearest_station is not None:
-        status = "Safe"
-        if nearest_station['Stress_Index'] > 0.8:
-            status = "Critical"
-        elif nearest_station['Stress_Index'] > 0.5:
-            status = "Warning"
-            
+        status = get_zone_engine().classify_one(nearest_station['Stress_Index'], field='status', nan_unknown=True)
+
         return {
             "station_name": f"Station {nearest_station['LAT']:.2f}, {nearest_station['LON']:.2f}",
             "lat": nearest_station['LAT'],
@@ -341,22 +460,246 @@ def get_latest_data(station_id=None):
     latest_row = filtered_df.iloc[0].to_dict()
     return latest_row
 
-def get_stress_vs_water_scatter(station_id=None):
-    df = load_dataset()
-    filtered_df = _filter_by_station(df, station_id)
-    
-    cols_to_use = []
-    if 'Stress_Index' in df.columns: cols_to_use.append('Stress_Index')
-    if 'Water_Level' in df.columns: cols_to_use.append('Water_Level')
-    
-    if len(cols_to_use) < 2:
-        return []
+def _normalize_station_id(station_id):
+    try:
+        lat, lon = map(float, station_id.split('_'))
+        return f"{lat}_{lon}"
+    except ValueError:
+        return station_id
 
-    data = filtered_df[cols_to_use].dropna()
-    data.columns = ['stress_index', 'water_level']
-    
-    if len(data) > 2000:
-        data = data.sample(2000)
-        
-    return _sanitize(data)
+def get_latest_rows(station_ids=None, district=None, state=None):
+    """
+    Latest row per station (the same row get_latest_data picks), indexed by
+    station id and optionally filtered by station ids and/or District / State.
+    """
+    def build():
+        df = load_dataset()
+        latest = df.assign(Date=pd.to_datetime(df['Date'], errors='coerce'))
+        latest = latest.sort_values('Date', na_position='first', kind='stable')
+        latest = latest.drop_duplicates(subset=['LAT', 'LON'], keep='last')
+        latest.index = _station_ids(latest)
+        return latest
+
+    latest = _versioned("latest_rows", build)
+
+    if station_ids is not None:
+        # Repeated ids would give repeated rows
+        wanted = dict.fromkeys(_normalize_station_id(s) for s in station_ids)
+        latest = latest.loc[[s for s in wanted if s in latest.index]]
+    if district is not None and 'District' in latest.columns:
+        latest = latest[latest['District'] == district]
+    if state is not None and 'State' in latest.columns:
+        latest = latest[latest['State'] == state]
+
+    return latest
+
+def _reading_keys(df):
+    """
+    (station, Year, Month, Water_Level) of every row; Year / Month come
+    from Date when the frame has no such columns.
+    """
+    date = pd.to_datetime(df['Date'], errors='coerce') if 'Date' in df.columns else None
+    return pd.DataFrame({
+        'station': _station_ids(df),
+        'Year': (df['Year'] if 'Year' in df.columns else date.dt.year).astype(float),
+        'Month': (df['Month'] if 'Month' in df.columns else date.dt.month).astype(float),
+        'Water_Level': pd.to_numeric(df['Water_Level'], errors='coerce'),
+    }, index=df.index)
+
+def station_month_levels(frames):
+    """
+    Mean Water_Level per (station, Year, Month) over an iterable of frames
+    (e.g. the chunks of one file), so the result does not depend on how
+    the rows were split. Frames without the columns yoy_decline needs are
+    left out.
+    """
+    totals = [
+        _reading_keys(df).groupby(['station', 'Year', 'Month'])['Water_Level'].agg(['sum', 'count'])
+        for df in frames if _has_reading_keys(df)
+    ]
+    if not totals:
+        index = pd.MultiIndex.from_arrays([[], [], []], names=['station', 'Year', 'Month'])
+        return pd.Series([], index=index, dtype=np.float64, name='Water_Level')
+
+    totals = pd.concat(totals).groupby(level=[0, 1, 2]).sum()
+    return (totals['sum'] / totals['count'].where(totals['count'] > 0)).rename('Water_Level')
+
+def _has_reading_keys(df):
+    return {'LAT', 'LON', 'Water_Level'}.issubset(df.columns) \
+        and ('Date' in df.columns or {'Year', 'Month'}.issubset(df.columns))
+
+def _station_month_levels():
+    """
+    station_month_levels of the dataset, built once per dataset version.
+    """
+    return _versioned("station_month_levels", lambda: station_month_levels([load_dataset()]))
+
+def add_yoy_decline(df, levels=None):
+    """
+    Adds yoy_decline: each reading's Water_Level minus the station's level
+    in the same month one year earlier. Water_Level is depth below ground,
+    so a positive value is a falling water table.
+
+    levels (a station_month_levels table) is where the earlier reading is
+    looked up; by default the frame itself, else the dataset. The value is
+    NaN when there is no earlier reading. Frames without station
+    coordinates, Water_Level or a date are returned unchanged.
+    """
+    if not _has_reading_keys(df):
+        return df
+
+    keys = _reading_keys(df)
+    previous = pd.MultiIndex.from_arrays([keys['station'], keys['Year'] - 1, keys['Month']])
+
+    if levels is not None:
+        previous_level = levels.reindex(previous).to_numpy(dtype=np.float64)
+    else:
+        frame_levels = keys.groupby(['station', 'Year', 'Month'])['Water_Level'].mean()
+        previous_level = frame_levels.reindex(previous).to_numpy(dtype=np.float64)
+
+        missing = np.isnan(previous_level)
+        if missing.any():
+            try:
+                previous_level[missing] = _station_month_levels().reindex(previous[missing]).to_numpy(dtype=np.float64)
+            except FileNotFoundError:
+                pass
+
+    df['yoy_decline'] = keys['Water_Level'].to_numpy(dtype=np.float64) - previous_level
+    return df
+
+def get_level_history(station_ids=None, window=6):
+    """
+    Last `window` Water_Level readings per station, oldest first and
+    NaN-padded for short histories, indexed by station id (same ordering
+    as get_latest_rows, so the last column is the latest reading).
+    """
+    def build():
+        df = load_dataset()
+        readings = df.assign(Date=pd.to_datetime(df['Date'], errors='coerce'), station=_station_ids(df))
+        readings = readings.sort_values('Date', na_position='first', kind='stable')
+        readings = readings.groupby('station', sort=False).tail(window)
+
+        column = window - 1 - readings.groupby('station', sort=False).cumcount(ascending=False)
+        history = readings.assign(column=column).pivot(index='station', columns='column', values='Water_Level')
+        return history.reindex(columns=range(window))
+
+    history = _versioned(("level_history", window), build)
+
+    if station_ids is not None:
+        history = history.reindex([_normalize_station_id(s) for s in station_ids])
+    return history
+
+def get_stress_vs_water_scatter(station_id=None, max_points=DEFAULT_SCATTER_POINTS):
+    """
+    Stress index vs water level pairs, thinned with a deterministic
+    density-preserving sample so the chart is stable between refreshes.
+    """
+    max_points = _chart_points(max_points)
+
+    def build():
+        df = load_dataset()
+        filtered_df = _filter_by_station(df, station_id)
+
+        cols_to_use = []
+        if 'Stress_Index' in df.columns: cols_to_use.append('Stress_Index')
+        if 'Water_Level' in df.columns: cols_to_use.append('Water_Level')
+
+        if len(cols_to_use) < 2:
+            return []
+
+        data = filtered_df[cols_to_use].dropna()
+        data.columns = ['stress_index', 'water_level']
+
+        keep = density_sample_indices(data['stress_index'], data['water_level'], max_points)
+        return _sanitize(data.iloc[keep])
+
+    # Single stations are small; only the network-wide scatter is worth caching
+    if station_id:
+        return build()
+    return _versioned(("stress_water_scatter", max_points), build)
+
+
+
+def get_quantile_sketches(metric="stress_index"):
+    """
+    One quantile sketch for the whole dataset, one per station and one per
+    District / State, built once per dataset version.
+    """
+    column = SKETCH_METRICS.get(metric, metric)
+
+    def build():
+        df = load_dataset()
+        if column not in df.columns:
+            raise ValueError(f"Dataset has no '{column}' column to sketch")
+
+        values = df[column].to_numpy()
+        sketches = {
+            "all": QuantileSketch.from_array(values),
+            "station": QuantileSketch.build_grouped(values, _station_ids(df)),
+        }
+        for region_col in SKETCH_REGION_COLUMNS:
+            if region_col in df.columns:
+                sketches[region_col] = QuantileSketch.build_grouped(values, df[region_col])
+        return sketches
+
+    return _versioned(("sketch", column), build)
+
+def get_percentiles(metric="stress_index", station_id=None, region_col=None, region=None,
+                    quantiles=DEFAULT_QUANTILES):
+    """
+    Percentiles for a station, a region, or the whole network, answered
+    from the precomputed sketches.
+    """
+    sketches = get_quantile_sketches(metric)
+
+    if station_id:
+        sketch = sketches["station"].get(station_id)
+    elif region_col:
+        sketch = sketches.get(region_col, {}).get(region)
+    else:
+        sketch = sketches["all"]
+
+    if sketch is None:
+        return None
+    return sketch.summary(quantiles)
+
+def get_percentiles_by_region(metric="stress_index", region_col="District",
+                              quantiles=DEFAULT_QUANTILES):
+    sketches = get_quantile_sketches(metric)
+    if region_col not in sketches:
+        return {}
+
+    return {
+        str(region): sketch.summary(quantiles)
+        for region, sketch in sketches[region_col].items()
+    }
+
+def get_station_trend_significance():
+    """
+    Mann-Kendall / Sen's slope for every station's Water_Level series,
+    computed once per dataset version.
+    """
+    def build():
+        df = load_dataset()
+        frame = df[['Date', 'Water_Level']].assign(station_id=_station_ids(df))
+        return TrendAnalyzer.station_trend_significance(
+            frame,
+            station_col='station_id',
+            date_col='Date',
+            value_col='Water_Level',
+        )
+
+    return _versioned("station_trend_significance", build)
+
+def get_fastest_declining_stations(top_n=20, alpha=0.05):
+    """
+    Stations with a significant long-term decline, steepest first.
+    Water_Level is depth below ground, so a decline is a positive slope.
+    """
+    trends = get_station_trend_significance()
+
+    declining = trends[(trends['p_value'] < alpha) & (trends['sens_slope'] > 0)]
+    declining = declining.sort_values(['sens_slope', 'p_value'], ascending=[False, True]).head(top_n)
 
+    result = declining.rename(columns={'sens_slope': 'sens_slope_m_per_year'})
+    return _sanitize(result.round({'var_s': 2, 'z': 4, 'p_value': 6, 'sens_slope_m_per_year': 4}))
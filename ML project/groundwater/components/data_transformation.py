@@ -151,7 +151,9 @@ class DataTransformation:
             data_transformation_artifact = DataTransformationArtifact(
             transformed_object_file_path=self.data_transformation_config.transformed_object_file_path,
             transformed_train_file_path=self.data_transformation_config.transformed_train_file_path,
-            transformed_test_file_path=self.data_transformation_config.transformed_test_file_path
+            transformed_test_file_path=self.data_transformation_config.transformed_test_file_path,
+            valid_train_file_path=self.data_validation_artifact.valid_train_file_path,
+            valid_test_file_path=self.data_validation_artifact.valid_test_file_path
         )
 
             logging.info("Data transformation completed successfully")
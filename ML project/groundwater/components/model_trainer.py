@@ -1,7 +1,9 @@
 import os
 import sys
 import json
+import time
 import numpy as np
+import pandas as pd
 
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
@@ -12,18 +14,25 @@ from groundwater.entity.artifact_entity import (
 )
 
 from groundwater.entity.config_entity import ModelTrainerConfig
-from groundwater.utils.ml_utils.model.estimator import GroundwaterModel
-from groundwater.utils.main_utils.utils import save_object, load_object
+from groundwater.utils.ml_utils.model.estimator import GroundwaterModel, DirectForecastModel
+from groundwater.utils.ml_utils.model.conformal import ConformalIntervals
+from groundwater.utils.ml_utils.model.candidate_scheduler import CandidateScheduler
+from groundwater.utils.rolling_features import RollingFeatureState
+from groundwater.utils.main_utils.utils import save_object, load_object, get_file_digest
+from groundwater.pipeline.model_analysis import ModelAnalysis, ANALYSIS_FILE_PATH
 
 from groundwater.utils.ml_utils.metric.classification_metric import (
     get_classification_score,
 )
 
-from sklearn.metrics import accuracy_score, r2_score
 from sklearn.linear_model import LogisticRegression, LinearRegression
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
 
+# Held-out start rows used to compare direct and recursive forecasts
+DIRECT_BENCHMARK_MAX_ROWS = 2000
+CALIBRATION_SEED = 42
+
 
 class ModelTrainer:
     def __init__(
@@ -43,6 +52,18 @@ class ModelTrainer:
             return "classification"
         return "regression"
 
+    @staticmethod
+    def _calibration_split(n_rows: int, fraction: float):
+        """
+        (selection, calibration) row indices of the test split, drawn with a
+        fixed seed. Only the selection rows are used to pick the model.
+        """
+        if n_rows < 2:
+            raise ValueError("Test split needs at least 2 rows for model selection and calibration")
+        n_calibration = min(max(1, int(round(n_rows * fraction))), n_rows - 1)
+        order = np.random.default_rng(CALIBRATION_SEED).permutation(n_rows)
+        return np.sort(order[n_calibration:]), np.sort(order[:n_calibration])
+
     def train_model(self, X_train, y_train, X_test, y_test):
 
         problem_type = self._detect_problem_type(y_train)
@@ -65,26 +86,26 @@ class ModelTrainer:
             }
 
         # ===============================
-        # Train all models & collect metrics
+        # Hold out a calibration slice
         # ===============================
-        leaderboard = {}
-        trained_models = {}
-
-        for name, model in models.items():
-            logging.info(f"Training model: {name}")
-
-            model.fit(X_train, y_train)
-            y_pred = model.predict(X_test)
-
-            if problem_type == "classification":
-                score = accuracy_score(y_test, y_pred)
-            else:
-                score = r2_score(y_test, y_pred)
+        # Selection never sees it, so intervals calibrated on it are split-conformal
+        selection, calibration = self._calibration_split(
+            len(y_test), self.model_trainer_config.calibration_fraction
+        )
+        X_calibration, y_calibration = X_test[calibration], y_test[calibration]
+        X_test, y_test = X_test[selection], y_test[selection]
+        logging.info(f"Test split: {len(selection)} selection / {len(calibration)} calibration rows")
 
-            leaderboard[name] = float(score)
-            trained_models[name] = model
+        # ===============================
+        # Train all models & collect metrics
+        # ===============================
+        results = CandidateScheduler(self.model_trainer_config.cpu_budget).run(
+            models, X_train, y_train, X_test, y_test,
+            metric="accuracy" if problem_type == "classification" else "r2",
+        )
 
-            logging.info(f"{name} score: {score}")
+        leaderboard = {name: result.score for name, result in results.items()}
+        trained_models = {name: result.model for name, result in results.items()}
 
         # ===============================
         # Select best model
@@ -103,8 +124,9 @@ class ModelTrainer:
 
         metrics_path = os.path.join(metrics_dir, "metrics.json")
 
+        # Score plus fit time, predict latency, peak memory and size per candidate
         with open(metrics_path, "w") as f:
-            json.dump(leaderboard, f, indent=4)
+            json.dump({name: result.metrics() for name, result in results.items()}, f, indent=4)
 
         logging.info(f"All model metrics saved at: {metrics_path}")
         logging.info(f"Leaderboard: {leaderboard}")
@@ -118,10 +140,16 @@ class ModelTrainer:
 
             train_metric = get_classification_score(y_train, train_pred)
             test_metric = get_classification_score(y_test, test_pred)
+            intervals = None
         else:
             train_metric = None
             test_metric = None
 
+            test_pred = best_model.predict(X_test)
+            # Split-conformal interval widths from the calibration slice
+            intervals = ConformalIntervals.calibrate(y_calibration, best_model.predict(X_calibration))
+            logging.info(f"Conformal intervals: {intervals.to_dict()}")
+
         # ===============================
         # Load preprocessor
         # ===============================
@@ -137,6 +165,7 @@ class ModelTrainer:
         network_model = GroundwaterModel(
             preprocessor=preprocessor,
             model=best_model,
+            intervals=intervals,
         )
 
         save_object(
@@ -147,6 +176,21 @@ class ModelTrainer:
         os.makedirs("final_model", exist_ok=True)
         save_object("final_model/model.pkl", network_model)
 
+        # ===============================
+        # Model analysis (served by /api/model/analysis)
+        # ===============================
+        analysis = ModelAnalysis.build(
+            network_model, y_test, test_pred,
+            problem_type=problem_type,
+            model_name=best_model_name,
+            model_version=get_file_digest("final_model/model.pkl"),
+            # Permutation importance on rows model selection did not use
+            X_importance=X_calibration,
+            y_importance=y_calibration,
+        )
+        ModelAnalysis.save(analysis, self.model_trainer_config.analysis_file_path)
+        ModelAnalysis.save(analysis, ANALYSIS_FILE_PATH)
+
         model_trainer_artifact = ModelTrainerArtifact(
             trained_model_file_path=self.model_trainer_config.trained_model_file_path,
             train_metric_artifact=train_metric,
@@ -165,9 +209,175 @@ class ModelTrainer:
             X_train, y_train = train_data["X"], train_data["y"]
             X_test, y_test = test_data["X"], test_data["y"]
 
-            return self.train_model(X_train, y_train, X_test, y_test)
+            model_trainer_artifact = self.train_model(X_train, y_train, X_test, y_test)
+
+            if self.model_trainer_config.forecast_mode == "direct":
+                self.train_direct_model()
+
+            return model_trainer_artifact
 
         except Exception as e:
             raise GroundwaterException(e, sys)
 
+    # ===============================
+    # Direct multi-horizon model
+    # ===============================
+    @staticmethod
+    def _horizon_frame(train_file_path: str, test_file_path: str, horizons: int):
+        """
+        Train and test rows in station / date order, with (n, horizons)
+        targets (Water_Level h readings later, NaN past the end of the
+        series) and (n, k) level histories for seeding recursive forecasts.
+        """
+        df = pd.concat(
+            [
+                pd.read_csv(train_file_path).assign(split="train"),
+                pd.read_csv(test_file_path).assign(split="test"),
+            ],
+            ignore_index=True,
+        )
+        order = pd.to_datetime(df["Date"], errors="coerce")
+        df = df.assign(order=order).sort_values(["LAT", "LON", "order"], kind="stable").reset_index(drop=True)
+
+        levels = df.groupby(["LAT", "LON"], sort=False)["Water_Level"]
+        targets = np.column_stack([levels.shift(-h).to_numpy() for h in range(1, horizons + 1)])
+
+        size = RollingFeatureState.history_size()
+        history = np.column_stack([levels.shift(size - 1 - k).to_numpy() for k in range(size)])
+
+        return df.drop(columns=["order"]), targets, history
+
+    def train_direct_model(self):
+        """
+        Fits one multi-output regressor predicting the levels 1..H steps
+        ahead from the current row, so a forecast is a single predict call
+        instead of H sequential ones.
+        """
+        try:
+            config = self.model_trainer_config
+            artifact = self.data_transformation_artifact
+            horizons = config.direct_horizons
+
+            if not artifact.valid_train_file_path or not artifact.valid_test_file_path:
+                logging.info("Direct model skipped: untransformed train / test files unavailable")
+                return None
+
+            preprocessor = load_object(artifact.transformed_object_file_path)
+            df, targets, history = self._horizon_frame(
+                artifact.valid_train_file_path, artifact.valid_test_file_path, horizons
+            )
+
+            # Only rows with every horizon observed
+            complete = ~np.isnan(targets).any(axis=1)
+            train = complete & (df["split"] == "train").to_numpy()
+            test = complete & (df["split"] == "test").to_numpy()
+            logging.info(f"Direct model: {train.sum()} train / {test.sum()} test rows, {horizons} horizons")
+            if not train.any() or not test.any():
+                raise ValueError(f"No station series long enough for {horizons} horizons")
+
+            X = preprocessor.transform(df[list(preprocessor.feature_names_in_)])
+            if hasattr(X, "toarray"):
+                X = X.toarray()
+
+            # Calibration rows of the test split are kept out of selection
+            test_rows = np.flatnonzero(test)
+            selection, calibration = self._calibration_split(len(test_rows), config.calibration_fraction)
+
+            X_train, Y_train = X[train], targets[train]
+            X_test, Y_test = X[test_rows[selection]], targets[test_rows[selection]]
+            X_calibration, Y_calibration = X[test_rows[calibration]], targets[test_rows[calibration]]
 
+            models = {
+                "LinearRegression": LinearRegression(),
+                "RandomForestRegressor": RandomForestRegressor(n_estimators=50, n_jobs=-1),
+                "DecisionTreeRegressor": DecisionTreeRegressor(),
+            }
+
+            results = CandidateScheduler(config.cpu_budget).run(
+                models, X_train, Y_train, X_test, Y_test, metric="r2"
+            )
+            leaderboard = {name: result.score for name, result in results.items()}
+            trained_models = {name: result.model for name, result in results.items()}
+
+            best_model_name = max(leaderboard, key=leaderboard.get)
+            best_model = trained_models[best_model_name]
+            logging.info(f"Best direct model: {best_model_name} with score {leaderboard[best_model_name]}")
+
+            residuals = Y_calibration - best_model.predict(X_calibration)
+            intervals = ConformalIntervals.calibrate_horizons(
+                {h: residuals[:, h - 1] for h in range(1, horizons + 1)}
+            )
+
+            direct_model = DirectForecastModel(
+                preprocessor=preprocessor,
+                model=best_model,
+                horizons=horizons,
+                intervals=intervals,
+            )
+
+            os.makedirs(os.path.dirname(config.direct_model_file_path), exist_ok=True)
+            save_object(config.direct_model_file_path, direct_model)
+
+            os.makedirs("final_model", exist_ok=True)
+            save_object("final_model/direct_model.pkl", direct_model)
+
+            recursive_model = load_object(config.trained_model_file_path)
+            self.benchmark_direct_model(
+                recursive_model, direct_model,
+                df[test].drop(columns=["split"]), targets[test], history[test],
+            )
+
+            return direct_model
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def benchmark_direct_model(self, recursive_model, direct_model, start_rows, targets, history):
+        """
+        Latency and per-horizon MAE of recursive vs direct forecasts from the
+        same held-out rows, saved next to metrics.json.
+        """
+        try:
+            # Imported here: the forecaster depends on the serving data loader
+            from groundwater.pipeline.forecasting import ForecastingPipeline
+
+            if len(start_rows) > DIRECT_BENCHMARK_MAX_ROWS:
+                keep = np.linspace(0, len(start_rows) - 1, DIRECT_BENCHMARK_MAX_ROWS).astype(np.int64)
+                start_rows, targets, history = start_rows.iloc[keep], targets[keep], history[keep]
+
+            horizons = direct_model.horizons
+            report = {"rows": len(start_rows), "horizons": horizons}
+
+            pipelines = {
+                "recursive": ForecastingPipeline(model=recursive_model),
+                "direct": ForecastingPipeline(model=recursive_model, direct_model=direct_model),
+            }
+            for name, pipeline in pipelines.items():
+                start = time.perf_counter()
+                # Inputs stay on the rows' own timeline, as the direct model's did
+                result = pipeline._forecast(start_rows, steps=horizons, history=history, from_row_dates=True)
+                elapsed = time.perf_counter() - start
+
+                mae = np.abs(result["water_level"] - targets.T).mean(axis=1)
+                report[name] = {
+                    "latency_ms": round(elapsed * 1000, 2),
+                    "latency_ms_per_1k_stations": round(elapsed * 1000 * 1000 / len(start_rows), 2),
+                    "mae": round(float(mae.mean()), 4),
+                    "mae_by_horizon": [round(float(v), 4) for v in mae],
+                }
+
+            path = self.model_trainer_config.direct_benchmark_file_path
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(report, f, indent=4)
+
+            logging.info(
+                f"Direct vs recursive: MAE {report['direct']['mae']} vs {report['recursive']['mae']}, "
+                f"latency {report['direct']['latency_ms']} ms vs {report['recursive']['latency_ms']} ms"
+            )
+            return report
+
+        except Exception as e:
+            # The benchmark is informational; never fail training over it
+            logging.info(f"Direct vs recursive benchmark skipped: {e}")
+            return None
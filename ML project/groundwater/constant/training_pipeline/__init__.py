@@ -70,6 +70,20 @@ MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
 
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD: float = 0.05
+# Cores shared by concurrently trained candidates (None: all cores)
+MODEL_TRAINER_CPU_BUDGET = None
+# Share of the test split held out from model selection, for calibrating
+# the conformal prediction intervals
+MODEL_TRAINER_CALIBRATION_FRACTION: float = 0.5
+
+# "recursive": one-step model only. "direct": also fit a multi-output model
+# predicting every horizon 1..MODEL_TRAINER_DIRECT_HORIZONS from one row
+MODEL_TRAINER_FORECAST_MODE: str = "recursive"
+MODEL_TRAINER_DIRECT_HORIZONS: int = 20  # 5 years of quarterly steps
+MODEL_TRAINER_DIRECT_MODEL_NAME: str = "direct_model.pkl"
+MODEL_TRAINER_DIRECT_BENCHMARK_FILE_NAME: str = "direct_benchmark.json"
+# Precomputed /api/model/analysis payload
+MODEL_TRAINER_ANALYSIS_FILE_NAME: str = "model_analysis.json"
 
 # ===============================
 # Deployment / Cloud (Optional, Generic)
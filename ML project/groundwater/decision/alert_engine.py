@@ -1,5 +1,51 @@
-from dataclasses import dataclass
-from typing import List
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+from groundwater.utils.main_utils.utils import read_yaml_file
+
+# ML project/config/alert_rules.yaml, independent of the working directory
+ALERT_RULES_PATH = os.path.join(Path(__file__).resolve().parents[2], "config", "alert_rules.yaml")
+
+NO_ALERT = "NO_ALERT"
+
+_COMPARISONS = {
+    "<": np.less,
+    "<=": np.less_equal,
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+
+# Used when config/alert_rules.yaml is not shipped
+DEFAULT_RULES = [
+    {
+        "name": "critical_zone",
+        "level": "CRITICAL",
+        "message": "Groundwater level is in CRITICAL zone. Immediate action required.",
+        "when": {"column": "zone", "op": "==", "value": "CRITICAL"},
+    },
+    {
+        "name": "semi_critical_zone",
+        "level": "WARNING",
+        "message": "Groundwater level is in SEMI-CRITICAL zone. Monitor closely.",
+        "when": {"column": "zone", "op": "==", "value": "SEMI-CRITICAL"},
+    },
+    {
+        "name": "high_stress",
+        "level": "CRITICAL",
+        "message": "Stress index is very high. Groundwater extraction exceeds safe limits.",
+        "when": {"column": "stress_index", "op": ">=", "value": 0.7},
+    },
+]
 
 
 @dataclass
@@ -10,49 +56,334 @@ class Alert:
     stress_index: float
 
 
-class AlertEngine:
+# ===============================
+# Rule compilation
+# ===============================
+class _Columns:
     """
-    Rule-based alert engine for groundwater decision system
+    Column access for one evaluation: case-insensitive names, and each
+    column converted to a numeric or string array at most once.
     """
 
-    CRITICAL_STRESS_THRESHOLD = 0.7
+    def __init__(self, frame):
+        self.frame = frame
+        self.names = {str(name).lower(): name for name in frame.keys()}
+        self._cache = {}
 
-    @staticmethod
-    def generate_alerts(zone: str, stress_index: float) -> List[Alert]:
-        alerts: List[Alert] = []
-
-        # Rule 1: Zone based alert
-        if zone == "CRITICAL":
-            alerts.append(
-                Alert(
-                    level="CRITICAL",
-                    message="Groundwater level is in CRITICAL zone. Immediate action required.",
-                    zone=zone,
-                    stress_index=stress_index,
-                )
-            )
+    def has(self, column: str) -> bool:
+        return column.lower() in self.names
+
+    def missing(self, column: str) -> np.ndarray:
+        key = (column.lower(), "missing")
+        if key not in self._cache:
+            self._cache[key] = pd.isna(pd.Series(np.asarray(self.frame[self.names[column.lower()]]))).to_numpy()
+        return self._cache[key]
+
+    def get(self, column: str, numeric: bool) -> np.ndarray:
+        key = (column.lower(), numeric)
+        if key not in self._cache:
+            values = np.asarray(self.frame[self.names[column.lower()]])
+            if numeric:
+                values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+            else:
+                values = values.astype(str)
+            self._cache[key] = values
+        return self._cache[key]
+
+
+Predicate = Callable[[_Columns], np.ndarray]
+
+
+def _normalize_state(state) -> str:
+    return " ".join(str(state).split()).upper()
+
+
+def _compile_condition(spec: Mapping) -> Tuple[Predicate, Tuple[str, ...]]:
+    """
+    Turns a `when` mapping into (predicate, referenced columns). The
+    predicate maps the evaluation's columns to a boolean mask.
+    """
+    for combinator, reduce in (("all", np.logical_and.reduce), ("any", np.logical_or.reduce)):
+        if combinator in spec:
+            parts = [_compile_condition(part) for part in spec[combinator]]
+            if not parts:
+                raise ValueError(f"'{combinator}' needs at least one condition")
+            columns = tuple(dict.fromkeys(c for _, cols in parts for c in cols))
+            return (lambda cols, parts=parts, reduce=reduce: reduce([p(cols) for p, _ in parts])), columns
 
-        elif zone == "SEMI-CRITICAL":
-            alerts.append(
-                Alert(
-                    level="WARNING",
-                    message="Groundwater level is in SEMI-CRITICAL zone. Monitor closely.",
-                    zone=zone,
-                    stress_index=stress_index,
-                )
+    column, op, value = spec["column"], spec["op"], spec["value"]
+
+    if op == "in":
+        values = list(value)
+        numeric = all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values)
+        targets = np.asarray(values, dtype=np.float64 if numeric else str)
+        return (lambda cols: np.isin(cols.get(column, numeric), targets)), (column,)
+
+    if op not in _COMPARISONS:
+        raise ValueError(f"Unknown operator '{op}' in alert rule")
+    compare = _COMPARISONS[op]
+
+    if isinstance(value, str):
+        if op == "==":
+            return (lambda cols: cols.get(column, False) == value), (column,)
+        if op == "!=":
+            return (lambda cols: (cols.get(column, False) != value) & ~cols.missing(column)), (column,)
+        raise ValueError(f"Operator '{op}' needs a numeric value")
+
+    threshold = float(value)
+
+    def predicate(cols):
+        values = cols.get(column, True)
+        with np.errstate(invalid="ignore"):
+            mask = compare(values, threshold)
+        # NaN != x is True; a missing value never fires a rule
+        return mask & ~np.isnan(values) if op == "!=" else mask
+
+    return predicate, (column,)
+
+
+@dataclass
+class AlertRule:
+    name: str
+    level: str
+    message: str
+    predicate: Predicate
+    columns: Tuple[str, ...]
+    state: Optional[str] = None                        # only rows of this state
+    excluded_states: Tuple[str, ...] = ()              # states that override this rule
+
+    @property
+    def key(self) -> str:
+        return f"{self.state}:{self.name}" if self.state else self.name
+
+
+@dataclass
+class AlertEvaluation:
+    rules: List[AlertRule]
+    masks: np.ndarray                  # (n_rules, n_rows) bool
+    timings: Dict[str, float]          # rule key -> seconds
+    skipped: List[str] = field(default_factory=list)
+    columns: Optional[_Columns] = None
+
+    @property
+    def n_rows(self) -> int:
+        return self.masks.shape[1]
+
+    def summaries(self, separator: str = " | ") -> List[str]:
+        """
+        Messages of the rules that fired, joined per row (NO_ALERT if none).
+        """
+        joined = np.full(self.n_rows, "", dtype=object)
+        for rule, mask in zip(self.rules, self.masks):
+            joined = np.where(
+                mask,
+                np.where(joined == "", rule.message, joined + separator + rule.message),
+                joined,
             )
+        return np.where(joined == "", NO_ALERT, joined).tolist()
+
+    def records(self, zone_col: str = "zone", stress_col: str = "stress_index") -> List[Dict]:
+        """
+        One dict per fired alert, ordered by row and then by rule.
+        """
+        rule_idx, rows = np.nonzero(self.masks)
+        order = np.lexsort((rule_idx, rows))
+        rule_idx, rows = rule_idx[order], rows[order]
+
+        def column(name, numeric):
+            if self.columns is not None and self.columns.has(name):
+                return self.columns.get(name, numeric)
+            return np.full(self.n_rows, None, dtype=object)
+
+        zones = column(zone_col, False)
+        stress = column(stress_col, True)
 
-        # Rule 2: Stress index based alert
-        if stress_index >= AlertEngine.CRITICAL_STRESS_THRESHOLD:
-            alerts.append(
-                Alert(
-                    level="CRITICAL",
-                    message="Stress index is very high. Groundwater extraction exceeds safe limits.",
-                    zone=zone,
-                    stress_index=stress_index,
-                )
+        return [
+            {
+                "row": int(row),
+                "level": self.rules[i].level,
+                "zone": None if zones[row] is None else str(zones[row]),
+                "stress_index": None if stress[row] is None else float(stress[row]),
+                "message": self.rules[i].message,
+            }
+            for i, row in zip(rule_idx.tolist(), rows.tolist())
+        ]
+
+    def counts(self) -> Dict[str, int]:
+        return {rule.key: int(mask.sum()) for rule, mask in zip(self.rules, self.masks)}
+
+    def timing_report(self) -> List[Dict]:
+        counts = self.counts()
+        return [
+            {
+                "rule": rule.key,
+                "level": rule.level,
+                "matches": counts[rule.key],
+                "eval_ms": round(self.timings[rule.key] * 1000, 4),
+            }
+            for rule in self.rules
+        ]
+
+
+class AlertRuleSet:
+    """
+    Alert rules compiled once into vectorized predicates.
+
+    Every rule is evaluated as a boolean mask over all rows of a frame, so
+    the cost is one numpy expression per rule regardless of the row count.
+    State rules are gated by the frame's state column; default rules that
+    a state overrides are masked out for that state's rows, unless the
+    override is skipped on the frame (then the default still applies to
+    them, so the state is never left without the rule). State values
+    match the configured names case- and whitespace-insensitively, or
+    through state_aliases (e.g. a state code).
+    """
+
+    def __init__(self, rules: List[AlertRule], state_columns: Sequence[str] = ("State", "state"),
+                 state_aliases: Optional[Mapping[str, Sequence[str]]] = None):
+        self.rules = rules
+        self.state_columns = list(state_columns)
+
+        # Normalized state name or alias -> state as named in the rules
+        self.state_names = {_normalize_state(rule.state): rule.state for rule in rules if rule.state}
+        for state, aliases in (state_aliases or {}).items():
+            for alias in [state, *aliases]:
+                self.state_names[_normalize_state(alias)] = str(state)
+
+    def _canonical_states(self, states: np.ndarray) -> np.ndarray:
+        """
+        Configured state name per row; "" for states without rules.
+        """
+        values, inverse = np.unique(states, return_inverse=True)
+        canonical = np.asarray([self.state_names.get(_normalize_state(v), "") for v in values], dtype=object)
+        return canonical[inverse.reshape(-1)].astype(str)
+
+    @classmethod
+    def from_dict(cls, config: Mapping) -> "AlertRuleSet":
+        def build(spec, state=None, excluded=()):
+            predicate, columns = _compile_condition(spec["when"])
+            return AlertRule(
+                name=spec["name"],
+                level=spec.get("level", "WARNING"),
+                message=spec["message"],
+                predicate=predicate,
+                columns=columns,
+                state=state,
+                excluded_states=tuple(excluded),
             )
 
-        return alerts
+        state_specs = config.get("states") or {}
+        overrides: Dict[str, List[str]] = {}
+        for state, specs in state_specs.items():
+            for spec in specs:
+                overrides.setdefault(spec["name"], []).append(str(state))
+
+        rules = [build(spec, excluded=overrides.get(spec["name"], ())) for spec in config.get("default", [])]
+        for state, specs in state_specs.items():
+            rules.extend(build(spec, state=str(state)) for spec in specs)
+
+        return cls(rules, config.get("state_columns", ("State", "state")), config.get("state_aliases"))
+
+    @classmethod
+    def from_config(cls, path: str = ALERT_RULES_PATH) -> "AlertRuleSet":
+        try:
+            return cls.from_dict(read_yaml_file(path))
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def evaluate(self, frame) -> AlertEvaluation:
+        """
+        frame: DataFrame or mapping of equal-length columns.
+        """
+        cols = _Columns(frame)
+        n_rows = len(next(iter(frame.values()))) if isinstance(frame, Mapping) else len(frame)
+        state_col = next((c for c in self.state_columns if cols.has(c)), None)
+
+        states = None
+        if state_col is not None and self.state_names:
+            states = self._canonical_states(cols.get(state_col, False))
+            if len(states) and not np.any(states != ""):
+                logging.info(f"No '{state_col}' value matches a state with alert rules; only default rules apply")
+
+        def runnable(rule):
+            return all(cols.has(c) for c in rule.columns) and not (rule.state and state_col is None)
+
+        # (name, state) of overrides that cannot run on this frame
+        skipped_overrides = {(rule.name, rule.state) for rule in self.rules if rule.state and not runnable(rule)}
+
+        applied, masks, timings, skipped = [], [], {}, []
+
+        for rule in self.rules:
+            if not runnable(rule):
+                skipped.append(rule.key)
+                continue
+            excluded = [s for s in rule.excluded_states if (rule.name, s) not in skipped_overrides]
 
+            start = time.perf_counter()
+            mask = np.asarray(rule.predicate(cols), dtype=bool)
+            if states is not None:
+                if rule.state:
+                    mask &= states == rule.state
+                elif excluded:
+                    mask &= ~np.isin(states, excluded)
+            timings[rule.key] = time.perf_counter() - start
 
+            applied.append(rule)
+            masks.append(mask)
+
+        return AlertEvaluation(
+            rules=applied,
+            masks=np.vstack(masks) if masks else np.zeros((0, n_rows), dtype=bool),
+            timings=timings,
+            skipped=skipped,
+            columns=cols,
+        )
+
+
+_ALERT_RULES = None
+
+
+def get_alert_rules() -> AlertRuleSet:
+    global _ALERT_RULES
+    if _ALERT_RULES is None:
+        if os.path.exists(ALERT_RULES_PATH):
+            _ALERT_RULES = AlertRuleSet.from_config()
+        else:
+            _ALERT_RULES = AlertRuleSet.from_dict({"default": DEFAULT_RULES})
+    return _ALERT_RULES
+
+
+class AlertEngine:
+    """
+    Rule-based alert engine for groundwater decision system
+    (rules from config/alert_rules.yaml)
+    """
+
+    @staticmethod
+    def evaluate(frame) -> AlertEvaluation:
+        """
+        Evaluates every rule over a whole frame and logs per-rule timing.
+        """
+        evaluation = get_alert_rules().evaluate(frame)
+
+        total_ms = sum(evaluation.timings.values()) * 1000
+        logging.info(
+            f"Alert rules evaluated over {evaluation.n_rows} rows in {total_ms:.2f} ms: "
+            + ", ".join(f"{r['rule']}={r['eval_ms']}ms/{r['matches']}" for r in evaluation.timing_report())
+        )
+        return evaluation
+
+    @staticmethod
+    def generate_alerts(zone: str, stress_index: float) -> List[Alert]:
+        evaluation = get_alert_rules().evaluate({"zone": [zone], "stress_index": [stress_index]})
+
+        return [
+            Alert(
+                level=rule.level,
+                message=rule.message,
+                zone=zone,
+                stress_index=stress_index,
+            )
+            for rule, mask in zip(evaluation.rules, evaluation.masks)
+            if mask[0]
+        ]
@@ -0,0 +1,236 @@
+import os
+import sys
+import threading
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from groundwater.decision.alert_engine import ALERT_RULES_PATH
+from groundwater.decision.zone_engine import ZoneEngine, get_zone_engine
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+from groundwater.utils.main_utils.utils import read_yaml_file
+
+DEFAULT_HYSTERESIS = 0.05
+DEFAULT_COOLDOWN_DAYS = 90
+
+_NAT = np.datetime64("NaT", "ns")
+
+
+@dataclass
+class AlertTransition:
+    station_id: str
+    timestamp: pd.Timestamp
+    from_zone: str
+    to_zone: str
+    stress_index: float
+    kind: str          # escalation / recovery
+
+    def to_dict(self) -> Dict:
+        return {
+            "station_id": self.station_id,
+            "timestamp": self.timestamp.isoformat(),
+            "from_zone": self.from_zone,
+            "to_zone": self.to_zone,
+            "stress_index": round(self.stress_index, 4),
+            "kind": self.kind,
+        }
+
+
+class AlertStateStore:
+    """
+    Remembers the alert zone of every station and reports only changes.
+
+    Readings at or before a station's last processed timestamp are ignored,
+    so each ingest costs time proportional to the new readings only. Zone
+    changes follow the zone table with two damping rules:
+
+    - hysteresis: leaving a zone downwards needs the stress index to be
+      `hysteresis` below the zone's lower bound;
+    - cooldown: no recovery within `cooldown` of the station's previous
+      transition. Escalations are never delayed.
+
+    Stations start in the lowest zone, so a first reading in a higher zone
+    is reported as an escalation.
+    """
+
+    def __init__(
+        self,
+        hysteresis: float = DEFAULT_HYSTERESIS,
+        cooldown_days: float = DEFAULT_COOLDOWN_DAYS,
+        engine: Optional[ZoneEngine] = None,
+    ):
+        self.hysteresis = float(hysteresis)
+        self.cooldown = np.timedelta64(int(cooldown_days * 86400), "s").astype("timedelta64[ns]")
+        self.engine = engine or get_zone_engine()
+        self._lock = threading.Lock()
+
+        self._index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._size = 0
+        self._zone = np.zeros(0, dtype=np.int64)
+        self._since = np.zeros(0, dtype="datetime64[ns]")       # last transition
+        self._last_seen = np.zeros(0, dtype="datetime64[ns]")   # last processed reading
+        self._stress = np.zeros(0, dtype=np.float64)
+
+    @classmethod
+    def from_config(cls, path: str = ALERT_RULES_PATH) -> "AlertStateStore":
+        try:
+            settings = {}
+            if os.path.exists(path):
+                settings = (read_yaml_file(path) or {}).get("state_tracking") or {}
+            return cls(
+                hysteresis=settings.get("hysteresis", DEFAULT_HYSTERESIS),
+                cooldown_days=settings.get("cooldown_days", DEFAULT_COOLDOWN_DAYS),
+            )
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    # ===============================
+    # Station slots
+    # ===============================
+    def _grow(self, needed: int):
+        capacity = len(self._zone)
+        if needed <= capacity:
+            return
+        capacity = max(needed, 2 * capacity, 64)
+
+        def extend(array, fill):
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[: self._size] = array[: self._size]
+            return grown
+
+        self._zone = extend(self._zone, 0)
+        self._since = extend(self._since, _NAT)
+        self._last_seen = extend(self._last_seen, _NAT)
+        self._stress = extend(self._stress, np.nan)
+
+    def _slots(self, station_ids: np.ndarray) -> np.ndarray:
+        unique, inverse = np.unique(station_ids, return_inverse=True)
+
+        new = [s for s in unique.tolist() if s not in self._index]
+        if new:
+            self._grow(self._size + len(new))
+            for station_id in new:
+                self._index[station_id] = self._size
+                self._ids.append(station_id)
+                self._size += 1
+
+        slots = np.fromiter((self._index[s] for s in unique.tolist()), dtype=np.int64, count=len(unique))
+        return slots[inverse]
+
+    # ===============================
+    # Ingest
+    # ===============================
+    def ingest(self, station_ids, timestamps, stress_index) -> Dict:
+        """
+        Processes a batch of readings and returns the transitions it caused.
+        Readings of one station are applied in time order.
+        """
+        try:
+            ids = np.asarray(station_ids).astype(str)
+            times = pd.to_datetime(pd.Series(timestamps), errors="coerce").to_numpy(dtype="datetime64[ns]")
+            stress = pd.to_numeric(pd.Series(stress_index), errors="coerce").to_numpy(dtype=np.float64)
+
+            usable = ~np.isnat(times) & np.isfinite(stress)
+            ids, times, stress = ids[usable], times[usable], stress[usable]
+
+            with self._lock:
+                slots = self._slots(ids)
+
+                # Skip anything already processed for that station
+                last = self._last_seen[slots]
+                fresh = np.isnat(last) | (times > last)
+                slots, times, stress = slots[fresh], times[fresh], stress[fresh]
+
+                transitions = self._apply(slots, times, stress)
+
+            processed = int(fresh.sum())
+            ignored = len(usable) - processed
+            logging.info(
+                f"Alert state ingest: {processed} new readings, {ignored} ignored, "
+                f"{len(transitions)} transitions"
+            )
+
+            return {
+                "processed": processed,
+                "ignored": ignored,
+                "transitions": transitions,
+            }
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def _apply(self, slots: np.ndarray, times: np.ndarray, stress: np.ndarray) -> List[AlertTransition]:
+        if len(slots) == 0:
+            return []
+
+        # Round k applies every station's k-th new reading, so each round is
+        # one vectorized step with at most one reading per station
+        order = np.lexsort((times, slots))
+        sorted_slots = slots[order]
+        first = np.r_[True, sorted_slots[1:] != sorted_slots[:-1]]
+        positions = np.arange(len(order))
+        rank = positions - np.maximum.accumulate(np.where(first, positions, 0))
+
+        codes = [level.code for level in self.engine.levels]
+        transitions = []
+
+        for r in range(int(rank.max()) + 1):
+            pick = order[rank == r]
+            slot, t, s = slots[pick], times[pick], stress[pick]
+
+            current = self._zone[slot]
+            raw = self.engine.index(s)
+            # Lower zone only once the value clears its bound by the hysteresis band
+            lowered = np.minimum(current, self.engine.index(s + self.hysteresis))
+            target = np.where(raw >= current, raw, lowered)
+
+            since = self._since[slot]
+            cooling = ~np.isnat(since) & (t - since < self.cooldown)
+            target = np.where((target < current) & cooling, current, target)
+
+            changed = np.flatnonzero(target != current)
+            for i in changed.tolist():
+                transitions.append(AlertTransition(
+                    station_id=self._ids[slot[i]],
+                    timestamp=pd.Timestamp(t[i]),
+                    from_zone=codes[current[i]],
+                    to_zone=codes[target[i]],
+                    stress_index=float(s[i]),
+                    kind="escalation" if target[i] > current[i] else "recovery",
+                ))
+
+            self._zone[slot] = target
+            self._since[slot[changed]] = t[changed]
+            self._last_seen[slot] = t
+            self._stress[slot] = s
+
+        transitions.sort(key=lambda tr: (tr.timestamp, tr.station_id))
+        return transitions
+
+    # ===============================
+    # Read
+    # ===============================
+    def snapshot(self, station_id: Optional[str] = None) -> List[Dict]:
+        with self._lock:
+            if station_id is not None:
+                slots = [self._index[station_id]] if station_id in self._index else []
+            else:
+                slots = range(self._size)
+
+            codes = [level.code for level in self.engine.levels]
+            return [
+                {
+                    "station_id": self._ids[i],
+                    "zone": codes[self._zone[i]],
+                    "since": None if np.isnat(self._since[i]) else pd.Timestamp(self._since[i]).isoformat(),
+                    "last_reading": None if np.isnat(self._last_seen[i]) else pd.Timestamp(self._last_seen[i]).isoformat(),
+                    "stress_index": round(float(self._stress[i]), 4),
+                }
+                for i in slots
+            ]
+
+    def __len__(self) -> int:
+        return self._size
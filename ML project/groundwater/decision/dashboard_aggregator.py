@@ -1,6 +1,8 @@
 import pandas as pd
 from typing import Dict
 
+from groundwater.decision.quantile_sketch import QuantileSketch
+
 class DashboardAggregator:
 
     @staticmethod
@@ -20,13 +22,29 @@ class DashboardAggregator:
             "zone_percentages": zone_percent
         }
 
+    @staticmethod
+    def _percentile_stats(sketch: QuantileSketch) -> Dict:
+        if sketch.count == 0:
+            return {}
+
+        p50, p90, p95, p99 = sketch.quantile([0.5, 0.9, 0.95, 0.99])
+        return {
+            "median_stress_index": round(p50, 4),
+            "p90_stress_index": round(p90, 4),
+            "p95_stress_index": round(p95, 4),
+            "p99_stress_index": round(p99, 4),
+        }
+
     @staticmethod
     def stress_summary(df: pd.DataFrame) -> Dict:
+        # Percentiles come from a quantile sketch (1% relative error) instead of a full sort
+        sketch = QuantileSketch.from_array(df["stress_index"].to_numpy())
+
         return {
             "avg_stress_index": round(df["stress_index"].mean(), 4),
             "max_stress_index": round(df["stress_index"].max(), 4),
             "min_stress_index": round(df["stress_index"].min(), 4),
-            "median_stress_index": round(df["stress_index"].median(), 4),
+            **DashboardAggregator._percentile_stats(sketch),
         }
 
     @staticmethod
@@ -56,6 +74,8 @@ class DashboardAggregator:
     def summary_by_region(df: pd.DataFrame, region_col: str) -> dict:
         result = {}
 
+        sketches = QuantileSketch.build_grouped(df["stress_index"].to_numpy(), df[region_col])
+
         for region, group in df.groupby(region_col):
             zone_counts = group["zone"].value_counts().to_dict()
             total = len(group)
@@ -69,6 +89,7 @@ class DashboardAggregator:
                 "avg_stress_index": round(group["stress_index"].mean(), 4),
                 "max_stress_index": round(group["stress_index"].max(), 4),
                 "min_stress_index": round(group["stress_index"].min(), 4),
+                **DashboardAggregator._percentile_stats(sketches[region]),
             }
 
             # Risk logic
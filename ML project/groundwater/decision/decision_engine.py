@@ -1,6 +1,9 @@
+import numpy as np
 from dataclasses import dataclass
+from typing import Tuple
 from groundwater.decision.demand_supply import DemandSupplyCalculator, DemandSupplyResult
 from groundwater.decision.zone_classifier import ZoneClassifier, ZoneClassificationResult
+from groundwater.decision.zone_engine import get_zone_engine
 
 
 @dataclass
@@ -37,3 +40,19 @@ class GroundwaterDecisionEngine:
         )
 
 
+
+    @staticmethod
+    def evaluate_batch(demand: np.ndarray, availability: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized evaluate(): returns (stress_index, zone) arrays.
+        """
+        demand = np.asarray(demand, dtype=np.float64)
+        availability = np.asarray(availability, dtype=np.float64)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            stress_index = np.where(availability <= 0, 1.0, demand / availability)
+        stress_index = np.round(stress_index, 4)
+
+        zone = get_zone_engine().classify(stress_index)
+
+        return stress_index, zone
@@ -1,50 +1,334 @@
+import json
+import struct
+import numpy as np
 import pandas as pd
+from typing import Dict, Iterator, List, Optional
+
+from groundwater.decision.zone_engine import get_zone_engine, normalize_zone_name
+
+# ===============================
+# Binary point layout (GWB1)
+# ===============================
+# All integers little-endian. Every column starts at a multiple of its item
+# size so clients can wrap it in a typed array view without copying.
+#
+#   header   : magic "GWB1" | u8 version | u8 precision | u8 coord_itemsize
+#              | u8 n_dict | u32 n_features | i32 lon0 | i32 lat0
+#   dict     : n_dict x (u8 len | utf-8 label | u8 r | u8 g | u8 b)
+#   lon      : n_features x int16/int32  deltas from the previous point
+#   lat      : n_features x int16/int32  deltas from the previous point
+#   value    : n_features x float32      the builder's value_col, NaN when missing
+#   code     : n_features x u8           index into dict
+#
+# Each column is padded to start at a multiple of its own item size.
+# lon0 / lat0 are the first point quantized by 10**precision, and its
+# deltas are 0, so coordinates are (first + cumsum(deltas)) / 10**precision.
+# value_col defaults to the stress index; /api/map/stations?format=binary
+# sends the latest Water_Level (mbgl) instead.
+BINARY_MAGIC = b"GWB1"
+BINARY_VERSION = 2
+BINARY_HEADER = struct.Struct("<4sBBBBIii")
+BINARY_DEFAULT_PRECISION = 5
+
 
 class GeoJSONBuilder:
 
-    ZONE_COLORS = {
-        "SAFE": "#2ecc71",            # Green
-        "SEMI_CRITICAL": "#f1c40f",    # Yellow
-        "CRITICAL": "#e67e22",         # Orange
-        "OVER_EXPLOITED": "#e74c3c",   # Red
+    # Zone colors come from the zone threshold table; these cover zone names
+    # outside it that uploaded files may still carry
+    EXTRA_ZONE_COLORS = {
+        "OVER-EXPLOITED": "#e74c3c",   # Red
     }
+    DEFAULT_COLOR = "#95a5a6"
+
+    # Features serialized per chunk when streaming
+    STREAM_BATCH_SIZE = 5000
 
     @staticmethod
-    def build_point_geojson(
+    def zone_color(zone) -> str:
+        """
+        Color for a zone code, label or map status in any spelling.
+        """
+        color = get_zone_engine().color_of(zone)
+        if color is None:
+            color = GeoJSONBuilder.EXTRA_ZONE_COLORS.get(normalize_zone_name(zone), GeoJSONBuilder.DEFAULT_COLOR)
+        return color
+
+    @staticmethod
+    def _point_columns(
         df: pd.DataFrame,
-        lat_col: str = "LAT",
-        lon_col: str = "LON",
+        lat_col: str,
+        lon_col: str,
+        precision: Optional[int],
     ) -> dict:
+        """
+        Pulls every per-feature value out of the frame as flat numpy arrays.
+        Zones are factorized once, so colors are a table lookup by code.
+        """
+        lat = df[lat_col].to_numpy(dtype=np.float64)
+        lon = df[lon_col].to_numpy(dtype=np.float64)
 
-        features = []
+        if precision is not None:
+            lat = np.round(lat, precision)
+            lon = np.round(lon, precision)
 
-        for _, row in df.iterrows():
-            lat = float(row[lat_col])
-            lon = float(row[lon_col])
+        if "zone" in df.columns:
+            zone_codes, zone_table = pd.factorize(df["zone"].astype(str), sort=True)
+            zone_table = zone_table.tolist()
+        else:
+            zone_codes = np.zeros(len(df), dtype=np.int64)
+            zone_table = ["UNKNOWN"]
 
-            zone = str(row.get("zone", "UNKNOWN"))
-            stress = float(row.get("stress_index", 0))
+        color_table = [GeoJSONBuilder.zone_color(z) for z in zone_table]
+
+        if "stress_index" in df.columns:
+            stress = df["stress_index"].to_numpy(dtype=np.float64)
+        else:
+            stress = np.zeros(len(df))
+
+        return {
+            "lat": lat,
+            "lon": lon,
+            "zone_codes": zone_codes,
+            "zone_table": zone_table,
+            "color_table": color_table,
+            "stress": stress,
+        }
+
+    @staticmethod
+    def _json_number(value: float) -> str:
+        # NaN / inf are not valid JSON numbers
+        return repr(value) if np.isfinite(value) else "null"
+
+    @staticmethod
+    def build_point_geojson(
+        df: pd.DataFrame,
+        lat_col: str = "LAT",
+        lon_col: str = "LON",
+        precision: Optional[int] = None,
+    ) -> dict:
 
-            color = GeoJSONBuilder.ZONE_COLORS.get(zone, "#95a5a6")
+        cols = GeoJSONBuilder._point_columns(df, lat_col, lon_col, precision)
+        zone_table = cols["zone_table"]
+        color_table = cols["color_table"]
 
-            feature = {
+        features = [
+            {
                 "type": "Feature",
                 "geometry": {
                     "type": "Point",
                     "coordinates": [lon, lat],
                 },
                 "properties": {
-                    "zone": zone,
+                    "zone": zone_table[code],
                     "stress_index": stress,
-                    "color": color,
+                    "color": color_table[code],
                 }
             }
+            for lat, lon, code, stress in zip(
+                cols["lat"].tolist(),
+                cols["lon"].tolist(),
+                cols["zone_codes"].tolist(),
+                cols["stress"].tolist(),
+            )
+        ]
+
+        return {
+            "type": "FeatureCollection",
+            "features": features
+        }
+
+    @staticmethod
+    def iter_point_geojson(
+        df: pd.DataFrame,
+        lat_col: str = "LAT",
+        lon_col: str = "LON",
+        precision: Optional[int] = None,
+        batch_size: int = STREAM_BATCH_SIZE,
+    ) -> Iterator[str]:
+        """
+        Yields the same FeatureCollection as build_point_geojson as JSON text
+        chunks, so the full document never has to exist in memory.
+        """
+        cols = GeoJSONBuilder._point_columns(df, lat_col, lon_col, precision)
+        to_num = GeoJSONBuilder._json_number
+
+        # Properties differ per zone only in zone/color, so pre-serialize those
+        zone_props = [
+            (json.dumps(zone), json.dumps(color))
+            for zone, color in zip(cols["zone_table"], cols["color_table"])
+        ]
+
+        yield '{"type":"FeatureCollection","features":['
+
+        total = len(cols["lat"])
+        for start in range(0, total, batch_size):
+            end = min(start + batch_size, total)
+
+            parts = []
+            for lat, lon, code, stress in zip(
+                cols["lat"][start:end].tolist(),
+                cols["lon"][start:end].tolist(),
+                cols["zone_codes"][start:end].tolist(),
+                cols["stress"][start:end].tolist(),
+            ):
+                zone_json, color_json = zone_props[code]
+                parts.append(
+                    '{"type":"Feature","geometry":{"type":"Point","coordinates":['
+                    f'{to_num(lon)},{to_num(lat)}]}},"properties":{{"zone":{zone_json},'
+                    f'"stress_index":{to_num(stress)},"color":{color_json}}}}}'
+                )
 
-            features.append(feature)
+            yield ("," if start else "") + ",".join(parts)
+
+        yield "]}"
+
+    @staticmethod
+    def build_cluster_geojson(clusters: List[Dict]) -> dict:
+        """
+        Wraps StationClusterer.query() output as a FeatureCollection.
+        """
+        features = [
+            {
+                "type": "Feature",
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [cluster["lng"], cluster["lat"]],
+                },
+                "properties": {
+                    "cluster": cluster["count"] > 1,
+                    "count": cluster["count"],
+                    "zone": cluster["zone"],
+                    "stress_index": cluster["mean_stress"],
+                    "color": GeoJSONBuilder.zone_color(cluster["zone"]),
+                }
+            }
+            for cluster in clusters
+        ]
 
         return {
             "type": "FeatureCollection",
             "features": features
         }
 
+    # ===============================
+    # Compact binary transport
+    # ===============================
+    @staticmethod
+    def _pad(buffer: bytearray, alignment: int):
+        buffer.extend(b"\x00" * (-len(buffer) % alignment))
+
+    @staticmethod
+    def build_point_binary(
+        df: pd.DataFrame,
+        lat_col: str = "LAT",
+        lon_col: str = "LON",
+        precision: int = BINARY_DEFAULT_PRECISION,
+        zone_col: str = "zone",
+        value_col: str = "stress_index",
+    ) -> bytes:
+        """
+        Encodes points as the flat GWB1 layout described at the top of this
+        module: delta-encoded quantized coordinates, dictionary-encoded zones
+        (with their colors) and a float32 value column.
+        """
+        if not 0 <= precision <= 7:
+            raise ValueError("precision must be between 0 and 7")
+
+        df = df.dropna(subset=[lat_col, lon_col])
+        scale = 10 ** precision
+
+        lon_q = np.round(df[lon_col].to_numpy(dtype=np.float64) * scale).astype(np.int64)
+        lat_q = np.round(df[lat_col].to_numpy(dtype=np.float64) * scale).astype(np.int64)
 
+        # The first point goes in the header, so deltas stay small
+        lon0 = int(lon_q[0]) if len(lon_q) else 0
+        lat0 = int(lat_q[0]) if len(lat_q) else 0
+        lon_delta = np.diff(lon_q, prepend=lon0)
+        lat_delta = np.diff(lat_q, prepend=lat0)
+
+        # int16 deltas whenever the whole column fits, int32 otherwise
+        peak = max(int(np.abs(lon_delta).max(initial=0)), int(np.abs(lat_delta).max(initial=0)))
+        coord_dtype = np.dtype("<i2") if peak <= np.iinfo(np.int16).max else np.dtype("<i4")
+        if peak > np.iinfo(np.int32).max:
+            raise ValueError("Coordinate deltas overflow int32 at this precision; use a lower precision")
+
+        if zone_col in df.columns:
+            codes, labels = pd.factorize(df[zone_col].astype(str), sort=True)
+            labels = labels.tolist()
+        else:
+            codes = np.zeros(len(df), dtype=np.int64)
+            labels = ["UNKNOWN"]
+
+        if len(labels) > 255:
+            raise ValueError("Binary layout supports at most 255 distinct zones")
+
+        if value_col in df.columns:
+            values = df[value_col].to_numpy(dtype=np.float64)
+        else:
+            values = np.full(len(df), np.nan)
+
+        buffer = bytearray(BINARY_HEADER.pack(
+            BINARY_MAGIC, BINARY_VERSION, precision, coord_dtype.itemsize, len(labels), len(df), lon0, lat0
+        ))
+
+        for label in labels:
+            encoded = label.encode("utf-8")[:255]
+            color = GeoJSONBuilder.zone_color(label)
+            buffer.append(len(encoded))
+            buffer.extend(encoded)
+            buffer.extend(bytes.fromhex(color.lstrip("#")))
+
+        for column in (
+            lon_delta.astype(coord_dtype),
+            lat_delta.astype(coord_dtype),
+            values.astype("<f4"),
+            codes.astype(np.uint8),
+        ):
+            GeoJSONBuilder._pad(buffer, column.itemsize)
+            buffer.extend(column.tobytes())
+
+        return bytes(buffer)
+
+    @staticmethod
+    def decode_point_binary(payload: bytes) -> Dict:
+        """
+        Reference decoder for the GWB1 layout (used by Python clients and to
+        check the encoder). Returns flat arrays plus the zone/color tables.
+        """
+        magic, version, precision, coord_size, n_dict, count, lon0, lat0 = BINARY_HEADER.unpack_from(payload, 0)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("Not a GWB1 payload")
+
+        offset = BINARY_HEADER.size
+        labels, colors = [], []
+        for _ in range(n_dict):
+            length = payload[offset]
+            labels.append(payload[offset + 1: offset + 1 + length].decode("utf-8"))
+            offset += 1 + length
+            colors.append("#" + payload[offset: offset + 3].hex())
+            offset += 3
+
+        def column(dtype):
+            nonlocal offset
+            dtype = np.dtype(dtype)
+            offset += -offset % dtype.itemsize
+            array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+            offset += dtype.itemsize * count
+            return array
+
+        coord_dtype = "<i2" if coord_size == 2 else "<i4"
+        scale = 10 ** precision
+
+        lon = (lon0 + np.cumsum(column(coord_dtype).astype(np.int64))) / scale
+        lat = (lat0 + np.cumsum(column(coord_dtype).astype(np.int64))) / scale
+        values = column("<f4")
+        codes = column(np.uint8)
+
+        return {
+            "lat": lat,
+            "lon": lon,
+            "value": values,
+            "zone_code": codes,
+            "zone_table": labels,
+            "color_table": colors,
+        }
@@ -2,59 +2,127 @@ from reportlab.lib.pagesizes import A4
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib import colors
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from io import BytesIO
+import multiprocessing
+import numpy as np
 import pandas as pd
 import os
-import matplotlib.pyplot as plt
-import uuid
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from groundwater.logging.logger import logging
+from groundwater.utils.downsample import lttb_indices
+
+# Points kept on the stress trend line; large uploads are reduced to this
+MAX_TREND_POINTS = 2000
+CHART_WORKERS = 2
+
+_CHART_POOL = None
+
+
+def _figure_to_png(fig: Figure) -> bytes:
+    buffer = BytesIO()
+    fig.tight_layout()
+    fig.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def _render_zone_pie(labels: list, counts: list) -> bytes:
+    # Object-oriented Agg API: no pyplot global state, safe across threads/processes
+    fig = Figure(figsize=(5, 5))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.pie(counts, labels=labels, autopct="%1.1f%%", startangle=140)
+    ax.set_title("Zone Distribution")
+    return _figure_to_png(fig)
+
+
+def _render_stress_trend(x: np.ndarray, y: np.ndarray) -> bytes:
+    fig = Figure(figsize=(8, 4))
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    ax.plot(x, y, linewidth=1)
+    ax.set_title("Stress Index Trend")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Stress Index")
+    ax.grid(True)
+    return _figure_to_png(fig)
+
+
+def _get_chart_pool() -> ProcessPoolExecutor:
+    global _CHART_POOL
+    if _CHART_POOL is None:
+        # spawn: the API process is multi-threaded, forking it is not safe
+        _CHART_POOL = ProcessPoolExecutor(
+            max_workers=CHART_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _CHART_POOL
+
+
+def _reset_chart_pool(pool: ProcessPoolExecutor):
+    """
+    Drops a broken pool so the next report starts a fresh one; other
+    threads may already have replaced it.
+    """
+    global _CHART_POOL
+    if _CHART_POOL is pool:
+        _CHART_POOL = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
 
 class PDFReportGenerator:
 
+    # Part of the /report/policy-pdf cache key: bump when the policy report's
+    # sections, charts or styling change
+    TEMPLATE_VERSION = "2"
+
     @staticmethod
-    def _generate_zone_pie_chart(df: pd.DataFrame, output_dir: str) -> str:
+    def _zone_pie_args(df: pd.DataFrame) -> tuple:
         zone_counts = df["zone"].value_counts()
-
-        plt.figure(figsize=(5, 5))
-        plt.pie(zone_counts.values, labels=zone_counts.index, autopct="%1.1f%%", startangle=140)
-        plt.title("Zone Distribution")
-
-        filename = f"zone_pie_{uuid.uuid4().hex}.png"
-        path = os.path.join(output_dir, filename)
-
-        plt.tight_layout()
-        plt.savefig(path)
-        plt.close()
-
-        return path
+        return zone_counts.index.astype(str).tolist(), zone_counts.values.tolist()
 
     @staticmethod
-    def _generate_stress_trend_chart(df: pd.DataFrame, output_dir: str) -> str:
+    def _stress_trend_args(df: pd.DataFrame) -> tuple:
         # If Date column exists, plot by date, else just index-wise
         if "Date" in df.columns:
-            df_plot = df.copy()
-            df_plot["Date"] = pd.to_datetime(df_plot["Date"])
-            df_plot = df_plot.sort_values("Date")
-            x = df_plot["Date"]
+            dates = pd.to_datetime(df["Date"]).to_numpy()
+            order = np.argsort(dates, kind="stable")
+            x = dates[order]
+            y = df["stress_index"].to_numpy(dtype=np.float64)[order]
         else:
-            x = range(len(df))
-
-        y = df["stress_index"]
-
-        plt.figure(figsize=(8, 4))
-        plt.plot(x, y, linewidth=1)
-        plt.title("Stress Index Trend")
-        plt.xlabel("Time")
-        plt.ylabel("Stress Index")
-        plt.grid(True)
+            x = np.arange(len(df))
+            y = df["stress_index"].to_numpy(dtype=np.float64)
 
-        filename = f"stress_trend_{uuid.uuid4().hex}.png"
-        path = os.path.join(output_dir, filename)
+        keep = lttb_indices(x, y, MAX_TREND_POINTS)
+        return x[keep], y[keep]
 
-        plt.tight_layout()
-        plt.savefig(path)
-        plt.close()
-
-        return path
+    @staticmethod
+    def _render_charts(df: pd.DataFrame) -> tuple:
+        """
+        Renders both charts to PNG bytes, in parallel worker processes when
+        available and inline otherwise.
+        """
+        pie_args = PDFReportGenerator._zone_pie_args(df)
+        trend_args = PDFReportGenerator._stress_trend_args(df)
+
+        pool = None
+        try:
+            pool = _get_chart_pool()
+            pie_future = pool.submit(_render_zone_pie, *pie_args)
+            trend_future = pool.submit(_render_stress_trend, *trend_args)
+            return pie_future.result(), trend_future.result()
+        except BrokenProcessPool as e:
+            # A dead worker breaks the pool for good; replace it for later reports
+            logging.warning(f"Chart process pool broken, rendering inline: {e}")
+            _reset_chart_pool(pool)
+            return _render_zone_pie(*pie_args), _render_stress_trend(*trend_args)
+        except Exception as e:
+            logging.warning(f"Chart process pool unavailable, rendering inline: {e}")
+            return _render_zone_pie(*pie_args), _render_stress_trend(*trend_args)
 
     @staticmethod
     def generate_policy_report(
@@ -63,8 +131,9 @@ class PDFReportGenerator:
         title: str = "Groundwater Decision Support Report"
     ):
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        temp_dir = os.path.join(os.path.dirname(output_path), "tmp_charts")
-        os.makedirs(temp_dir, exist_ok=True)
+
+        # Charts are independent of the text content, start them first
+        pie_png, trend_png = PDFReportGenerator._render_charts(df)
 
         doc = SimpleDocTemplate(output_path, pagesize=A4)
         styles = getSampleStyleSheet()
@@ -119,17 +188,15 @@ class PDFReportGenerator:
         story.append(Spacer(1, 12))
 
         # --- Pie Chart ---
-        pie_path = PDFReportGenerator._generate_zone_pie_chart(df, temp_dir)
         story.append(Paragraph("Zone Distribution", styles["Heading3"]))
         story.append(Spacer(1, 6))
-        story.append(Image(pie_path, width=300, height=300))
+        story.append(Image(BytesIO(pie_png), width=300, height=300))
         story.append(Spacer(1, 12))
 
         # --- Line Chart ---
-        trend_path = PDFReportGenerator._generate_stress_trend_chart(df, temp_dir)
         story.append(Paragraph("Stress Index Trend", styles["Heading3"]))
         story.append(Spacer(1, 6))
-        story.append(Image(trend_path, width=400, height=200))
+        story.append(Image(BytesIO(trend_png), width=400, height=200))
         story.append(Spacer(1, 12))
 
         # ======================
@@ -181,16 +248,6 @@ class PDFReportGenerator:
         # ======================
         doc.build(story)
 
-        # ======================
-        # Cleanup temp images
-        # ======================
-        try:
-            for f in os.listdir(temp_dir):
-                os.remove(os.path.join(temp_dir, f))
-            os.rmdir(temp_dir)
-        except:
-            pass
-
         return output_path
 
 
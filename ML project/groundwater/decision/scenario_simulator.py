@@ -1,5 +1,6 @@
+import numpy as np
 from dataclasses import dataclass
-from typing import Dict
+from typing import Dict, Tuple
 
 
 @dataclass
@@ -55,4 +56,20 @@ class ScenarioSimulator:
             old_availability=round(old_availability, 4),
         )
 
+    @staticmethod
+    def simulate_batch(
+        demand: np.ndarray,
+        availability: np.ndarray,
+        scenario: ScenarioConfig
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectorized simulate(): returns (new_demand, new_availability) arrays.
+        """
+        new_demand = np.asarray(demand, dtype=np.float64) * (1 + scenario.demand_change_pct)
+        new_availability = np.asarray(availability, dtype=np.float64) * (1 + scenario.availability_change_pct)
+
+        # Safety clamp
+        new_demand = np.where(new_demand < 0, 0.0, new_demand)
+        new_availability = np.where(new_availability < 1, 1.0, new_availability)  # avoid divide-by-zero
 
+        return np.round(new_demand, 4), np.round(new_availability, 4)
@@ -0,0 +1,195 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Web Mercator is undefined at the poles; tiles stop at this latitude
+MAX_MERCATOR_LAT = 85.05112878
+
+
+@dataclass
+class ClusterLevel:
+    zoom: int
+    lat: np.ndarray           # centroid of member stations
+    lon: np.ndarray
+    count: np.ndarray
+    mean_stress: np.ndarray
+    mean_level: np.ndarray
+    zone_code: np.ndarray     # dominant zone, index into StationClusterer.zone_table
+    member: np.ndarray        # station index for single-station clusters, else -1
+
+
+class StationClusterer:
+    """
+    Precomputed multi-resolution grid clustering of stations.
+
+    Stations are snapped to a Web Mercator grid of CELL_PIXELS-sized cells at
+    every zoom level. Cells at zoom z are the parents of cells at z + 1
+    (integer shift), so every level is built from one set of fine cell ids.
+    A viewport query returns at most one cluster per visible cell, which
+    bounds the response size by the screen size, not the network size.
+    """
+
+    CELL_PIXELS = 64
+    TILE_PIXELS = 256
+    MIN_ZOOM = 0
+    MAX_ZOOM = 16
+    DEFAULT_LIMIT = 2000
+
+    def __init__(
+        self,
+        lat: np.ndarray,
+        lon: np.ndarray,
+        stress: np.ndarray,
+        zones: np.ndarray,
+        levels: Optional[np.ndarray] = None,
+        ids: Optional[List[str]] = None,
+    ):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.stress = np.asarray(stress, dtype=np.float64)
+        self.water_level = (
+            np.asarray(levels, dtype=np.float64) if levels is not None
+            else np.full(len(self.lat), np.nan)
+        )
+        self.ids = list(ids) if ids is not None else None
+
+        zone_codes, zone_table = pd.factorize(pd.Series(zones).astype(str), sort=True)
+        self.zone_codes = zone_codes.astype(np.int64)
+        self.zone_table = zone_table.tolist()
+
+        self.levels: Dict[int, ClusterLevel] = {}
+        self._build()
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        lat_col: str = "LAT",
+        lon_col: str = "LON",
+        stress_col: str = "stress_index",
+        zone_col: str = "zone",
+        level_col: Optional[str] = None,
+        id_col: Optional[str] = None,
+    ) -> "StationClusterer":
+        df = df.dropna(subset=[lat_col, lon_col])
+        return cls(
+            lat=df[lat_col].to_numpy(),
+            lon=df[lon_col].to_numpy(),
+            stress=df[stress_col].to_numpy() if stress_col in df.columns else np.full(len(df), np.nan),
+            zones=df[zone_col].to_numpy() if zone_col in df.columns else np.full(len(df), "UNKNOWN"),
+            levels=df[level_col].to_numpy() if level_col and level_col in df.columns else None,
+            ids=df[id_col].tolist() if id_col and id_col in df.columns else None,
+        )
+
+    # ===============================
+    # Precompute
+    # ===============================
+    @classmethod
+    def _cells_per_axis(cls, zoom: int) -> int:
+        return (cls.TILE_PIXELS << zoom) // cls.CELL_PIXELS
+
+    def _fine_cells(self):
+        n = self._cells_per_axis(self.MAX_ZOOM)
+
+        x = (self.lon + 180.0) / 360.0
+        lat_rad = np.radians(np.clip(self.lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+        y = (1.0 - np.log(np.tan(lat_rad) + 1.0 / np.cos(lat_rad)) / np.pi) / 2.0
+
+        cx = np.clip(np.floor(x * n), 0, n - 1).astype(np.int64)
+        cy = np.clip(np.floor(y * n), 0, n - 1).astype(np.int64)
+        return cx, cy
+
+    def _build(self):
+        if len(self.lat) == 0:
+            return
+
+        fine_x, fine_y = self._fine_cells()
+        n_zones = max(len(self.zone_table), 1)
+
+        stress_valid = np.isfinite(self.stress)
+        stress_values = np.where(stress_valid, self.stress, 0.0)
+        level_valid = np.isfinite(self.water_level)
+        level_values = np.where(level_valid, self.water_level, 0.0)
+
+        for zoom in range(self.MIN_ZOOM, self.MAX_ZOOM + 1):
+            shift = self.MAX_ZOOM - zoom
+            cx = fine_x >> shift
+            cy = fine_y >> shift
+            key = cx * self._cells_per_axis(zoom) + cy
+
+            _, first, inverse, count = np.unique(
+                key, return_index=True, return_inverse=True, return_counts=True
+            )
+            n_clusters = len(count)
+
+            def cluster_mean(values, valid):
+                total = np.bincount(inverse, weights=values, minlength=n_clusters)
+                n = np.bincount(inverse, weights=valid.astype(np.float64), minlength=n_clusters)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    return np.where(n > 0, total / np.maximum(n, 1), np.nan)
+
+            zone_hist = np.bincount(
+                inverse * n_zones + self.zone_codes, minlength=n_clusters * n_zones
+            ).reshape(n_clusters, n_zones)
+
+            self.levels[zoom] = ClusterLevel(
+                zoom=zoom,
+                lat=np.bincount(inverse, weights=self.lat, minlength=n_clusters) / count,
+                lon=np.bincount(inverse, weights=self.lon, minlength=n_clusters) / count,
+                count=count,
+                mean_stress=cluster_mean(stress_values, stress_valid),
+                mean_level=cluster_mean(level_values, level_valid),
+                zone_code=zone_hist.argmax(axis=1),
+                member=np.where(count == 1, first, -1),
+            )
+
+    # ===============================
+    # Query
+    # ===============================
+    def query(
+        self,
+        zoom: int,
+        min_lat: float = -90.0,
+        min_lon: float = -180.0,
+        max_lat: float = 90.0,
+        max_lon: float = 180.0,
+        limit: int = DEFAULT_LIMIT,
+    ) -> List[Dict]:
+        """
+        Returns the clusters whose centroid falls inside the bbox at the given
+        zoom. A bbox with min_lon > max_lon is treated as crossing the
+        antimeridian. At most `limit` clusters are returned, largest first.
+        """
+        if not self.levels:
+            return []
+
+        level = self.levels[int(np.clip(zoom, self.MIN_ZOOM, self.MAX_ZOOM))]
+
+        lat_mask = (level.lat >= min_lat) & (level.lat <= max_lat)
+        if min_lon <= max_lon:
+            lon_mask = (level.lon >= min_lon) & (level.lon <= max_lon)
+        else:
+            lon_mask = (level.lon >= min_lon) | (level.lon <= max_lon)
+
+        idx = np.flatnonzero(lat_mask & lon_mask)
+        if limit is not None and len(idx) > limit:
+            idx = idx[np.argsort(-level.count[idx], kind="stable")[:limit]]
+
+        def clean(value):
+            return round(float(value), 4) if np.isfinite(value) else None
+
+        clusters = []
+        for i in idx.tolist():
+            member = int(level.member[i])
+            clusters.append({
+                "lat": round(float(level.lat[i]), 6),
+                "lng": round(float(level.lon[i]), 6),
+                "count": int(level.count[i]),
+                "zone": self.zone_table[level.zone_code[i]] if self.zone_table else "UNKNOWN",
+                "mean_stress": clean(level.mean_stress[i]),
+                "mean_level": clean(level.mean_level[i]),
+                "station_id": self.ids[member] if self.ids is not None and member >= 0 else None,
+            })
+
+        return clusters
@@ -1,23 +1,122 @@
+import math
+import numpy as np
 import pandas as pd
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+# Upper bound on float64 cells of the (stations, pairs) working arrays held
+# at once; the padded input matrices come on top of it
+MK_PAIR_BUDGET = 20_000_000
+# (stations, pairs) float64 arrays live at the same time per chunk (dv, dt)
+MK_LIVE_ARRAYS = 2
+# Pair-sized arrays live per slice of a series too long for one chunk
+# (first, second, dv, dt, one gathered temporary and the candidates kept
+# for the median)
+MK_SLICE_ARRAYS = 6
+
+DAYS_PER_YEAR = 365.25
+
 
 class TrendAnalyzer:
 
     @staticmethod
-    def yearly_trend(
+    def multi_trend(
         df: pd.DataFrame,
         date_col: str,
         value_col: str,
-    ) -> List[Dict]:
-        df[date_col] = pd.to_datetime(df[date_col])
+        region_col: Optional[str] = None,
+    ) -> Dict:
+        """
+        Yearly, monthly and per-region yearly means from a single pass.
+
+        Dates are parsed once into integer month codes (year * 12 + month - 1).
+        Sums and counts are accumulated once per (region, month) cell and
+        every granularity is rolled up from those cells. The input frame is
+        not modified.
+        """
+        dates = pd.to_datetime(df[date_col])
+        values = pd.to_numeric(df[value_col]).to_numpy(dtype=np.float64)
+
+        has_date = dates.notna().to_numpy()
+        month_code = np.zeros(len(df), dtype=np.int64)
+        month_code[has_date] = (
+            dates[has_date].dt.year.to_numpy(dtype=np.int64) * 12
+            + dates[has_date].dt.month.to_numpy(dtype=np.int64) - 1
+        )
+
+        if region_col is not None:
+            region_codes, regions = pd.factorize(df[region_col], sort=True)
+            # Rows without a region still count towards the overall trends
+            region_codes = np.where(region_codes < 0, len(regions), region_codes)
+        else:
+            region_codes = np.zeros(len(df), dtype=np.int64)
+            regions = []
+
+        month_code = month_code[has_date]
+        region_codes = region_codes[has_date].astype(np.int64)
+        values = values[has_date]
+
+        result = {"yearly": [], "monthly": [], "by_region": {}}
+        if len(values) == 0:
+            return result
+
+        # ---- One grouped pass over (region, month) cells ----
+        base = month_code.min()
+        n_months = int(month_code.max() - base + 1)
+        cell_key = region_codes * n_months + (month_code - base)
+
+        cells, inverse = np.unique(cell_key, return_inverse=True)
+        valid = ~np.isnan(values)
+        cell_sum = np.bincount(inverse, weights=np.where(valid, values, 0.0), minlength=len(cells))
+        cell_count = np.bincount(inverse, weights=valid.astype(np.float64), minlength=len(cells))
+
+        cell_region = cells // n_months
+        cell_month = cells % n_months + base
+
+        def rollup(keys):
+            uniq, inv = np.unique(keys, return_inverse=True)
+            total = np.bincount(inv, weights=cell_sum, minlength=len(uniq))
+            count = np.bincount(inv, weights=cell_count, minlength=len(uniq))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                mean = np.where(count > 0, total / np.maximum(count, 1), np.nan)
+            return uniq, mean
+
+        years, year_mean = rollup(cell_month // 12)
+        result["yearly"] = [
+            {"year": int(year), value_col: float(mean)}
+            for year, mean in zip(years, year_mean)
+        ]
+
+        months, month_mean = rollup(cell_month)
+        result["monthly"] = [
+            {"year_month": f"{code // 12:04d}-{code % 12 + 1:02d}", value_col: float(mean)}
+            for code, mean in zip(months.tolist(), month_mean)
+        ]
 
-        df["year"] = df[date_col].dt.year
+        if region_col is not None:
+            # Composite (region, year) key; years are shifted to start at 0
+            year_base = int(years.min())
+            n_years = int(years.max()) - year_base + 1
+            region_year, region_year_mean = rollup(cell_region * n_years + (cell_month // 12 - year_base))
 
-        grouped = df.groupby("year")[value_col].mean().reset_index()
+            by_region = {}
+            for key, mean in zip(region_year.tolist(), region_year_mean):
+                region_idx, year_offset = divmod(key, n_years)
+                if region_idx >= len(regions):
+                    continue
+                by_region.setdefault(str(regions[region_idx]), []).append(
+                    {"year": year_base + year_offset, value_col: float(mean)}
+                )
+            result["by_region"] = by_region
 
-        grouped = grouped.sort_values("year")
+        return result
 
-        return grouped.to_dict(orient="records")
+    @staticmethod
+    def yearly_trend(
+        df: pd.DataFrame,
+        date_col: str,
+        value_col: str,
+    ) -> List[Dict]:
+        return TrendAnalyzer.multi_trend(df, date_col, value_col)["yearly"]
 
     @staticmethod
     def monthly_trend(
@@ -25,15 +124,7 @@ class TrendAnalyzer:
         date_col: str,
         value_col: str,
     ) -> List[Dict]:
-        df[date_col] = pd.to_datetime(df[date_col])
-
-        df["year_month"] = df[date_col].dt.to_period("M").astype(str)
-
-        grouped = df.groupby("year_month")[value_col].mean().reset_index()
-
-        grouped = grouped.sort_values("year_month")
-
-        return grouped.to_dict(orient="records")
+        return TrendAnalyzer.multi_trend(df, date_col, value_col)["monthly"]
 
     @staticmethod
     def trend_by_region(
@@ -42,17 +133,263 @@ class TrendAnalyzer:
         value_col: str,
         region_col: str,
     ) -> Dict[str, List[Dict]]:
-        df[date_col] = pd.to_datetime(df[date_col])
+        return TrendAnalyzer.multi_trend(df, date_col, value_col, region_col)["by_region"]
+
+    # ===============================
+    # Mann-Kendall / Sen's slope
+    # ===============================
+    @staticmethod
+    def _tie_correction(values: np.ndarray) -> np.ndarray:
+        """
+        Sum of t(t-1)(2t+5) over groups of tied values, per row.
+        """
+        rows, width = values.shape
+        ordered = np.sort(values, axis=1)  # NaNs sort to the end
+        same = ordered[:, 1:] == ordered[:, :-1]
 
-        df["year"] = df[date_col].dt.year
+        group = np.zeros((rows, width), dtype=np.int64)
+        group[:, 1:] = np.cumsum(~same, axis=1)
 
-        result = {}
+        present = ~np.isnan(ordered)
+        keys = (np.arange(rows)[:, None] * width + group)[present]
+        sizes = np.bincount(keys, minlength=rows * width).reshape(rows, width).astype(np.float64)
+        return (sizes * (sizes - 1) * (2 * sizes + 5)).sum(axis=1)
 
-        for region, group in df.groupby(region_col):
-            grouped = group.groupby("year")[value_col].mean().reset_index()
-            grouped = grouped.sort_values("year")
-            result[str(region)] = grouped.to_dict(orient="records")
+    @staticmethod
+    def _nanmedian_inplace(values: np.ndarray) -> np.ndarray:
+        """
+        Row medians ignoring NaN, like np.nanmedian(values, axis=1), but
+        sorting values in place instead of working on copies.
+        """
+        values.sort(axis=1)     # NaN sorts last
+        counts = (~np.isnan(values)).sum(axis=1)
+        rows = np.arange(len(values))
+        # Rows without values read index 0 and are masked to NaN below
+        low = values[rows, np.maximum(counts - 1, 0) // 2]
+        high = values[rows, counts // 2 - (counts == 0)]
+        return np.where(counts > 0, (low + high) / 2, np.nan)
 
-        return result
+    @staticmethod
+    def _pair_slices(length: int, max_pairs: int):
+        """
+        (first, second) indices of the i < j pairs of a series, at most
+        max_pairs at a time.
+        """
+        def pairs(spans, size):
+            first, second = np.empty(size, dtype=np.int64), np.empty(size, dtype=np.int64)
+            offset = 0
+            for i, j0, j1 in spans:
+                first[offset:offset + j1 - j0] = i
+                second[offset:offset + j1 - j0] = np.arange(j0, j1)
+                offset += j1 - j0
+            return first, second
+
+        spans, size = [], 0
+        for i in range(length - 1):
+            for j0 in range(i + 1, length, max_pairs):
+                j1 = min(j0 + max_pairs, length)
+                if size + j1 - j0 > max_pairs:
+                    yield pairs(spans, size)
+                    spans, size = [], 0
+                spans.append((i, j0, j1))
+                size += j1 - j0
+        if size:
+            yield pairs(spans, size)
+
+    @staticmethod
+    def _long_series_trend(v: np.ndarray, t: np.ndarray):
+        """
+        (S, Sen's slope) of one series whose pairs do not fit the budget.
+        Pairs are walked in slices; the median slope is found by narrowing
+        a value range around it over repeated passes until the slopes left
+        in range fit in memory.
+        """
+        max_pairs = max(1, MK_PAIR_BUDGET // MK_SLICE_ARRAYS)
+
+        def differences(values, first, second):
+            diff = values[second]
+            diff -= values[first]
+            return diff
+
+        def slopes(lo, hi):
+            # Slopes of each slice strictly between lo and hi (NaN never is)
+            for first, second in TrendAnalyzer._pair_slices(len(v), max_pairs):
+                dv = differences(v, first, second)
+                dt = differences(t, first, second)
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    np.divide(dv, dt, out=dv)
+                    dv[dt <= 0] = np.nan
+                del dt
+                yield dv[(dv > lo) & (dv < hi)]
+
+        s = 0.0
+        for first, second in TrendAnalyzer._pair_slices(len(v), max_pairs):
+            dv = differences(v, first, second)
+            s += float((dv > 0).sum() - (dv < 0).sum())
+
+        total = sum(len(values) for values in slopes(-np.inf, np.inf))
+        if total == 0:
+            return s, np.nan
+
+        def select(rank):
+            lo, hi, below = -np.inf, np.inf, 0
+            while True:
+                count, pivot = 0, None
+                for values in slopes(lo, hi):
+                    count += len(values)
+                    if pivot is None and len(values):
+                        pivot = float(np.median(values))
+
+                if count <= max_pairs:
+                    candidates = np.empty(count)
+                    offset = 0
+                    for values in slopes(lo, hi):
+                        candidates[offset:offset + len(values)] = values
+                        offset += len(values)
+                    return float(np.partition(candidates, rank - below)[rank - below])
+
+                less = equal = 0
+                for values in slopes(lo, hi):
+                    less += int((values < pivot).sum())
+                    equal += int((values == pivot).sum())
+
+                if rank - below < less:
+                    hi = pivot
+                elif rank - below < less + equal:
+                    return pivot
+                else:
+                    below += less + equal
+                    lo = pivot
+
+        low = select((total - 1) // 2)
+        high = low if total % 2 else select(total // 2)
+        return s, (low + high) / 2
+
+    @staticmethod
+    def station_trend_significance(
+        df: pd.DataFrame,
+        station_col: str,
+        date_col: str = "Date",
+        value_col: str = "Water_Level",
+        chunk_size: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Mann-Kendall S, Z and two-sided p-value plus Sen's slope for every
+        station at once.
+
+        Each station's readings are laid out as one row of a time-ordered
+        matrix (NaN padded). All i < j pairwise differences are taken for a
+        chunk of stations of similar length at a time; the chunk is sized so
+        its MK_LIVE_ARRAYS (stations, pairs) working arrays total at most
+        MK_PAIR_BUDGET float64 cells (boolean masks and the padded input
+        matrices come on top). A series whose pairs alone are over that is
+        walked in slices of MK_PAIR_BUDGET // MK_SLICE_ARRAYS pairs instead.
+        chunk_size, if given, fixes the stations per chunk and bypasses the
+        budget. Sen's slope is in value units per year. Variance uses the
+        standard tie correction and Z the continuity correction.
+        """
+        dates = pd.to_datetime(df[date_col], errors="coerce")
+        values = pd.to_numeric(df[value_col], errors="coerce")
+        keep = (dates.notna() & values.notna() & df[station_col].notna()).to_numpy()
+
+        frame = pd.DataFrame({
+            "station": df[station_col].to_numpy()[keep],
+            "t": (dates[keep] - pd.Timestamp("1970-01-01")).dt.days.to_numpy() / DAYS_PER_YEAR,
+            "v": values[keep].to_numpy(dtype=np.float64),
+        }).sort_values(["station", "t"], kind="stable")
+
+        codes, stations = pd.factorize(frame["station"], sort=True)
+        n_stations = len(stations)
+
+        columns = ["station_id", "n", "s", "var_s", "z", "p_value", "sens_slope"]
+        if n_stations == 0:
+            return pd.DataFrame(columns=columns)
+
+        position = frame.groupby(codes).cumcount().to_numpy()
+        width = int(position.max()) + 1
+
+        value_matrix = np.full((n_stations, width), np.nan)
+        time_matrix = np.full((n_stations, width), np.nan)
+        value_matrix[codes, position] = frame["v"].to_numpy()
+        time_matrix[codes, position] = frame["t"].to_numpy()
+
+        n = (~np.isnan(value_matrix)).sum(axis=1).astype(np.float64)
+        s = np.zeros(n_stations)
+        slope = np.full(n_stations, np.nan)
+        ties = np.zeros(n_stations)
+
+        # Stations shortest first, so each chunk only spans the pairs of
+        # its own longest series instead of the longest one overall
+        order = np.argsort(n, kind="stable")
+        lengths = n[order].astype(np.int64)
+        pairs = lengths * (lengths - 1) // 2
+        pair_cells = MK_PAIR_BUDGET // MK_LIVE_ARRAYS
+
+        start = 0
+        while start < n_stations:
+            if chunk_size is not None:
+                end = min(start + chunk_size, n_stations)
+            else:
+                # pairs is sorted, so rows x the chunk's widest pairs grows with the row count
+                window = pairs[start:start + max(1, pair_cells // max(int(pairs[start]), 1))]
+                end = start + int((np.arange(1, len(window) + 1) * window <= pair_cells).sum())
+
+            if end == start:
+                # One series alone is over the budget: its pairs are walked in slices
+                station = order[start]
+                length = lengths[start]
+                s[station], slope[station] = TrendAnalyzer._long_series_trend(
+                    value_matrix[station, :length], time_matrix[station, :length]
+                )
+                ties[station] = TrendAnalyzer._tie_correction(value_matrix[[station], :length])[0]
+                start += 1
+                continue
+
+            block = order[start:end]
+            width = int(lengths[end - 1])
+            start = end
+            if width < 2:
+                continue
+
+            first, second = np.triu_indices(width, k=1)
+            v = value_matrix[block, :width]
+            t = time_matrix[block, :width]
+            ties[block] = TrendAnalyzer._tie_correction(v)
+
+            dv = v[:, second]
+            dv -= v[:, first]
+            # Same as nansum(sign(dv)) without two more full-size arrays
+            s[block] = (dv > 0).sum(axis=1) - (dv < 0).sum(axis=1)
+
+            # Slopes overwrite dv, so at most two (stations, pairs) arrays are live
+            dt = t[:, second]
+            dt -= t[:, first]
+            with np.errstate(invalid="ignore", divide="ignore"):
+                np.divide(dv, dt, out=dv)
+                # dt is NaN exactly where dv already is (same padding)
+                dv[dt <= 0] = np.nan
+            del dt
+
+            slope[block] = TrendAnalyzer._nanmedian_inplace(dv)
+
+        var_s = (n * (n - 1) * (2 * n + 5) - ties) / 18.0
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sd = np.sqrt(var_s)
+            z = np.where(s > 0, (s - 1) / sd, np.where(s < 0, (s + 1) / sd, 0.0))
+        z = np.where((n >= 3) & (var_s > 0), z, np.nan)
 
+        p_value = np.array([
+            math.erfc(abs(value) / math.sqrt(2)) if np.isfinite(value) else np.nan
+            for value in z
+        ])
 
+        return pd.DataFrame({
+            "station_id": np.asarray(stations),
+            "n": n.astype(np.int64),
+            "s": s.astype(np.int64),
+            "var_s": var_s,
+            "z": z,
+            "p_value": p_value,
+            "sens_slope": slope,
+        }, columns=columns)
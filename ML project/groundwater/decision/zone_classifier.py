@@ -1,5 +1,7 @@
 from dataclasses import dataclass
 
+from groundwater.decision.zone_engine import get_zone_engine
+
 @dataclass
 class ZoneClassificationResult:
     zone: str
@@ -9,20 +11,12 @@ class ZoneClassificationResult:
 class ZoneClassifier:
     """
     Classifies region into SAFE / SEMI-CRITICAL / CRITICAL
-    based on stress index.
+    based on stress index (thresholds from config/zone_thresholds.yaml).
     """
 
-    SAFE_THRESHOLD = 0.3
-    CRITICAL_THRESHOLD = 0.7
-
     @staticmethod
     def classify(stress_index: float) -> ZoneClassificationResult:
-        if stress_index < ZoneClassifier.SAFE_THRESHOLD:
-            zone = "SAFE"
-        elif stress_index < ZoneClassifier.CRITICAL_THRESHOLD:
-            zone = "SEMI-CRITICAL"
-        else:
-            zone = "CRITICAL"
+        zone = get_zone_engine().classify_one(stress_index)
 
         return ZoneClassificationResult(
             zone=zone,
@@ -0,0 +1,151 @@
+import bisect
+import os
+import sys
+import numpy as np
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.utils.main_utils.utils import read_yaml_file
+
+# ML project/config/zone_thresholds.yaml, independent of the working directory
+ZONE_CONFIG_PATH = os.path.join(Path(__file__).resolve().parents[2], "config", "zone_thresholds.yaml")
+
+ZONE_FIELDS = ("code", "label", "status", "color")
+DEFAULT_ZONE_COLOR = "#95a5a6"
+
+
+@dataclass(frozen=True)
+class ZoneLevel:
+    code: str                      # canonical name, e.g. SEMI-CRITICAL
+    label: str                     # dashboard name, e.g. Semi-Critical
+    status: str                    # map status, e.g. Warning
+    color: str
+    upper: Optional[float] = None  # exclusive upper bound, None for the last zone
+
+
+# Used when config/zone_thresholds.yaml is not shipped
+DEFAULT_ZONE_LEVELS = [
+    ZoneLevel("SAFE", "Safe", "Safe", "#2ecc71", 0.3),
+    ZoneLevel("SEMI-CRITICAL", "Semi-Critical", "Warning", "#f1c40f", 0.7),
+    ZoneLevel("CRITICAL", "Critical", "Critical", "#e67e22"),
+]
+
+# Stations without a stress value on the dashboard / map
+UNKNOWN_ZONE = ZoneLevel("UNKNOWN", "Unknown", "Unknown", DEFAULT_ZONE_COLOR)
+
+
+def normalize_zone_name(name) -> str:
+    # "Semi-Critical", "SEMI_CRITICAL" and "semi critical" are the same zone
+    return str(name).strip().upper().replace("_", "-").replace(" ", "-")
+
+
+class ZoneEngine:
+    """
+    Single source of truth for stress zones.
+
+    Zones come from a threshold table; values are binned with np.digitize
+    so whole columns are classified at once. Every zone carries its
+    canonical code, dashboard label, map status and color, so each surface
+    can pick its own vocabulary while agreeing on the boundaries. NaN falls
+    in the last (most stressed) zone, as the decision engine's
+    ZoneClassifier always did; surfaces reading stored data (dataset zone
+    column, map status, dashboard counts) pass nan_unknown to get
+    UNKNOWN_ZONE instead, since a missing stress value is not critical.
+    """
+
+    def __init__(self, levels: List[ZoneLevel]):
+        if not levels:
+            raise ValueError("A zone table needs at least one zone")
+
+        bounds = [level.upper for level in levels[:-1]]
+        if any(bound is None for bound in bounds) or levels[-1].upper is not None:
+            raise ValueError("Every zone except the last needs an upper bound")
+        if any(high <= low for low, high in zip(bounds, bounds[1:])):
+            raise ValueError("Zone upper bounds must be strictly increasing")
+
+        self.levels = list(levels)
+        self.bounds = [float(bound) for bound in bounds]
+        self.bins = np.asarray(self.bounds, dtype=np.float64)
+        self._columns = {
+            field: np.array([getattr(level, field) for level in levels], dtype=object)
+            for field in ZONE_FIELDS
+        }
+
+        self._aliases = {}
+        for i, level in enumerate(levels):
+            for name in (level.code, level.label, level.status):
+                self._aliases.setdefault(normalize_zone_name(name), i)
+
+    @classmethod
+    def from_config(cls, path: str = ZONE_CONFIG_PATH, table: Optional[str] = None) -> "ZoneEngine":
+        try:
+            config = read_yaml_file(path)
+            table = table or config.get("default_table", "stress_index")
+
+            levels = [
+                ZoneLevel(
+                    code=row["code"],
+                    label=row.get("label", row["code"]),
+                    status=row.get("status", row.get("label", row["code"])),
+                    color=row.get("color", DEFAULT_ZONE_COLOR),
+                    upper=row.get("upper"),
+                )
+                for row in config["tables"][table]
+            ]
+            return cls(levels)
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    # ===============================
+    # Classification
+    # ===============================
+    def index(self, values) -> np.ndarray:
+        return np.digitize(np.asarray(values, dtype=np.float64), self.bins)
+
+    def classify(self, values, field: str = "code", nan_unknown: bool = False) -> np.ndarray:
+        """
+        Zone `field` (code / label / status / color) for every value; with
+        nan_unknown, NaN gets UNKNOWN_ZONE's instead of the last zone's.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        zones = self._columns[field][self.index(values)]
+        if nan_unknown:
+            zones[np.isnan(values)] = getattr(UNKNOWN_ZONE, field)
+        return zones
+
+    def classify_one(self, value: float, field: str = "code", nan_unknown: bool = False) -> str:
+        value = float(value)
+        if nan_unknown and np.isnan(value):
+            return getattr(UNKNOWN_ZONE, field)
+        # bisect_right matches np.digitize, including NaN -> last zone
+        return self._columns[field][bisect.bisect_right(self.bounds, value)]
+
+    # ===============================
+    # Lookup by name
+    # ===============================
+    def level_of(self, name) -> Optional[ZoneLevel]:
+        """
+        Zone for a code, label or status in any of the vocabularies.
+        """
+        i = self._aliases.get(normalize_zone_name(name))
+        return None if i is None else self.levels[i]
+
+    def color_of(self, name, default: Optional[str] = None) -> Optional[str]:
+        level = self.level_of(name)
+        return default if level is None else level.color
+
+
+_ZONE_ENGINE = None
+
+
+def get_zone_engine() -> ZoneEngine:
+    global _ZONE_ENGINE
+    if _ZONE_ENGINE is None:
+        if os.path.exists(ZONE_CONFIG_PATH):
+            _ZONE_ENGINE = ZoneEngine.from_config()
+        else:
+            _ZONE_ENGINE = ZoneEngine(DEFAULT_ZONE_LEVELS)
+    return _ZONE_ENGINE
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -19,6 +20,9 @@ class DataTransformationArtifact:
     transformed_object_file_path: str
     transformed_train_file_path: str
     transformed_test_file_path: str
+    # Untransformed rows, for training that needs station / date order
+    valid_train_file_path: Optional[str] = None
+    valid_test_file_path: Optional[str] = None
 
 @dataclass
 class ClassificationMetricArtifact:
@@ -151,4 +151,26 @@ class ModelTrainerConfig:
             training_pipeline.MODEL_TRAINER_OVER_FIITING_UNDER_FITTING_THRESHOLD
         )
 
+        self.cpu_budget = training_pipeline.MODEL_TRAINER_CPU_BUDGET
+        self.calibration_fraction: float = training_pipeline.MODEL_TRAINER_CALIBRATION_FRACTION
+
+        self.forecast_mode: str = training_pipeline.MODEL_TRAINER_FORECAST_MODE
+        self.direct_horizons: int = training_pipeline.MODEL_TRAINER_DIRECT_HORIZONS
+
+        self.direct_model_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_TRAINED_MODEL_DIR,
+            training_pipeline.MODEL_TRAINER_DIRECT_MODEL_NAME
+        )
+
+        self.direct_benchmark_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_DIRECT_BENCHMARK_FILE_NAME
+        )
+
+        self.analysis_file_path: str = os.path.join(
+            self.model_trainer_dir,
+            training_pipeline.MODEL_TRAINER_ANALYSIS_FILE_NAME
+        )
+
 
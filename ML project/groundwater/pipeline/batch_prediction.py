@@ -0,0 +1,385 @@
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+from groundwater.decision.decision_engine import GroundwaterDecisionEngine
+from groundwater.decision.alert_engine import AlertEngine
+from groundwater.utils.main_utils.utils import load_object, get_file_version
+from data_loader import add_yoy_decline, station_month_levels
+
+BATCH_CHUNK_ROWS = 200_000
+BATCH_WORKERS = 4
+# Chunks queued per worker; bounds the memory held by a job
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+MANIFEST_FILE_NAME = "_manifest.json"
+STAGES = ("read", "predict", "decision", "alerts", "write")
+
+DECISION_COLUMNS = [
+    "Annual_Ground_Water_Draft_Total",
+    "Net_Ground_Water_Availability",
+]
+
+# Columns yoy_decline reads; only these are scanned for the prior-year table
+YOY_KEY_COLUMNS = ["LAT", "LON", "Water_Level", "Date", "Year", "Month"]
+
+# (model path, model version, model), loaded once per worker process
+_WORKER_MODEL = None
+# Prior-year level table of the job's input, set once per worker process
+_WORKER_LEVELS = None
+
+
+@dataclass
+class BatchPredictionConfig:
+    input_file_path: str
+    output_dir: str = os.path.join("prediction_output", "batch")
+    model_file_path: str = os.path.join("final_model", "model.pkl")
+    chunk_rows: int = BATCH_CHUNK_ROWS
+    workers: int = BATCH_WORKERS
+    output_format: str = "csv"      # csv / parquet
+    resume: bool = True
+
+
+# ===============================
+# Worker side
+# ===============================
+def _init_worker(levels):
+    global _WORKER_LEVELS
+    _WORKER_LEVELS = levels
+
+
+def _get_worker_model(model_file_path: str, model_version: str):
+    global _WORKER_MODEL
+    if _WORKER_MODEL is None or _WORKER_MODEL[:2] != (model_file_path, model_version):
+        _WORKER_MODEL = (model_file_path, model_version, load_object(model_file_path))
+    return _WORKER_MODEL[2]
+
+
+def score_frame(model, df: pd.DataFrame, levels: Optional[pd.Series] = None) -> Tuple[pd.DataFrame, Dict[str, float]]:
+    """
+    Adds the prediction, decision (stress index + zone) and alert columns
+    of the /predict route to df. levels is the station_month_levels table
+    yoy_decline looks last year's reading up in (see add_yoy_decline).
+    Returns (df, seconds per stage).
+    """
+    timings = {}
+
+    start = time.perf_counter()
+    df["prediction"] = model.predict(df)
+    timings["predict"] = time.perf_counter() - start
+
+    for col in DECISION_COLUMNS:
+        if col not in df.columns:
+            raise Exception(f"Required column missing for decision engine: {col}")
+
+    start = time.perf_counter()
+    stress_indexes, zones = GroundwaterDecisionEngine.evaluate_batch(
+        demand=df["Annual_Ground_Water_Draft_Total"].astype(float).to_numpy(),
+        availability=df["Net_Ground_Water_Availability"].astype(float).to_numpy()
+    )
+    df["stress_index"] = stress_indexes
+    df["zone"] = zones
+    timings["decision"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    df["alerts"] = AlertEngine.evaluate(add_yoy_decline(df, levels)).summaries()
+    timings["alerts"] = time.perf_counter() - start
+
+    return df, timings
+
+
+def _write_partition(df: pd.DataFrame, output_dir: str, chunk_id: int, output_format: str) -> str:
+    path = os.path.join(output_dir, f"part-{chunk_id:06d}.{output_format}")
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        if output_format == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.to_csv(tmp_path, index=False)
+        # Readers never see a partial partition
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return path
+
+
+def score_chunk(chunk_id: int, df: pd.DataFrame, config: BatchPredictionConfig, model_version: str) -> Dict:
+    """
+    Scores one chunk and writes its partition. Runs in a pool worker.
+    """
+    model = _get_worker_model(config.model_file_path, model_version)
+    df, timings = score_frame(model, df, _WORKER_LEVELS)
+
+    start = time.perf_counter()
+    path = _write_partition(df, config.output_dir, chunk_id, config.output_format)
+    timings["write"] = time.perf_counter() - start
+
+    return {"chunk": chunk_id, "rows": len(df), "path": os.path.basename(path), "timings": timings}
+
+
+# ===============================
+# Input
+# ===============================
+def iter_chunks(file_path: str, chunk_rows: int, skip: Set[int]) -> Iterator[Tuple[int, pd.DataFrame]]:
+    """
+    (chunk id, frame) of chunk_rows rows each, in file order, leaving out
+    the chunk ids in skip.
+    """
+    if file_path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise Exception("Reading Parquet input needs pyarrow installed")
+
+        for chunk_id, batch in enumerate(pq.ParquetFile(file_path).iter_batches(batch_size=chunk_rows)):
+            if chunk_id not in skip:
+                yield chunk_id, batch.to_pandas()
+        return
+
+    # Completed leading chunks are skipped by row count: the parser still
+    # scans their lines but builds no fields and no list of skipped rows
+    prefix = 0
+    while prefix in skip:
+        prefix += 1
+    header = pd.read_csv(file_path, nrows=0).columns.tolist()
+
+    reader = pd.read_csv(
+        file_path, chunksize=chunk_rows, header=None, names=header, skiprows=prefix * chunk_rows + 1
+    )
+    for offset, chunk in enumerate(reader):
+        chunk_id = prefix + offset
+        # Skipping past the end reads one empty chunk
+        if chunk_id not in skip and len(chunk):
+            yield chunk_id, chunk
+
+
+def read_prior_levels(file_path: str, chunk_rows: int) -> pd.Series:
+    """
+    station_month_levels of the whole input, from one pass over its key
+    columns only. Every chunk looks last year's level up in this table, so
+    yoy_decline (and the alerts built on it) do not depend on chunk_rows,
+    on where a resumed job restarts or on the serving dataset.
+    """
+    if file_path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(file_path)
+        columns = [c for c in YOY_KEY_COLUMNS if c in parquet.schema_arrow.names]
+        parts = (batch.to_pandas() for batch in parquet.iter_batches(batch_size=chunk_rows, columns=columns))
+    else:
+        header = pd.read_csv(file_path, nrows=0).columns
+        columns = [c for c in YOY_KEY_COLUMNS if c in header]
+        parts = pd.read_csv(file_path, usecols=columns, chunksize=chunk_rows)
+
+    return station_month_levels(parts)
+
+
+class BatchPredictionPipeline:
+    """
+    Scores large CSV / Parquet files chunk by chunk.
+
+    The main process reads chunks and hands them to a process pool; each
+    worker loads the model once, adds prediction, decision and alert
+    columns in vectorized form and writes its chunk as a partition
+    (part-NNNNNN.csv / .parquet) in the output directory. A manifest
+    records every finished partition, so rerunning an interrupted job
+    with the same input, model and chunk size only scores what is left.
+    Year-over-year alerts use the input itself as history, read in one
+    pass before chunking.
+    Throughput is reported in rows/s per stage.
+    """
+
+    def __init__(self, config: BatchPredictionConfig):
+        self.config = config
+        self.manifest_path = os.path.join(config.output_dir, MANIFEST_FILE_NAME)
+
+    # ===============================
+    # Manifest
+    # ===============================
+    def _job(self) -> Dict:
+        config = self.config
+        return {
+            "input_file_path": os.path.abspath(config.input_file_path),
+            "input_version": get_file_version(config.input_file_path),
+            "model_version": get_file_version(config.model_file_path),
+            "chunk_rows": config.chunk_rows,
+            "output_format": config.output_format,
+        }
+
+    def _load_manifest(self, job: Dict) -> Dict:
+        # Partitions a killed worker never finished
+        for path in glob.glob(os.path.join(self.config.output_dir, "part-*.tmp")):
+            os.remove(path)
+
+        if self.config.resume and os.path.exists(self.manifest_path):
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+
+            if manifest.get("job") == job:
+                # Keep only chunks whose partition is still there
+                chunks = {
+                    chunk_id: entry for chunk_id, entry in manifest["chunks"].items()
+                    if os.path.exists(os.path.join(self.config.output_dir, entry["path"]))
+                }
+                if len(chunks) < len(manifest["chunks"]):
+                    logging.info(f"{len(manifest['chunks']) - len(chunks)} batch partitions missing; rescoring them")
+                    manifest["complete"] = False
+                manifest["chunks"] = chunks
+                return manifest
+            logging.info("Batch manifest is for another input / model; starting over")
+
+        # New job: drop partitions of any previous one
+        for path in glob.glob(os.path.join(self.config.output_dir, "part-*")):
+            os.remove(path)
+        return {"job": job, "chunks": {}, "complete": False}
+
+    def _save_manifest(self, manifest: Dict):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f, indent=4)
+        os.replace(tmp_path, self.manifest_path)
+
+    # ===============================
+    # Run
+    # ===============================
+    @staticmethod
+    def _timed(chunks: Iterator, stage_seconds: Dict[str, float]) -> Iterator:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(chunks)
+            except StopIteration:
+                return
+            stage_seconds["read"] += time.perf_counter() - start
+            yield item
+
+    @staticmethod
+    def _throughput(rows: int, elapsed: float, stage_seconds: Dict[str, float]) -> Dict:
+        def rate(seconds):
+            return round(rows / seconds, 1) if seconds > 0 else None
+
+        return {
+            "rows": rows,
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_s": rate(elapsed),
+            # Worker stages are summed over workers: rows/s of one worker
+            "stages": {
+                stage: {"seconds": round(seconds, 3), "rows_per_s": rate(seconds)}
+                for stage, seconds in stage_seconds.items()
+            },
+        }
+
+    def run(self) -> Dict:
+        try:
+            config = self.config
+            if not os.path.exists(config.model_file_path):
+                raise Exception("Model not found. Please train the model first.")
+            if not os.path.exists(config.input_file_path):
+                raise Exception(f"Input file not found: {config.input_file_path}")
+
+            os.makedirs(config.output_dir, exist_ok=True)
+            job = self._job()
+            manifest = self._load_manifest(job)
+            if manifest["complete"]:
+                logging.info(f"Batch prediction already complete: {self.manifest_path}")
+                return manifest
+
+            done = {int(chunk_id) for chunk_id in manifest["chunks"]}
+            if done:
+                logging.info(f"Resuming batch prediction: {len(done)} chunks already scored")
+
+            stage_seconds = dict.fromkeys(STAGES, 0.0)
+            scored = {"rows": 0}
+            start = time.perf_counter()
+
+            def record(result):
+                manifest["chunks"][str(result["chunk"])] = {"rows": result["rows"], "path": result["path"]}
+                for stage, seconds in result["timings"].items():
+                    stage_seconds[stage] += seconds
+                scored["rows"] += result["rows"]
+                self._save_manifest(manifest)
+
+            start_read = time.perf_counter()
+            levels = read_prior_levels(config.input_file_path, config.chunk_rows)
+            stage_seconds["read"] += time.perf_counter() - start_read
+
+            chunks = self._timed(iter_chunks(config.input_file_path, config.chunk_rows, done), stage_seconds)
+
+            if config.workers <= 1:
+                _init_worker(levels)
+                for chunk_id, df in chunks:
+                    record(score_chunk(chunk_id, df, config, job["model_version"]))
+            else:
+                # spawn: forking a multi-threaded process is not safe
+                pool = ProcessPoolExecutor(
+                    max_workers=config.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    # The prior-year table is sent once per worker, not per chunk
+                    initializer=_init_worker,
+                    initargs=(levels,),
+                )
+                try:
+                    pending = set()
+                    for chunk_id, df in chunks:
+                        pending.add(pool.submit(score_chunk, chunk_id, df, config, job["model_version"]))
+                        if len(pending) >= config.workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                            finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in finished:
+                                record(future.result())
+                    for future in wait(pending).done:
+                        record(future.result())
+                finally:
+                    pool.shutdown(cancel_futures=True)
+
+            throughput = self._throughput(scored["rows"], time.perf_counter() - start, stage_seconds)
+
+            manifest["complete"] = True
+            manifest["total_rows"] = sum(entry["rows"] for entry in manifest["chunks"].values())
+            manifest["resumed_chunks"] = len(done)
+            manifest["throughput"] = throughput
+            self._save_manifest(manifest)
+
+            logging.info(
+                f"Batch prediction: {throughput['rows']} rows in {throughput['elapsed_s']}s "
+                f"({throughput['rows_per_s']} rows/s); per stage: "
+                + ", ".join(f"{s}={v['rows_per_s']} rows/s" for s, v in throughput["stages"].items())
+            )
+            return manifest
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked, resumable batch scoring of a CSV / Parquet file")
+    parser.add_argument("input_file_path")
+    parser.add_argument("--output-dir", default=BatchPredictionConfig.output_dir)
+    parser.add_argument("--model", default=BatchPredictionConfig.model_file_path)
+    parser.add_argument("--chunk-rows", type=int, default=BATCH_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--output-format", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--restart", action="store_true", help="ignore the manifest of an earlier run")
+    args = parser.parse_args()
+
+    manifest = BatchPredictionPipeline(BatchPredictionConfig(
+        input_file_path=args.input_file_path,
+        output_dir=args.output_dir,
+        model_file_path=args.model,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        output_format=args.output_format,
+        resume=not args.restart,
+    )).run()
+    print(json.dumps(manifest["throughput"], indent=4))
@@ -1,155 +1,513 @@
 import os
 import sys
+import threading
+import time
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
 
-from groundwater.utils.main_utils.utils import load_object
+from groundwater.utils.main_utils.utils import load_object, get_file_version
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
 from groundwater.decision.decision_engine import GroundwaterDecisionEngine
-from data_loader import get_latest_data
+from groundwater.decision.preset_scenarios import PRESET_SCENARIOS
+from groundwater.decision.scenario_simulator import ScenarioConfig, ScenarioSimulator
+from groundwater.utils.forecast_cache import ForecastCache
+from groundwater.utils.forecast_store import ForecastStore
+from groundwater.utils.rolling_features import RollingFeatureState
+from data_loader import (
+    get_latest_data, get_latest_rows, get_level_history, get_dataset_version,
+    _normalize_station_id, _station_ids
+)
+
+# We forecast quarterly: dataset "Month" is 1, 5, 8, 11 -> 4 points per year
+STEPS_PER_YEAR = 4
+MONTHS_PER_STEP = 3
+
+# Start Date - Force 2025 start as per user request
+# We treat the latest data point as the "current state" for the 2025 projection
+FORECAST_START_DATE = datetime(2025, 1, 1)
+
+# Fix: Model expects Integer Month for median imputation, but data might have Strings 'May'
+MONTH_MAP = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
+}
+
+NUMERIC_STATE_COLUMNS = [
+    'Annual_Ground_Water_Draft_Total', 'Net_Ground_Water_Availability',
+    'Water_Level', 'Water_Level_Lag1'
+]
+
+# Longest horizon materialized in the forecast store; shorter ones are prefixes
+FORECAST_STORE_YEARS = 10
+
+# Scenarios materialized in the forecast store: (demand, supply) annual %
+# change and (demand, supply) one-off % change at the forecast start.
+# Presets are one-off changes, as in /simulate/preset, with flat growth after.
+FORECAST_SCENARIOS = {
+    "default": (0.0, 0.0, 0.0, 0.0),
+    **{
+        name: (0.0, 0.0, round(scenario.demand_change_pct * 100, 6), round(scenario.availability_change_pct * 100, 6))
+        for name, scenario in PRESET_SCENARIOS.items()
+    },
+}
+
+# Key of the all-stations forecast (station_id None / "all")
+ALL_STATIONS = "all"
+
+# Shared by every pipeline instance (API, reports, precompute)
+FORECAST_CACHE = ForecastCache()
+FORECAST_STORE = ForecastStore()
+_PRECOMPUTE_LOCK = threading.Lock()
+
 
 class ForecastingPipeline:
-    def __init__(self):
+    def __init__(self, model=None, direct_model=None):
         self.model_path = os.path.join("final_model", "model.pkl")
-        self.model = None
+        self.direct_model_path = os.path.join("final_model", "direct_model.pkl")
+        self.model = model
+        self.direct_model = direct_model
+        # Models passed in (e.g. by the training benchmark) are never reloaded from disk
+        self._pinned = model is not None
+        self._loaded_version = None
+        self.cache = FORECAST_CACHE
+        self.store = FORECAST_STORE
 
     def load_model(self):
-        if self.model is None:
+        if self._pinned:
+            return
+        # Reload when the model file is replaced (e.g. after /train)
+        version = self.get_model_version()
+        if self.model is None or version != self._loaded_version:
             if not os.path.exists(self.model_path):
                 raise Exception("Model not found. Please train the model first.")
             self.model = load_object(self.model_path)
+            # Optional multi-horizon model (training with forecast mode "direct")
+            self.direct_model = load_object(self.direct_model_path) if os.path.exists(self.direct_model_path) else None
+            self._loaded_version = version
+
+    def get_model_version(self):
+        version = get_file_version(self.model_path)
+        direct_version = get_file_version(self.direct_model_path)
+        return version if direct_version == "none" else f"{version}+{direct_version}"
+
+    def _cache_key(self, station_id, years, demand_change_pct, supply_change_pct,
+                   model_version=None, dataset_version=None, demand_shock_pct=0.0, supply_shock_pct=0.0):
+        return ForecastCache.make_key(
+            _normalize_station_id(station_id) if station_id else ALL_STATIONS,
+            years, demand_change_pct, supply_change_pct,
+            model_version or self.get_model_version(),
+            dataset_version or get_dataset_version(),
+            demand_shock_pct, supply_shock_pct,
+        )
+
+    @staticmethod
+    def _initial_state(start_rows: pd.DataFrame) -> pd.DataFrame:
+        """
+        One row per series to forecast, with safe numeric types.
+        """
+        state = start_rows.reset_index(drop=True).copy()
+
+        for col in ['Annual_Ground_Water_Draft_Total', 'Net_Ground_Water_Availability', 'Water_Level']:
+            state[col] = pd.to_numeric(state[col], errors='coerce') if col in state.columns else 0.0
+
+        if 'Water_Level_Lag1' not in state.columns:
+            state['Water_Level_Lag1'] = state['Water_Level']  # Fallback
+
+        # Target is what we predict, never an input
+        if 'Target' in state.columns:
+            state = state.drop(columns=['Target'])
+
+        return state
+
+    @staticmethod
+    def _apply_shock(state: pd.DataFrame, demand_shock_pct, supply_shock_pct) -> pd.DataFrame:
+        """
+        One-off change of demand / supply at the forecast start, applied
+        the way /simulate/preset applies a preset.
+        """
+        demand, supply = ScenarioSimulator.simulate_batch(
+            demand=state['Annual_Ground_Water_Draft_Total'].to_numpy(dtype=np.float64),
+            availability=state['Net_Ground_Water_Availability'].to_numpy(dtype=np.float64),
+            scenario=ScenarioConfig(
+                availability_change_pct=supply_shock_pct / 100.0,
+                demand_change_pct=demand_shock_pct / 100.0,
+            ),
+        )
+        state['Annual_Ground_Water_Draft_Total'] = demand
+        state['Net_Ground_Water_Availability'] = supply
+        state['Stress_Index'], state['zone'] = GroundwaterDecisionEngine.evaluate_batch(demand, supply)
+        return state
+
+    @staticmethod
+    def _rolling_state(state: pd.DataFrame, history=None) -> RollingFeatureState:
+        """
+        Seeds the lag / rolling feature buffers from each station's recent
+        readings (or the given (N, k) history), ending with the level the
+        forecast starts from.
+        """
+        size = RollingFeatureState.history_size()
+
+        if history is not None:
+            history = np.array(history, dtype=np.float64)
+        elif {'LAT', 'LON'}.issubset(state.columns):
+            history = get_level_history(window=size).reindex(_station_ids(state)).to_numpy(dtype=np.float64)
+        else:
+            history = np.full((len(state), size), np.nan)
+
+        current = state['Water_Level'].to_numpy(dtype=np.float64)
+        lag1 = pd.to_numeric(state['Water_Level_Lag1'], errors='coerce').to_numpy(dtype=np.float64)
+
+        history[:, -1] = current
+        # Stations without history still have their observed lag
+        history[:, -2] = np.where(np.isnan(history[:, -2]), lag1, history[:, -2])
+        return RollingFeatureState(history)
+
+    @staticmethod
+    def _model_input(state: pd.DataFrame) -> pd.DataFrame:
+        input_df = state.copy()
+
+        # Ensure Date is string (Model trained on CSV strings)
+        if 'Date' in input_df.columns:
+            input_df['Date'] = input_df['Date'].astype(str)
+
+        # If it's a string like "May", map it. If it's already int, keep it.
+        if 'Month' in input_df.columns and input_df['Month'].dtype == object:
+            input_df['Month'] = input_df['Month'].map(
+                lambda v: MONTH_MAP.get(v, v) if isinstance(v, str) else v
+            )
+
+        # Explicitly cast columns to float to avoid object dtype issues
+        for col in NUMERIC_STATE_COLUMNS:
+            if col in input_df.columns:
+                input_df[col] = pd.to_numeric(input_df[col], errors='coerce')
+
+        return input_df
+
+    def _direct_model_for(self, steps: int, d_growth: np.ndarray, s_growth: np.ndarray):
+        """
+        The direct model, if there is one covering the horizon and the
+        scenario is flat: it was trained on observed demand / supply only.
+        """
+        direct = self.direct_model
+        if direct is None or steps > direct.horizons:
+            return None
+        if np.any(d_growth != 0) or np.any(s_growth != 0):
+            return None
+        return direct
+
+    def _forecast(self, start_rows: pd.DataFrame, steps: int,
+                  demand_change_pct=0.0, supply_change_pct=0.0, history=None,
+                  demand_shock_pct=0.0, supply_shock_pct=0.0, from_row_dates=False) -> dict:
+        """
+        Advances every row of start_rows together: one model.predict call
+        per step over all N rows, or a single call for all steps when a
+        direct multi-horizon model applies. Growth rates (annual %) may be
+        scalars, per-row (N,) arrays or per-step (steps, N) arrays; shocks
+        (%) are applied once before the first step.
+        Model inputs are dated from FORECAST_START_DATE, or with
+        from_row_dates from each row's own Date (forecasts from historical
+        rows, e.g. the direct vs recursive benchmark); the returned dates
+        always count from FORECAST_START_DATE.
+        Returns (steps, N) arrays.
+        """
+        self.load_model()
+
+        state = self._initial_state(start_rows)
+        n_rows = len(state)
+
+        if demand_shock_pct or supply_shock_pct:
+            state = self._apply_shock(state, demand_shock_pct, supply_shock_pct)
+
+        # Rate is Annual. Quarterly rate ~= rate / 4
+        d_growth = np.broadcast_to((np.asarray(demand_change_pct, dtype=np.float64) / 100.0) / STEPS_PER_YEAR, (steps, n_rows))
+        s_growth = np.broadcast_to((np.asarray(supply_change_pct, dtype=np.float64) / 100.0) / STEPS_PER_YEAR, (steps, n_rows))
+
+        direct = self._direct_model_for(steps, d_growth, s_growth)
+        if direct is not None:
+            # (N, horizons) -> (steps, N) in one call
+            direct_levels = np.asarray(direct.predict(self._model_input(state)), dtype=np.float64)
+            direct_levels = direct_levels.reshape(n_rows, -1)[:, :steps].T
+            intervals = direct.intervals
+        else:
+            rolling = self._rolling_state(state, history)
+            intervals = getattr(self.model, "intervals", None)
+
+        # Half-width per step from the model's conformal intervals
+        half_widths = intervals.half_widths(steps)[:, None] if intervals is not None else None
+
+        current_demand = state['Annual_Ground_Water_Draft_Total'].to_numpy(dtype=np.float64)
+        current_supply = state['Net_Ground_Water_Availability'].to_numpy(dtype=np.float64)
+
+        water_level = np.empty((steps, n_rows))
+        demand = np.empty((steps, n_rows))
+        supply = np.empty((steps, n_rows))
+        stress = np.empty((steps, n_rows))
+        zone = np.empty((steps, n_rows), dtype=object)
+        dates = []
+
+        current_date = FORECAST_START_DATE
+        row_dates = pd.to_datetime(state['Date'], errors='coerce') if from_row_dates else None
+
+        for step in range(steps):
+            if direct is None:
+                # Predict Target (Next Level) for every row at once
+                predicted_target = np.asarray(
+                    self.model.predict(self._model_input(state)), dtype=np.float64
+                )
+            else:
+                predicted_target = direct_levels[step]
+
+            # --- Update State for Next Step ---
+            next_date = current_date + relativedelta(months=MONTHS_PER_STEP)
+
+            next_demand = current_demand * (1 + d_growth[step])
+            next_supply = current_supply * (1 + s_growth[step])
+
+            # Recalculate Stress & Zone
+            next_stress, next_zone = GroundwaterDecisionEngine.evaluate_batch(next_demand, next_supply)
+
+            if direct is None:
+                # Predicted T+1 becomes Water_Level; lag and rolling features follow it
+                rolling.push(predicted_target)
+                for col, values in rolling.features().items():
+                    state[col] = values
+                if row_dates is not None:
+                    row_dates = row_dates + pd.DateOffset(months=MONTHS_PER_STEP)
+                    state['Date'] = row_dates
+                    state['Year'] = row_dates.dt.year
+                    state['Month'] = row_dates.dt.month
+                else:
+                    state['Date'] = next_date
+                    state['Year'] = next_date.year
+                    state['Month'] = next_date.month
+                state['Annual_Ground_Water_Draft_Total'] = next_demand
+                state['Net_Ground_Water_Availability'] = next_supply
+                state['Stress_Index'] = next_stress
+                state['zone'] = next_zone
 
-    def predict_future(self, station_id=None, years=5, 
-                       demand_change_pct=0.0, supply_change_pct=0.0):
+            current_demand, current_supply = next_demand, next_supply
+
+            water_level[step] = predicted_target
+            demand[step] = next_demand
+            supply[step] = next_supply
+            stress[step] = next_stress
+            zone[step] = next_zone
+            dates.append(next_date)
+
+            current_date = next_date
+
+        if half_widths is not None:
+            lower, upper = water_level - half_widths, water_level + half_widths
+        else:
+            # Models trained before interval calibration keep the old +/-5% band
+            lower, upper = water_level * 0.95, water_level * 1.05
+
+        return {
+            "dates": dates,
+            "water_level": water_level,
+            "lower_bound": lower,
+            "upper_bound": upper,
+            "demand": demand,
+            "supply": supply,
+            "stress_index": stress,
+            "zone": zone,
+        }
+
+    @staticmethod
+    def _format_predictions(result: dict, row: int) -> list:
+        predictions = []
+
+        for step, next_date in enumerate(result["dates"]):
+            next_water_level = float(result["water_level"][step, row])
+
+            predictions.append({
+                "Year": next_date.year,
+                "Month": next_date.strftime("%b"), # Jan, Feb
+                "Date": next_date.strftime("%Y-%m-%d"),
+                "Water_Level": round(next_water_level, 2),
+                "Lower_Bound": round(float(result["lower_bound"][step, row]), 2),
+                "Upper_Bound": round(float(result["upper_bound"][step, row]), 2),
+                "Demand": round(float(result["demand"][step, row]), 2),
+                "Supply": round(float(result["supply"][step, row]), 2),
+                "Stress_Index": round(float(result["stress_index"][step, row]), 4),
+                "Zone": str(result["zone"][step, row])
+            })
+
+        return predictions
+
+    def predict_future(self, station_id=None, years=5,
+                       demand_change_pct=0.0, supply_change_pct=0.0,
+                       demand_shock_pct=0.0, supply_shock_pct=0.0):
         try:
-            self.load_model()
-            
+            model_version, dataset_version = self.get_model_version(), get_dataset_version()
+
+            # Preset scenarios are served from the materialized store
+            stored, columns = self.store.lookup(
+                [_normalize_station_id(station_id) if station_id else ALL_STATIONS],
+                years * STEPS_PER_YEAR,
+                (demand_change_pct, supply_change_pct, demand_shock_pct, supply_shock_pct),
+                model_version, dataset_version,
+            )
+            if stored is not None:
+                return self._format_predictions(stored, next(iter(columns.values())))
+
+            key = self._cache_key(station_id, years, demand_change_pct, supply_change_pct,
+                                  model_version, dataset_version, demand_shock_pct, supply_shock_pct)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
             # 1. Get Start Point (Result is a dict)
             start_row = get_latest_data(station_id)
             if not start_row:
                 raise Exception("No data available for this station to forecast from.")
-            
-            # Iterate
-            # We forecast quarterly (every 3 months) or monthly? 
-            # Dataset row says "Month" is 1, 5, 8, 11 -> Quarterly approx.
-            # We will generate 4 points per year.
-            
-            steps = years * 4 
-            predictions = []
-            
-            # Initial State
-            current_state = start_row.copy()
-            
-            # Ensure safe numeric types
-            current_state['Annual_Ground_Water_Draft_Total'] = float(current_state.get('Annual_Ground_Water_Draft_Total', 0))
-            current_state['Net_Ground_Water_Availability'] = float(current_state.get('Net_Ground_Water_Availability', 0))
-            current_state['Water_Level'] = float(current_state.get('Water_Level', 0))
-            current_state['Water_Level_Lag1'] = float(current_state.get('Water_Level_Lag1', current_state['Water_Level'])) # Fallback
-            
-            # Start Date - Force 2025 start as per user request
-            # We treat the latest data point as the "current state" for the 2025 projection
-            current_date = datetime(2025, 1, 1)
-
-            for step in range(steps):
-                # Prepare DataFrame for Model
-                input_df = pd.DataFrame([current_state])
-                
-                # Ensure Date is string (Model trained on CSV strings)
-                if 'Date' in input_df.columns:
-                    input_df['Date'] = input_df['Date'].astype(str)
-
-                # Fix: Model expects Integer Month for median imputation, but data might have Strings 'May'
-                # Map Month name to Integer 1-12
-                month_map = {
-                    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-                }
-                
-                if 'Month' in input_df.columns:
-                    # If it's a string like "May", map it. If it's already int, keep it.
-                    val = input_df['Month'].iloc[0]
-                    if isinstance(val, str):
-                        # Try mapping short name
-                        if val in month_map:
-                            input_df['Month'] = month_map[val]
-                        # Try parsing if not in map? or just let it fail/impute
-                    
-                # Explicitly cast columns to float to avoid object dtype issues
-                for col in ['Annual_Ground_Water_Draft_Total', 'Net_Ground_Water_Availability', 
-                            'Water_Level', 'Water_Level_Lag1']:
-                    if col in input_df.columns:
-                        input_df[col] = pd.to_numeric(input_df[col], errors='coerce')
-                
-                # Predict Target (Next Level)
-                predicted_target = self.model.predict(input_df)[0]
-                
-                # --- Update State for Next Step ---
-                
-                # 1. Shift Lag
-                # Water_Level (T) becomes Lag1 (T+1)
-                next_lag1 = current_state['Water_Level']
-                
-                # 2. Update Water Level
-                # Target (predicted T+1) becomes Water_Level (T+1)
-                next_water_level = float(predicted_target)
-                
-                # 3. Time Increment (3 months)
-                next_date = current_date + relativedelta(months=3)
-                next_year = next_date.year
-                next_month = next_date.month 
-                # Mapping month to dataset convention if needed (1,4,7,10 or 1,5,8,11?) 
-                # Model handles integer month. We just pass exact month.
-
-                # 4. Apply Growth to Demand/Supply
-                # Rate is Annual. Quarterly rate ~= rate / 4
-                d_growth = (demand_change_pct / 100.0) / 4.0
-                s_growth = (supply_change_pct / 100.0) / 4.0
-                
-                next_demand = current_state['Annual_Ground_Water_Draft_Total'] * (1 + d_growth)
-                next_supply = current_state['Net_Ground_Water_Availability'] * (1 + s_growth)
-                
-                # 5. Recalculate Stress & Zone
-                decision = GroundwaterDecisionEngine.evaluate(next_demand, next_supply)
-                
-                # Create Next State Row
-                next_state = current_state.copy()
-                next_state['Date'] = next_date
-                next_state['Year'] = next_year
-                next_state['Month'] = next_month
-                next_state['Water_Level'] = next_water_level
-                next_state['Water_Level_Lag1'] = next_lag1
-                next_state['Annual_Ground_Water_Draft_Total'] = next_demand
-                next_state['Net_Ground_Water_Availability'] = next_supply
-                next_state['Stress_Index'] = decision.stress_index
-                # 'zone' might be needed if model uses it (likely encoded)
-                next_state['zone'] = decision.zone
-                
-                 # Remove Target if it exists in state
-                if 'Target' in next_state:
-                    del next_state['Target']
-
-                # Store prediction
-                predictions.append({
-                    "Year": next_year,
-                    "Month": next_date.strftime("%b"), # Jan, Feb
-                    "Date": next_date.strftime("%Y-%m-%d"),
-                    "Water_Level": round(next_water_level, 2),
-                    "Lower_Bound": round(next_water_level * 0.95, 2), # Mock confidence
-                    "Upper_Bound": round(next_water_level * 1.05, 2),
-                    "Demand": round(next_demand, 2),
-                    "Supply": round(next_supply, 2),
-                    "Stress_Index": round(decision.stress_index, 4),
-                    "Zone": decision.zone
-                })
-                
-                # Advance loop
-                current_state = next_state
-                current_date = next_date
-                
+
+            result = self._forecast(
+                pd.DataFrame([start_row]),
+                steps=years * STEPS_PER_YEAR,
+                demand_change_pct=demand_change_pct,
+                supply_change_pct=supply_change_pct,
+                demand_shock_pct=demand_shock_pct,
+                supply_shock_pct=supply_shock_pct,
+            )
+
+            predictions = self._format_predictions(result, 0)
+            self.cache.put(key, predictions)
             return predictions
 
         except Exception as e:
             raise GroundwaterException(e, sys)
+
+    def predict_future_batch(self, station_ids=None, district=None, state=None, years=5,
+                             demand_change_pct=0.0, supply_change_pct=0.0,
+                             demand_shock_pct=0.0, supply_shock_pct=0.0):
+        """
+        Forecasts many stations in one batched pass; stations in the
+        forecast store or the cache are skipped. Returns {station_id:
+        predictions} in the same format as predict_future.
+        """
+        try:
+            start_rows = get_latest_rows(station_ids=station_ids, district=district, state=state)
+            if start_rows.empty:
+                return {}
+
+            model_version, dataset_version = self.get_model_version(), get_dataset_version()
+
+            stored, columns = self.store.lookup(
+                list(start_rows.index), years * STEPS_PER_YEAR,
+                (demand_change_pct, supply_change_pct, demand_shock_pct, supply_shock_pct),
+                model_version, dataset_version,
+            )
+            forecasts = {
+                station_id: self._format_predictions(stored, column)
+                for station_id, column in columns.items()
+            }
+
+            keys = {
+                station_id: self._cache_key(station_id, years, demand_change_pct, supply_change_pct,
+                                            model_version, dataset_version, demand_shock_pct, supply_shock_pct)
+                for station_id in start_rows.index if station_id not in forecasts
+            }
+            n_cached = 0
+            for station_id, key in keys.items():
+                cached = self.cache.get(key)
+                if cached is not None:
+                    forecasts[station_id] = cached
+                    n_cached += 1
+
+            missing = start_rows[~start_rows.index.isin(list(forecasts))]
+            logging.info(
+                f"Batched forecast for {len(start_rows)} stations, {years} years "
+                f"({len(columns)} stored, {n_cached} cached)"
+            )
+
+            if not missing.empty:
+                result = self._forecast(
+                    missing,
+                    steps=years * STEPS_PER_YEAR,
+                    demand_change_pct=demand_change_pct,
+                    supply_change_pct=supply_change_pct,
+                    demand_shock_pct=demand_shock_pct,
+                    supply_shock_pct=supply_shock_pct,
+                )
+                for row, station_id in enumerate(missing.index):
+                    predictions = self._format_predictions(result, row)
+                    self.cache.put(keys[station_id], predictions)
+                    forecasts[station_id] = predictions
+
+            return {station_id: forecasts[station_id] for station_id in start_rows.index}
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    # ===============================
+    # Materialized store
+    # ===============================
+    def materialize_store(self, years=FORECAST_STORE_YEARS) -> int:
+        """
+        Forecasts every station (and the all-stations view) for every
+        scenario in FORECAST_SCENARIOS in bulk and writes them to the
+        forecast store, so requests for those scenarios need no model call.
+        """
+        try:
+            start = time.perf_counter()
+            self.load_model()
+            model_version, dataset_version = self.get_model_version(), get_dataset_version()
+
+            start_rows = get_latest_rows()
+            overall = get_latest_data(None)
+            if overall:
+                start_rows = pd.concat([start_rows, pd.DataFrame([overall], index=[ALL_STATIONS])])
+            if start_rows.empty:
+                return 0
+
+            steps = years * STEPS_PER_YEAR
+            blocks = {}
+            for name, (demand_change_pct, supply_change_pct, demand_shock_pct, supply_shock_pct) \
+                    in FORECAST_SCENARIOS.items():
+                scenario = dict(
+                    demand_change_pct=demand_change_pct, supply_change_pct=supply_change_pct,
+                    demand_shock_pct=demand_shock_pct, supply_shock_pct=supply_shock_pct,
+                )
+                blocks[name] = [self._forecast(start_rows, steps, **scenario)]
+
+                # Shorter horizons the direct model covers differ from a
+                # prefix of the long forecast: store them separately
+                direct = self._direct_model_for(1, np.float64(demand_change_pct), np.float64(supply_change_pct))
+                if direct is not None and direct.horizons < steps:
+                    blocks[name].insert(0, self._forecast(start_rows, direct.horizons, **scenario))
+
+            self.store.write(
+                list(start_rows.index), FORECAST_SCENARIOS, blocks, model_version, dataset_version
+            )
+
+            logging.info(
+                f"Materialized forecasts for {len(start_rows)} stations x "
+                f"{len(FORECAST_SCENARIOS)} scenarios in {time.perf_counter() - start:.2f}s"
+            )
+            return len(start_rows)
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def start_precompute(self, years=FORECAST_STORE_YEARS) -> bool:
+        """
+        Runs materialize_store on a background thread. Returns False if a
+        build is already running.
+        """
+        if not _PRECOMPUTE_LOCK.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self.materialize_store(years=years)
+            except Exception as e:
+                logging.info(f"Forecast store build failed: {e}")
+            finally:
+                _PRECOMPUTE_LOCK.release()
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
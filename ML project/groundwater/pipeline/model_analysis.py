@@ -1,125 +1,228 @@
 
 import sys
 import os
-import pandas as pd
+import json
+import threading
 import numpy as np
-from groundwater.utils.main_utils.utils import load_object
+from datetime import datetime
+from groundwater.utils.main_utils.utils import load_object, get_file_version, get_file_digest
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
-from groundwater.entity.artifact_entity import DataTransformationArtifact
+from groundwater.utils.ml_utils.model.permutation_importance import PermutationImportance, feature_groups
+
+# Written by ModelTrainer next to final_model/model.pkl
+ANALYSIS_FILE_PATH = os.path.join("final_model", "model_analysis.json")
+ANALYSIS_SCHEMA_VERSION = 3
+
+# Actual vs predicted points sent to the UI; fixed seed so every build
+# of the same model picks the same points
+ANALYSIS_SCATTER_POINTS = 500
+ANALYSIS_SEED = 42
+ANALYSIS_HISTOGRAM_BINS = 30
+ANALYSIS_TOP_FEATURES = 10
+
+# (file version, analysis) of the loaded artifact
+_LOADED_ANALYSIS = (None, None)
+_LOAD_LOCK = threading.Lock()
+# Held while building from run artifacts, so concurrent requests build once
+_BUILD_LOCK = threading.Lock()
+
 
 class ModelAnalysis:
+    """
+    Model performance view for /api/model/analysis.
+
+    The analysis (scatter sample, residual histogram, metrics, feature
+    importance) is built once at the end of training from a single
+    predict over the test set and saved as a small JSON artifact tagged
+    with the model's content digest (so it stays valid when final_model/
+    is copied or deployed); requests only read it back.
+
+    feature_importance is grouped permutation importance when held-out
+    features are available: model-agnostic, and one value per original
+    column instead of one per one-hot category. It is computed on the
+    calibration slice that model selection never saw; permutation_split
+    names the split used ("test" for analyses rebuilt from older runs,
+    whose test split also selected the model). The model's own
+    importances are kept as model_feature_importance.
+    """
+
     def __init__(self):
-        # We need to find the artifacts. Assuming standard path structure from training.
-        # This is a bit hacky but efficient for this specific codebase structure.
         self.artifact_dir = os.path.join(os.getcwd(), "artifacts")
         self.model_path = os.path.join("final_model", "model.pkl")
+        self.analysis_path = ANALYSIS_FILE_PATH
+
+    # ===============================
+    # Build (training time)
+    # ===============================
+    @staticmethod
+    def _feature_importance(model, preprocessor) -> list:
+        if hasattr(model, "feature_importances_"):
+            importances = np.asarray(model.feature_importances_, dtype=np.float64)
+        elif hasattr(model, "coef_"):
+            # Inputs are standardized, so |coefficient| ranks the features
+            importances = np.abs(np.atleast_2d(model.coef_)).mean(axis=0)
+        else:
+            return []
 
-    def get_analysis_data(self):
         try:
-            # 1. Load Model
-            if not os.path.exists(self.model_path):
-                 raise Exception("Model not found. Please train first.")
-            
-            groundwater_model = load_object(self.model_path)
-            model = groundwater_model.model # The actual sklearn estimator
-            
-            # 2. Load Test Data
-            # We look for the latest data_transformation artifact
-            # For simplicity in this demo, we can just reload the 'test.npy' if we know where it is,
-            # OR we can assume the user wants analysis on the *Transform* artifacts.
-            
-            # Better approach: We saved independent X_test and y_test in 'artifacts/data_transformation/transformed/test.npy' usually?
-            # Let's check the code: Save object saves a dict {'X':..., 'y':...}
-            
-            # Correct Path Structure: artifacts/<timestamp>/data_transformation/transformed/test.npy
-            
-            # 1. Find the latest run folder in artifacts/
-            if not os.path.exists(self.artifact_dir):
-                 return {"error": "No run artifacts found."}
-            
-            # Filter only directories that look like timestamps (start with 20)
-            runs = [d for d in os.listdir(self.artifact_dir) if d.startswith('20')]
-            if not runs:
-                 return {"error": "No run folders found."}
-                 
-            latest_run = sorted(runs)[-1]
-            
-            # 2. Construct path to test.npy
-            test_path = os.path.join(self.artifact_dir, latest_run, "data_transformation", "transformed", "test.npy")
-            
-            if not os.path.exists(test_path):
-                 return {"error": "Test data not found."}
-                 
-            test_data = load_object(test_path)
-            X_test = test_data["X"]
-            y_test = test_data["y"]
-            
-            # 3. Predict
-            y_pred = model.predict(X_test)
-            
-            # 4. Prepare Response Data
-            
-            # Graph 1: Actual vs Predicted
-            # Randomly sample if too large (e.g. max 500 points) to keep UI fast
-            n_points = len(y_test)
-            indices = np.random.choice(n_points, size=min(500, n_points), replace=False)
-            
-            scatter_data = []
-            residuals = []
-            
-            for i in indices:
-                actual = float(y_test[i])
-                predicted = float(y_pred[i])
-                resid = actual - predicted
-                
-                scatter_data.append({
-                    "actual": round(actual, 2),
-                    "predicted": round(predicted, 2)
-                })
-                residuals.append(round(resid, 2))
-                
-            # Graph 3: Feature Importance
-            # Check if model has feature_importances_
-            feature_imp_data = []
-            if hasattr(model, "feature_importances_"):
-                # We need feature names. 
-                # The preprocessor is in groundwater_model.preprocessor
-                # Getting feature names from ColumnTransformer is tricky but possible.
-                # For now, let's try to map indices or just generic names if names fail.
-                
-                try:
-                    # Attempt to get feature names
-                    preprocessor = groundwater_model.preprocessor
-                    feature_names = preprocessor.get_feature_names_out()
-                except:
-                    feature_names = [f"Feature_{i}" for i in range(len(model.feature_importances_))]
-                
-                importances = model.feature_importances_
-                
-                # Combine and Sort
-                imp_list = []
-                for name, imp in zip(feature_names, importances):
-                    # Clean generic sklearn names like "num_pipeline__"
-                    clean_name = name.replace("num_pipeline__", "").replace("cat_pipeline__", "")
-                    imp_list.append({"name": clean_name, "value": float(imp)})
-                    
-                # Top 10
-                imp_list = sorted(imp_list, key=lambda x: x['value'], reverse=True)[:10]
-                feature_imp_data = imp_list
-                
-            elif hasattr(model, "coef_"):
-                 # Linear Model coefficients
-                 pass # Similar logic could be added for coefficients
-            
-            return {
-                "scatter": scatter_data,
-                "residuals": residuals,
-                "feature_importance": feature_imp_data,
-                "metrics": {
-                    "r2": round(model.score(X_test, y_test), 4) # Simple R2
-                }
+            feature_names = list(preprocessor.get_feature_names_out())
+        except Exception:
+            feature_names = []
+        if len(feature_names) != len(importances):
+            feature_names = [f"Feature_{i}" for i in range(len(importances))]
+
+        imp_list = [
+            # Clean generic sklearn names like "num_pipeline__"
+            {"name": name.replace("num_pipeline__", "").replace("cat_pipeline__", ""), "value": float(imp)}
+            for name, imp in zip(feature_names, importances)
+        ]
+        return sorted(imp_list, key=lambda x: x["value"], reverse=True)[:ANALYSIS_TOP_FEATURES]
+
+    @staticmethod
+    def build(groundwater_model, y_test, y_pred, problem_type: str = "regression",
+              model_name: str = None, model_version: str = None,
+              X_importance=None, y_importance=None, importance_split: str = "calibration") -> dict:
+        """
+        Analysis of y_pred = the model's predictions for the test set;
+        X_importance (transformed) / y_importance of a held-out split enable
+        permutation importance.
+        """
+        y_test = np.asarray(y_test, dtype=np.float64)
+        y_pred = np.asarray(y_pred, dtype=np.float64)
+        residuals = y_test - y_pred
+
+        n_points = len(y_test)
+        rng = np.random.default_rng(ANALYSIS_SEED)
+        indices = np.sort(rng.choice(n_points, size=min(ANALYSIS_SCATTER_POINTS, n_points), replace=False))
+
+        counts, edges = np.histogram(residuals, bins=ANALYSIS_HISTOGRAM_BINS)
+
+        if problem_type == "classification":
+            metrics = {"accuracy": round(float(np.mean(y_test == y_pred)), 4)}
+        else:
+            total = float(np.sum((y_test - y_test.mean()) ** 2))
+            metrics = {
+                "r2": round(1.0 - float(np.sum(residuals ** 2)) / total, 4) if total > 0 else 0.0,
+                "mae": round(float(np.mean(np.abs(residuals))), 4),
+                "rmse": round(float(np.sqrt(np.mean(residuals ** 2))), 4),
             }
 
+        model_importance = ModelAnalysis._feature_importance(
+            groundwater_model.model, groundwater_model.preprocessor
+        )
+        permutation = None
+        if X_importance is not None:
+            permutation = PermutationImportance.compute(
+                groundwater_model.model, X_importance, y_importance,
+                feature_groups(groundwater_model.preprocessor, X_importance.shape[1]),
+                problem_type=problem_type,
+            )
+
+        return {
+            "schema_version": ANALYSIS_SCHEMA_VERSION,
+            "model_version": model_version,
+            "model_name": model_name or type(groundwater_model.model).__name__,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "n_test": n_points,
+            "scatter": [
+                {"actual": round(float(y_test[i]), 2), "predicted": round(float(y_pred[i]), 2)}
+                for i in indices
+            ],
+            "residuals": [round(float(residuals[i]), 2) for i in indices],
+            "residual_histogram": {
+                "bin_edges": [round(float(e), 4) for e in edges],
+                "counts": counts.tolist(),
+            },
+            "feature_importance": (
+                [{"name": p["name"], "value": p["value"]} for p in permutation[:ANALYSIS_TOP_FEATURES]]
+                if permutation is not None else model_importance
+            ),
+            "model_feature_importance": model_importance,
+            "permutation_importance": permutation,
+            "permutation_split": importance_split if permutation is not None else None,
+            "metrics": metrics,
+        }
+
+    @staticmethod
+    def save(analysis: dict, file_path: str = ANALYSIS_FILE_PATH):
+        try:
+            os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(analysis, f)
+            os.replace(tmp_path, file_path)
+            logging.info(f"Model analysis saved at: {file_path}")
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    # ===============================
+    # Serve
+    # ===============================
+    def _load_saved(self):
+        global _LOADED_ANALYSIS
+        version = get_file_version(self.analysis_path)
+        with _LOAD_LOCK:
+            if _LOADED_ANALYSIS[0] != version:
+                analysis = None
+                if version != "none":
+                    with open(self.analysis_path) as f:
+                        analysis = json.load(f)
+                _LOADED_ANALYSIS = (version, analysis)
+            return _LOADED_ANALYSIS[1]
+
+    def _build_from_artifacts(self, model_version: str) -> dict:
+        """
+        For models trained before the analysis artifact existed: builds it
+        once from the latest run's test set and saves it.
+        """
+        # Correct Path Structure: artifacts/<timestamp>/data_transformation/transformed/test.npy
+        if not os.path.exists(self.artifact_dir):
+            return {"error": "No run artifacts found."}
+
+        # Filter only directories that look like timestamps (start with 20)
+        runs = [d for d in os.listdir(self.artifact_dir) if d.startswith('20')]
+        if not runs:
+            return {"error": "No run folders found."}
+
+        latest_run = sorted(runs)[-1]
+        test_path = os.path.join(self.artifact_dir, latest_run, "data_transformation", "transformed", "test.npy")
+        if not os.path.exists(test_path):
+            return {"error": "Test data not found."}
+
+        logging.info(f"Building model analysis from {test_path}")
+        groundwater_model = load_object(self.model_path)
+        test_data = load_object(test_path)
+        y_pred = groundwater_model.model.predict(test_data["X"])
+
+        problem_type = "classification" if len(np.unique(test_data["y"])) <= 20 else "regression"
+        # No record of the selection / calibration split here
+        analysis = self.build(groundwater_model, test_data["y"], y_pred, problem_type=problem_type,
+                              model_version=model_version, X_importance=test_data["X"],
+                              y_importance=test_data["y"], importance_split="test")
+        self.save(analysis, self.analysis_path)
+        return analysis
+
+    def _is_current(self, analysis, model_version: str) -> bool:
+        return analysis is not None and analysis.get("model_version") == model_version \
+            and analysis.get("schema_version") == ANALYSIS_SCHEMA_VERSION
+
+    def get_analysis_data(self):
+        try:
+            model_version = get_file_digest(self.model_path)
+            if model_version == "none":
+                raise Exception("Model not found. Please train first.")
+
+            analysis = self._load_saved()
+            if self._is_current(analysis, model_version):
+                return analysis
+
+            with _BUILD_LOCK:
+                # Requests that waited get what the first one built and saved
+                analysis = self._load_saved()
+                if not self._is_current(analysis, model_version):
+                    analysis = self._build_from_artifacts(model_version)
+            return analysis
+
         except Exception as e:
             raise GroundwaterException(e, sys)
@@ -0,0 +1,198 @@
+import sys
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from data_loader import get_latest_rows, get_level_history
+from groundwater.decision.zone_engine import get_zone_engine
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+from groundwater.pipeline.forecasting import ForecastingPipeline, STEPS_PER_YEAR
+from groundwater.utils.rolling_features import RollingFeatureState
+
+DEFAULT_SIMULATIONS = 1000
+MAX_SIMULATIONS = 10000
+
+# Simulations x stations forecast per step, across all workers
+MONTE_CARLO_ROW_BUDGET = 500_000
+# Rows per chunk; fixed so a seed gives the same result for any worker count
+ROWS_PER_CHUNK = 50_000
+MONTE_CARLO_WORKERS = 4
+
+_SIMULATION_POOL = None
+_WORKER_PIPELINE = None
+
+
+@dataclass
+class MonteCarloConfig:
+    n_simulations: int = DEFAULT_SIMULATIONS
+    years: int = 5
+    # Annual growth: mean % and volatility (% sd of the log growth)
+    demand_drift_pct: float = 0.0
+    demand_volatility_pct: float = 5.0
+    supply_drift_pct: float = 0.0
+    supply_volatility_pct: float = 5.0
+    seed: int = 42
+    quantiles: Tuple[float, ...] = (0.1, 0.5, 0.9)
+    budget: int = MONTE_CARLO_ROW_BUDGET
+
+
+def _get_simulation_pool() -> ProcessPoolExecutor:
+    global _SIMULATION_POOL
+    if _SIMULATION_POOL is None:
+        # spawn: the API process is multi-threaded, forking it is not safe
+        _SIMULATION_POOL = ProcessPoolExecutor(
+            max_workers=MONTE_CARLO_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _SIMULATION_POOL
+
+
+def _growth_pct(rng, shape, drift_pct, volatility_pct) -> np.ndarray:
+    """
+    Lognormal quarterly growth shocks, expressed as the annual % the
+    forecaster expects.
+    """
+    mu = np.log1p(drift_pct / 100.0) / STEPS_PER_YEAR
+    sigma = (volatility_pct / 100.0) / np.sqrt(STEPS_PER_YEAR)
+    factor = np.exp(mu + sigma * rng.standard_normal(shape))
+    return (factor - 1.0) * STEPS_PER_YEAR * 100.0
+
+
+def simulate_chunk(start_rows: pd.DataFrame, history: np.ndarray, n_simulations: int,
+                   config: MonteCarloConfig, seed: np.random.SeedSequence) -> Dict:
+    """
+    Runs n_simulations trajectories for every station of start_rows (with
+    its (stations, k) level history) as one batch of n_simulations x
+    stations rows. Runs in a pool worker, which never reads the dataset.
+    """
+    global _WORKER_PIPELINE
+    if _WORKER_PIPELINE is None:
+        _WORKER_PIPELINE = ForecastingPipeline()
+
+    n_stations = len(start_rows)
+    steps = config.years * STEPS_PER_YEAR
+    rng = np.random.default_rng(seed)
+
+    # Row r is simulation r // n_stations of station r % n_stations
+    tile = np.tile(np.arange(n_stations), n_simulations)
+    rows = start_rows.iloc[tile]
+    shape = (steps, n_simulations * n_stations)
+
+    result = _WORKER_PIPELINE._forecast(
+        rows,
+        steps=steps,
+        demand_change_pct=_growth_pct(rng, shape, config.demand_drift_pct, config.demand_volatility_pct),
+        supply_change_pct=_growth_pct(rng, shape, config.supply_drift_pct, config.supply_volatility_pct),
+        history=history[tile],
+    )
+
+    cube = (steps, n_simulations, n_stations)
+    engine = get_zone_engine()
+    zones = engine.index(result["stress_index"]).reshape(cube)
+    zone_counts = np.stack([(zones == k).sum(axis=1) for k in range(len(engine.levels))], axis=1)
+
+    return {
+        "dates": result["dates"],
+        "water_level": result["water_level"].reshape(cube).astype(np.float32),
+        "stress_index": result["stress_index"].reshape(cube).astype(np.float32),
+        "zone_counts": zone_counts.astype(np.int32),     # (steps, zones, stations)
+    }
+
+
+class MonteCarloForecaster:
+    """
+    Stochastic scenario forecasts summarised as fan charts.
+
+    Every simulation draws lognormal quarterly demand / supply growth
+    shocks; simulations x stations rows are advanced together, one predict
+    call per step per chunk, and chunks are spread across a process pool.
+    Chunks are seeded from one SeedSequence, so a seed always reproduces
+    the same fan. n_simulations is capped so simulations x stations stays
+    within the row budget.
+    """
+
+    @staticmethod
+    def effective_simulations(config: MonteCarloConfig, n_stations: int) -> int:
+        budget = min(int(config.budget), MONTE_CARLO_ROW_BUDGET)
+        requested = min(max(int(config.n_simulations), 1), MAX_SIMULATIONS)
+        return max(1, min(requested, budget // max(n_stations, 1)))
+
+    @staticmethod
+    def _summarise(chunks: List[Dict], station_ids, config: MonteCarloConfig) -> Dict[str, List[Dict]]:
+        water_level = np.concatenate([c["water_level"] for c in chunks], axis=1)
+        stress = np.concatenate([c["stress_index"] for c in chunks], axis=1)
+        zone_prob = sum(c["zone_counts"] for c in chunks) / water_level.shape[1]
+
+        quantiles = np.asarray(config.quantiles, dtype=np.float64)
+        labels = [f"P{round(q * 100):g}" for q in quantiles]
+        wl_q = np.quantile(water_level, quantiles, axis=1)     # (quantiles, steps, stations)
+        stress_q = np.quantile(stress, quantiles, axis=1)
+        codes = [level.code for level in get_zone_engine().levels]
+
+        forecasts = {}
+        for j, station_id in enumerate(station_ids):
+            forecasts[station_id] = [
+                {
+                    "Year": date.year,
+                    "Month": date.strftime("%b"),
+                    "Date": date.strftime("%Y-%m-%d"),
+                    "Water_Level": {label: round(float(wl_q[i, step, j]), 2) for i, label in enumerate(labels)},
+                    "Stress_Index": {label: round(float(stress_q[i, step, j]), 4) for i, label in enumerate(labels)},
+                    "Zone_Probability": {c: round(float(zone_prob[step, k, j]), 4) for k, c in enumerate(codes)},
+                }
+                for step, date in enumerate(chunks[0]["dates"])
+            ]
+        return forecasts
+
+    @classmethod
+    def run(cls, config: MonteCarloConfig, station_ids=None, district=None, state=None) -> Dict:
+        try:
+            start = time.perf_counter()
+
+            start_rows = get_latest_rows(station_ids=station_ids, district=district, state=state)
+            if start_rows.empty:
+                return {"simulations": 0, "stations": 0, "forecasts": {}}
+
+            n_stations = len(start_rows)
+            history = get_level_history(
+                station_ids=list(start_rows.index), window=RollingFeatureState.history_size()
+            ).to_numpy(dtype=np.float64)
+            n_simulations = cls.effective_simulations(config, n_stations)
+
+            per_chunk = max(1, ROWS_PER_CHUNK // n_stations)
+            sizes = [min(per_chunk, n_simulations - i) for i in range(0, n_simulations, per_chunk)]
+            seeds = np.random.SeedSequence(config.seed).spawn(len(sizes))
+
+            if len(sizes) == 1:
+                # Not worth a round trip to the pool
+                chunks = [simulate_chunk(start_rows, history, sizes[0], config, seeds[0])]
+            else:
+                pool = _get_simulation_pool()
+                futures = [pool.submit(simulate_chunk, start_rows, history, n, config, seed)
+                           for n, seed in zip(sizes, seeds)]
+                chunks = [future.result() for future in futures]
+
+            forecasts = cls._summarise(chunks, list(start_rows.index), config)
+            elapsed = time.perf_counter() - start
+
+            logging.info(
+                f"Monte Carlo forecast: {n_simulations} simulations x {n_stations} stations, "
+                f"{len(sizes)} chunks in {elapsed:.2f}s"
+            )
+
+            return {
+                "simulations": n_simulations,
+                "requested_simulations": int(config.n_simulations),
+                "stations": n_stations,
+                "seed": config.seed,
+                "elapsed_s": round(elapsed, 3),
+                "forecasts": forecasts,
+            }
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
@@ -0,0 +1,118 @@
+import numpy as np
+
+# Bins per axis used by density_sample_indices
+DENSITY_GRID_SIZE = 64
+
+
+def _as_float(values) -> np.ndarray:
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        # NaT maps to NaN so it is dropped with the other missing values
+        as_int = values.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+        return np.where(np.isnat(values), np.nan, as_int)
+    return values.astype(np.float64)
+
+
+def lttb_indices(x, y, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling of a series sorted by x.
+
+    Returns the indices (into the original arrays, ascending) of at most
+    max_points points. The first and last points are always kept; every
+    bucket in between keeps the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket, so peaks and
+    troughs survive. Points with a non-finite x or y are skipped. Datetime
+    x values are supported.
+    """
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(valid)
+    max_points = max(int(max_points), 3)
+    if n <= max_points:
+        return valid
+
+    x = x[valid]
+    y = y[valid]
+
+    # max_points - 2 buckets over the interior points [1, n - 1)
+    n_buckets = max_points - 2
+    edges = np.linspace(1, n - 1, n_buckets + 1).astype(np.int64)
+
+    # Bucket means from prefix sums; the last bucket looks ahead to the final point
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    sizes = edges[1:] - edges[:-1]
+    mean_x = (cum_x[edges[1:]] - cum_x[edges[:-1]]) / sizes
+    mean_y = (cum_y[edges[1:]] - cum_y[edges[:-1]]) / sizes
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    anchor = 0
+    for b in range(n_buckets):
+        lo, hi = edges[b], edges[b + 1]
+        ax, ay = x[anchor], y[anchor]
+        # Twice the triangle area; the constant factor does not change argmax
+        area = np.abs(
+            (ax - next_x[b]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (next_y[b] - ay)
+        )
+        anchor = lo + int(np.argmax(area))
+        selected[b + 1] = anchor
+
+    return valid[selected]
+
+
+def density_sample_indices(x, y, max_points: int, grid_size: int = DENSITY_GRID_SIZE) -> np.ndarray:
+    """
+    Deterministic, density-preserving subsample of a scatter.
+
+    Points are binned on a grid_size x grid_size grid over the data range.
+    Every occupied cell keeps at least one point, so sparse regions and
+    outliers survive, and the remaining budget is shared across cells in
+    proportion to their counts. Within a cell points are taken at an even
+    stride in original order, so the same input always yields the same
+    sample. Returns ascending indices of at most max_points points.
+    """
+    x = _as_float(x)
+    y = _as_float(y)
+
+    valid = np.flatnonzero(np.isfinite(x) & np.isfinite(y))
+    n = len(valid)
+    max_points = max(int(max_points), 1)
+    if n <= max_points:
+        return valid
+
+    def bins(values):
+        low, span = values.min(), np.ptp(values)
+        if span == 0:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.clip(((values - low) / span * grid_size).astype(np.int64), 0, grid_size - 1)
+
+    cell = bins(x[valid]) * grid_size + bins(y[valid])
+
+    order = np.argsort(cell, kind="stable")
+    _, starts, counts = np.unique(cell[order], return_index=True, return_counts=True)
+    n_cells = len(counts)
+
+    if n_cells >= max_points:
+        # Not even one point per cell fits: take an even stride of cell representatives
+        firsts = order[starts]
+        keep = firsts[np.linspace(0, n_cells - 1, max_points).astype(np.int64)]
+        return np.sort(valid[keep])
+
+    extra = (max_points - n_cells) / (n - n_cells)
+    quota = 1 + np.floor((counts - 1) * extra).astype(np.int64)
+
+    # Keep ranks floor(k * count / quota) for k in [0, quota) within each cell
+    count = np.repeat(counts, counts)
+    q = np.repeat(quota, counts)
+    rank = np.arange(n) - np.repeat(starts, counts)
+    k = (rank * q + count - 1) // count
+    keep = (k < q) & ((k * count) // q == rank)
+
+    return np.sort(valid[order[keep]])
@@ -0,0 +1,72 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+FORECAST_CACHE_MAX_ENTRIES = 5000
+
+
+class ForecastCache:
+    """
+    Bounded in-memory LRU of forecasts.
+
+    Keys include the model and dataset versions, so retraining or reloading
+    the data never serves a stale forecast; entries of old versions simply
+    age out. Values are copied on the way in and out, so callers may
+    modify what they get back.
+    """
+
+    def __init__(self, max_entries: int = FORECAST_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, List[Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(station_id, years, demand_change_pct, supply_change_pct,
+                 model_version, dataset_version, demand_shock_pct=0.0, supply_shock_pct=0.0) -> Tuple:
+        # Rounded so 5 and 5.0000000001 share an entry
+        return (
+            str(station_id), int(years),
+            round(float(demand_change_pct), 6), round(float(supply_change_pct), 6),
+            round(float(demand_shock_pct), 6), round(float(supply_shock_pct), 6),
+            model_version, dataset_version,
+        )
+
+    @staticmethod
+    def _copy(predictions: List[Dict]) -> List[Dict]:
+        return [dict(p) for p in predictions]
+
+    def get(self, key: Tuple) -> Optional[List[Dict]]:
+        with self._lock:
+            predictions = self._entries.get(key)
+            if predictions is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return self._copy(predictions)
+
+    def put(self, key: Tuple, predictions: List[Dict]):
+        predictions = self._copy(predictions)
+        with self._lock:
+            self._entries[key] = predictions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,185 @@
+import os
+import sys
+import threading
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+from groundwater.utils.main_utils.utils import get_file_version
+
+FORECAST_STORE_PATH = os.path.join("final_model", "forecast_store.npz")
+# Bumped when the layout or the meaning of scenario_params changes
+STORE_FORMAT_VERSION = 2
+
+# Per-step outputs of ForecastingPipeline._forecast, each stored (steps, stations)
+STORE_COLUMNS = (
+    "water_level", "lower_bound", "upper_bound",
+    "demand", "supply", "stress_index", "zone",
+)
+
+
+class ForecastStore:
+    """
+    Columnar on-disk store of materialized forecasts.
+
+    For every scenario the store holds one (steps, stations) array per
+    output column plus the step dates, and a station -> column index, all
+    in a single npz published with os.replace. A scenario may have several
+    blocks of different lengths (e.g. a short direct-model block and a long
+    recursive one); a lookup slices the shortest block covering the
+    requested steps, which is what a live forecast of that length computes.
+
+    The store is tagged with the model and dataset versions it was built
+    from, and lookups miss once either changes.
+    """
+
+    def __init__(self, path: str = FORECAST_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file_version = None
+        self._store = None
+
+    @staticmethod
+    def scenario_key(demand_change_pct, supply_change_pct,
+                     demand_shock_pct=0.0, supply_shock_pct=0.0) -> Tuple[float, ...]:
+        # Rounded as in ForecastCache.make_key
+        return tuple(
+            round(float(v), 6) for v in (demand_change_pct, supply_change_pct, demand_shock_pct, supply_shock_pct)
+        )
+
+    # ===============================
+    # Write
+    # ===============================
+    def write(self, station_ids: List[str], scenarios: Dict[str, Tuple[float, float]],
+              blocks: Dict[str, List[dict]], model_version: str, dataset_version: str):
+        """
+        scenarios: {name: (demand_change_pct, supply_change_pct,
+                           demand_shock_pct, supply_shock_pct)}
+        blocks: {name: [forecast results over all station_ids]}
+        """
+        try:
+            arrays = {
+                "format_version": np.asarray(STORE_FORMAT_VERSION),
+                "station_ids": np.asarray(station_ids, dtype=str),
+                "scenario_names": np.asarray(list(scenarios), dtype=str),
+                "scenario_params": np.asarray(list(scenarios.values()), dtype=np.float64).reshape(-1, 4),
+                "model_version": np.asarray(model_version),
+                "dataset_version": np.asarray(dataset_version),
+                "built_at": np.asarray(datetime.now().isoformat(timespec="seconds")),
+            }
+            for name in scenarios:
+                arrays[f"{name}/n_blocks"] = np.asarray(len(blocks[name]))
+                for b, result in enumerate(blocks[name]):
+                    prefix = f"{name}/{b}"
+                    arrays[f"{prefix}/dates"] = np.asarray([d.strftime("%Y-%m-%d") for d in result["dates"]])
+                    for column in STORE_COLUMNS:
+                        values = result[column]
+                        arrays[f"{prefix}/{column}"] = values.astype(str) if column == "zone" else values
+
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_path, "wb") as f:
+                    np.savez(f, **arrays)
+                os.replace(tmp_path, self.path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            logging.info(
+                f"Forecast store written: {len(station_ids)} stations x {len(scenarios)} scenarios "
+                f"({os.path.getsize(self.path) / 1e6:.1f} MB)"
+            )
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    # ===============================
+    # Read
+    # ===============================
+    def _load(self) -> Optional[Dict]:
+        """
+        The store as loaded in memory, re-read whenever the file changes.
+        """
+        version = get_file_version(self.path)
+        with self._lock:
+            if version != self._file_version:
+                self._store = self._read() if version != "none" else None
+                self._file_version = version
+            return self._store
+
+    def _read(self) -> Optional[Dict]:
+        try:
+            with np.load(self.path, allow_pickle=False) as npz:
+                arrays = {key: npz[key] for key in npz.files}
+        except Exception as e:
+            # A corrupt or old-format store only costs live computation
+            logging.info(f"Forecast store not loaded: {e}")
+            return None
+
+        if "format_version" not in arrays or int(arrays["format_version"]) != STORE_FORMAT_VERSION:
+            logging.info("Forecast store has an old format; ignored until it is rebuilt")
+            return None
+
+        scenarios = {}
+        for name, params in zip(arrays["scenario_names"].tolist(), arrays["scenario_params"]):
+            blocks = []
+            for b in range(int(arrays[f"{name}/n_blocks"])):
+                prefix = f"{name}/{b}"
+                block = {column: arrays[f"{prefix}/{column}"] for column in STORE_COLUMNS}
+                block["dates"] = [datetime.strptime(d, "%Y-%m-%d") for d in arrays[f"{prefix}/dates"].tolist()]
+                blocks.append(block)
+            scenarios[self.scenario_key(*params)] = sorted(blocks, key=lambda block: len(block["dates"]))
+
+        return {
+            "index": {station_id: j for j, station_id in enumerate(arrays["station_ids"].tolist())},
+            "scenarios": scenarios,
+            "scenario_names": arrays["scenario_names"].tolist(),
+            "model_version": str(arrays["model_version"]),
+            "dataset_version": str(arrays["dataset_version"]),
+            "built_at": str(arrays["built_at"]),
+        }
+
+    def lookup(self, station_ids: List[str], steps: int, scenario: Tuple[float, ...],
+               model_version: str, dataset_version: str) -> Tuple[Optional[dict], Dict[str, int]]:
+        """
+        scenario: (demand_change_pct, supply_change_pct, demand_shock_pct,
+        supply_shock_pct). Returns (result, {station_id: column}) for the
+        stored stations, with result shaped like a steps-long forecast;
+        (None, {}) on a miss.
+        """
+        store = self._load()
+        if store is None or store["model_version"] != model_version or store["dataset_version"] != dataset_version:
+            return None, {}
+
+        blocks = store["scenarios"].get(self.scenario_key(*scenario), [])
+        block = next((b for b in blocks if len(b["dates"]) >= steps), None)
+        if block is None:
+            return None, {}
+
+        index = store["index"]
+        columns = {station_id: index[station_id] for station_id in station_ids if station_id in index}
+        if not columns:
+            return None, {}
+
+        result = {column: block[column][:steps] for column in STORE_COLUMNS}
+        result["dates"] = block["dates"][:steps]
+        return result, columns
+
+    def stats(self, model_version: str = None, dataset_version: str = None) -> Dict:
+        store = self._load()
+        if store is None:
+            return {"available": False}
+
+        return {
+            "available": True,
+            "fresh": store["model_version"] == model_version and store["dataset_version"] == dataset_version,
+            "built_at": store["built_at"],
+            "stations": len(store["index"]),
+            "scenarios": store["scenario_names"],
+            "max_steps": max((len(b[-1]["dates"]) for b in store["scenarios"].values() if b), default=0),
+            "model_version": store["model_version"],
+            "dataset_version": store["dataset_version"],
+        }
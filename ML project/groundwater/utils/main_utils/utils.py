@@ -2,6 +2,7 @@ import yaml
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
 import os, sys
+import hashlib
 import numpy as np
 import pickle
 
@@ -9,6 +10,10 @@ from sklearn.metrics import r2_score
 from sklearn.model_selection import GridSearchCV
 
 
+# file path -> (file version, content digest)
+_FILE_DIGESTS = {}
+
+
 def read_yaml_file(file_path: str) -> dict:
     try:
         with open(file_path, "rb") as yaml_file:
@@ -71,6 +76,40 @@ def load_object(file_path: str) -> object:
         raise GroundwaterException(e, sys) from e
 
 
+def get_file_version(file_path: str) -> str:
+    """
+    Cheap version token for a file on disk. Changes whenever the file is
+    rewritten; "none" if it does not exist.
+    """
+    try:
+        stat = os.stat(file_path)
+        return f"{stat.st_mtime_ns:x}-{stat.st_size:x}"
+    except FileNotFoundError:
+        return "none"
+
+
+def get_file_digest(file_path: str) -> str:
+    """
+    SHA-256 of a file's content; "none" if it does not exist. Unlike
+    get_file_version it survives copies (deploys, checkouts) of the same
+    file. Re-hashed only when get_file_version changes.
+    """
+    version = get_file_version(file_path)
+    if version == "none":
+        return version
+
+    cached = _FILE_DIGESTS.get(file_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    _FILE_DIGESTS[file_path] = (version, digest.hexdigest())
+    return digest.hexdigest()
+
+
 def load_numpy_array_data(file_path: str) -> np.array:
     try:
         with open(file_path, "rb") as file_obj:
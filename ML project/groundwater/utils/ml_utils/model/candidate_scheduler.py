@@ -0,0 +1,201 @@
+import os
+import sys
+import time
+import pickle
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sklearn.metrics import accuracy_score, r2_score
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+
+try:
+    import resource  # Unix only
+except ImportError:
+    resource = None
+
+_METRICS = {"accuracy": accuracy_score, "r2": r2_score}
+
+
+@dataclass
+class CandidateResult:
+    name: str
+    model: object
+    score: float
+    n_jobs: int
+    fit_time_s: float
+    predict_ms_per_1k_rows: float
+    peak_memory_mb: Optional[float]    # peak RSS during fit + predict above the RSS before
+    pickled_size_kb: float
+
+    def metrics(self) -> Dict:
+        return {
+            "score": self.score,
+            "n_jobs": self.n_jobs,
+            "fit_time_s": round(self.fit_time_s, 4),
+            "predict_ms_per_1k_rows": round(self.predict_ms_per_1k_rows, 4),
+            "peak_memory_mb": None if self.peak_memory_mb is None else round(self.peak_memory_mb, 2),
+            "pickled_size_kb": round(self.pickled_size_kb, 2),
+        }
+
+
+def _proc_status_mb(field: str) -> Optional[float]:
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024   # kB
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak_rss() -> bool:
+    """
+    Resets the peak RSS (VmHWM) to the current RSS on Linux, so the peak
+    measured afterwards is not one from imports or data loading.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _memory_mb() -> Tuple[Optional[float], Optional[float]]:
+    """
+    (current RSS, peak RSS) in MB. Without /proc the current RSS is None
+    and the peak comes from getrusage.
+    """
+    current, peak = _proc_status_mb("VmRSS"), _proc_status_mb("VmHWM")
+    if peak is None and resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # KiB on Linux, bytes on macOS
+        peak = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return current, peak
+
+
+def fit_candidate(name, model, n_jobs, X_train, y_train, X_test, y_test, metric) -> CandidateResult:
+    """
+    Fits, scores and measures one candidate. Runs in its own scheduler
+    process, so the peak RSS growth is this candidate's alone.
+    """
+    reset = _reset_peak_rss()
+    current, peak = _memory_mb()
+    # Without a reset, the best baseline is the peak so far
+    memory_before = current if reset and current is not None else peak
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    y_pred = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    _, memory_after = _memory_mb()
+
+    return CandidateResult(
+        name=name,
+        model=model,
+        score=float(_METRICS[metric](y_test, y_pred)),
+        n_jobs=n_jobs,
+        fit_time_s=fit_time,
+        predict_ms_per_1k_rows=predict_time * 1000 * 1000 / max(len(X_test), 1),
+        peak_memory_mb=(
+            None if None in (memory_before, memory_after) else max(0.0, memory_after - memory_before)
+        ),
+        pickled_size_kb=len(pickle.dumps(model)) / 1024,
+    )
+
+
+class CandidateScheduler:
+    """
+    Trains candidate models concurrently within a CPU budget.
+
+    Single-threaded candidates cost one core. Candidates created with
+    n_jobs set share the cores left over by them (instead of n_jobs=-1
+    taking every core), so the forest overlaps with the cheap models.
+    Candidates start largest first whenever enough cores are free, each
+    in a fresh spawned process, which also isolates its peak memory.
+    With a budget of one core everything runs inline, in order.
+    """
+
+    def __init__(self, cpu_budget: Optional[int] = None):
+        self.cpu_budget = max(1, cpu_budget or os.cpu_count() or 1)
+
+    def plan(self, models: Dict[str, object]) -> Dict[str, int]:
+        """
+        Cores per candidate; sets n_jobs on the multi-threaded ones.
+        """
+        threaded = [
+            name for name, model in models.items() if model.get_params().get("n_jobs") is not None
+        ]
+        spare = self.cpu_budget - (len(models) - len(threaded))
+        share = max(1, spare // max(len(threaded), 1))
+
+        cores = {}
+        for name, model in models.items():
+            if name in threaded:
+                cores[name] = min(share, self.cpu_budget)
+                model.set_params(n_jobs=cores[name])
+            else:
+                cores[name] = 1
+        return cores
+
+    def run(self, models: Dict[str, object], X_train, y_train, X_test, y_test,
+            metric: str = "r2") -> Dict[str, CandidateResult]:
+        try:
+            start = time.perf_counter()
+            cores = self.plan(models)
+
+            def args(name):
+                return (name, models[name], cores[name], X_train, y_train, X_test, y_test, metric)
+
+            results = {}
+            if self.cpu_budget <= 1:
+                for name in models:
+                    logging.info(f"Training model: {name}")
+                    results[name] = fit_candidate(*args(name))
+            else:
+                queue = sorted(models, key=lambda name: -cores[name])
+                free = self.cpu_budget
+                running = {}  # future -> (name, executor)
+
+                try:
+                    while queue or running:
+                        for name in list(queue):
+                            if cores[name] <= free:
+                                logging.info(f"Training model: {name} on {cores[name]} core(s)")
+                                # spawn: forking a multi-threaded process is not safe
+                                executor = ProcessPoolExecutor(
+                                    max_workers=1, mp_context=multiprocessing.get_context("spawn")
+                                )
+                                running[executor.submit(fit_candidate, *args(name))] = (name, executor)
+                                free -= cores[name]
+                                queue.remove(name)
+
+                        finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            name, executor = running.pop(future)
+                            executor.shutdown()
+                            free += cores[name]
+                            results[name] = future.result()
+                finally:
+                    for _, executor in running.values():
+                        executor.shutdown(cancel_futures=True)
+
+            for name in models:
+                logging.info(f"{name}: {results[name].metrics()}")
+            logging.info(
+                f"Trained {len(models)} candidates in {time.perf_counter() - start:.2f}s "
+                f"(CPU budget {self.cpu_budget})"
+            )
+            return {name: results[name] for name in models}
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
@@ -0,0 +1,273 @@
+import numpy as np
+import pandas as pd
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from groundwater.logging.logger import logging
+
+# Up to this many rows categories are looked up value by value; larger
+# batches are factorized first so each distinct value is looked up once
+DIRECT_LOOKUP_ROWS = 64
+
+
+@dataclass
+class _NumericBlock:
+    columns: List[int]                 # positions in feature_names_in_
+    fill: Optional[np.ndarray]         # imputer statistics (NaN -> fill)
+    mean: Optional[np.ndarray]
+    scale: Optional[np.ndarray]
+
+    @property
+    def width(self) -> int:
+        return len(self.columns)
+
+
+@dataclass
+class _CategoricalBlock:
+    columns: List[int]
+    fill: Optional[List[object]]       # imputer statistics (NaN -> fill)
+    maps: List[Dict[object, int]]      # category -> index, per column
+    offsets: List[int]                 # first output column of each input column
+    ignore_unknown: bool
+
+    @property
+    def width(self) -> int:
+        return sum(len(m) for m in self.maps)
+
+
+def _is_nan(value) -> bool:
+    return value != value
+
+
+class CompiledPreprocessor:
+    """
+    Flat numpy export of the fitted ColumnTransformer built by
+    DataTransformation (median imputer + StandardScaler for numbers,
+    most-frequent imputer + OneHotEncoder for categories).
+
+    The fitted state is reduced to fill vectors, mean / scale vectors and
+    category -> index dicts, and transform() applies them directly to a
+    DataFrame or a numpy row / batch in feature_names_in_ order. The
+    arithmetic follows sklearn step for step, so the output is bit-for-bit
+    identical (dense float64); compile() checks this on a probe batch.
+    Anything else in the transformer (other steps, remainder columns,
+    infrequent categories, ...) is rejected and sklearn is used instead.
+    """
+
+    def __init__(self, feature_names: List[str], blocks: List[object]):
+        self.feature_names = list(feature_names)
+        self.blocks = blocks
+        self.n_features_out = sum(block.width for block in blocks)
+
+    # ===============================
+    # Export
+    # ===============================
+    @classmethod
+    def compile(cls, preprocessor, verify: bool = True) -> "CompiledPreprocessor":
+        """
+        Raises ValueError if the transformer cannot be compiled or the
+        compiled output differs from sklearn's.
+        """
+        if not isinstance(preprocessor, ColumnTransformer):
+            raise ValueError(f"Unsupported preprocessor {type(preprocessor).__name__}")
+        if not hasattr(preprocessor, "feature_names_in_"):
+            raise ValueError("Preprocessor was not fitted on a DataFrame")
+
+        feature_names = [str(name) for name in preprocessor.feature_names_in_]
+        position = {name: i for i, name in enumerate(feature_names)}
+
+        blocks = []
+        for name, transformer, columns in preprocessor.transformers_:
+            if transformer == "drop" or (name == "remainder" and len(columns) == 0):
+                continue
+            if isinstance(transformer, str):
+                raise ValueError(f"Unsupported transformer '{transformer}' for {name}")
+            if not all(isinstance(c, str) for c in columns):
+                raise ValueError(f"Columns of {name} must be given by name")
+
+            steps = [step for _, step in transformer.steps] if isinstance(transformer, Pipeline) else [transformer]
+            blocks.append(cls._compile_block([position[c] for c in columns], steps))
+
+        compiled = cls(feature_names, blocks)
+        if verify:
+            compiled.verify(preprocessor)
+        return compiled
+
+    @classmethod
+    def try_compile(cls, preprocessor) -> Optional["CompiledPreprocessor"]:
+        try:
+            compiled = cls.compile(preprocessor)
+            logging.info(f"Compiled preprocessor: {compiled.n_features_out} output features")
+            return compiled
+        except Exception as e:
+            logging.info(f"Preprocessor not compiled, using sklearn: {e}")
+            return None
+
+    @staticmethod
+    def _compile_imputer(imputer) -> np.ndarray:
+        if not isinstance(imputer, SimpleImputer):
+            raise ValueError(f"Unsupported step {type(imputer).__name__}")
+        if not _is_nan(imputer.missing_values) or imputer.indicator_ is not None:
+            raise ValueError("Only NaN imputation without indicator is supported")
+        # sklearn drops all-missing columns, which would shift the output
+        if any(_is_nan(value) for value in imputer.statistics_):
+            raise ValueError("Imputer has empty features")
+        return imputer.statistics_
+
+    @classmethod
+    def _compile_block(cls, columns: List[int], steps: List[object]):
+        fill = None
+        if steps and isinstance(steps[0], SimpleImputer):
+            fill = cls._compile_imputer(steps[0])
+            steps = steps[1:]
+
+        if len(steps) == 1 and isinstance(steps[0], OneHotEncoder):
+            encoder = steps[0]
+            if encoder.drop_idx_ is not None or getattr(encoder, "_infrequent_enabled", False):
+                raise ValueError("OneHotEncoder with drop / infrequent categories is not supported")
+            if encoder.handle_unknown not in ("ignore", "error"):
+                raise ValueError(f"Unsupported handle_unknown '{encoder.handle_unknown}'")
+
+            maps, offsets, offset = [], [], 0
+            for categories in encoder.categories_:
+                if any(_is_nan(c) for c in categories):
+                    raise ValueError("NaN categories are not supported")
+                maps.append({c: i for i, c in enumerate(categories.tolist())})
+                offsets.append(offset)
+                offset += len(categories)
+
+            return _CategoricalBlock(
+                columns=columns,
+                fill=None if fill is None else list(fill),
+                maps=maps,
+                offsets=offsets,
+                ignore_unknown=encoder.handle_unknown == "ignore",
+            )
+
+        mean = scale = None
+        if steps:
+            scaler = steps[0]
+            if len(steps) > 1 or not isinstance(scaler, StandardScaler):
+                raise ValueError(f"Unsupported steps {[type(s).__name__ for s in steps]}")
+            if scaler.with_mean:
+                mean = np.asarray(scaler.mean_, dtype=np.float64)
+            if scaler.with_std:
+                scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        return _NumericBlock(
+            columns=columns,
+            fill=None if fill is None else np.asarray(fill, dtype=np.float64),
+            mean=mean,
+            scale=scale,
+        )
+
+    # ===============================
+    # Transform
+    # ===============================
+    def _column_getter(self, x):
+        if isinstance(x, pd.DataFrame):
+            return lambda i: x[self.feature_names[i]].to_numpy()
+
+        x = np.asarray(x, dtype=object)
+        if x.ndim == 1:
+            x = x.reshape(1, -1)
+        if x.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected {len(self.feature_names)} columns, got {x.shape[1]}")
+        return lambda i: x[:, i]
+
+    def transform(self, x) -> np.ndarray:
+        """
+        x: DataFrame with the training columns, or a numpy row / batch with
+        columns in feature_names order. Returns a dense float64 array.
+        """
+        column = self._column_getter(x)
+        n_rows = len(x) if isinstance(x, pd.DataFrame) else len(column(0))
+        out = np.zeros((n_rows, self.n_features_out), dtype=np.float64)
+
+        start = 0
+        for block in self.blocks:
+            if isinstance(block, _NumericBlock):
+                values = np.column_stack([np.asarray(column(i), dtype=np.float64) for i in block.columns])
+                if block.fill is not None:
+                    values = np.where(np.isnan(values), block.fill, values)
+                # Same in-place order as StandardScaler.transform
+                if block.mean is not None:
+                    values -= block.mean
+                if block.scale is not None:
+                    values /= block.scale
+                out[:, start:start + block.width] = values
+            else:
+                for j, i in enumerate(block.columns):
+                    values = column(i)
+                    if block.fill is not None:
+                        missing = values != values
+                        if missing.any():
+                            values = np.where(missing, block.fill[j], values)
+
+                    mapping = block.maps[j]
+                    if n_rows <= DIRECT_LOOKUP_ROWS:
+                        index = np.fromiter((mapping.get(v, -1) for v in values), dtype=np.int64, count=n_rows)
+                    else:
+                        # Look up each distinct value once; missing values factorize to -1
+                        codes, uniques = pd.factorize(np.asarray(values, dtype=object))
+                        lookup = np.array([mapping.get(v, -1) for v in uniques] + [-1], dtype=np.int64)
+                        index = lookup[codes]
+                    known = index >= 0
+                    if not block.ignore_unknown and not known.all():
+                        raise ValueError(f"Unknown categories in {self.feature_names[i]}")
+                    out[np.flatnonzero(known), start + block.offsets[j] + index[known]] = 1.0
+            start += block.width
+
+        return out
+
+    # ===============================
+    # Verification
+    # ===============================
+    def probe_frame(self) -> pd.DataFrame:
+        """
+        Small batch covering every category, missing values and (if
+        ignored) unseen categories.
+        """
+        n_rows = 6
+        for block in self.blocks:
+            if isinstance(block, _CategoricalBlock):
+                n_rows = max(n_rows, max(len(m) for m in block.maps) + 2)
+
+        data = {}
+        for block in self.blocks:
+            for j, i in enumerate(block.columns):
+                if isinstance(block, _NumericBlock):
+                    center = 0.0 if block.mean is None else block.mean[j]
+                    values = center + np.linspace(-3.0, 3.0, n_rows) * (abs(center) + 1.0)
+                    values[1] = np.nan
+                else:
+                    categories = list(block.maps[j])
+                    values = [categories[r % len(categories)] for r in range(n_rows - 2)]
+                    values.append(np.nan if block.fill is not None else categories[0])
+                    values.append("__unseen__" if block.ignore_unknown else categories[-1])
+                    values = np.asarray(values, dtype=object)
+                data[self.feature_names[i]] = values
+
+        for name in self.feature_names:
+            data.setdefault(name, np.zeros(n_rows))
+        return pd.DataFrame(data, columns=self.feature_names)
+
+    def verify(self, preprocessor, x=None):
+        """
+        Raises ValueError unless transform(x) matches sklearn bit for bit.
+        """
+        x = self.probe_frame() if x is None else x
+
+        expected = preprocessor.transform(x)
+        if hasattr(expected, "toarray"):
+            expected = expected.toarray()
+        expected = np.ascontiguousarray(np.asarray(expected, dtype=np.float64))
+        actual = np.ascontiguousarray(self.transform(x))
+
+        if expected.shape != actual.shape or expected.tobytes() != actual.tobytes():
+            raise ValueError("Compiled preprocessor output differs from sklearn")
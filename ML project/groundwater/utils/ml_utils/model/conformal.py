@@ -0,0 +1,78 @@
+import math
+import numpy as np
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+DEFAULT_CONFORMAL_ALPHA = 0.1   # 90% intervals
+
+
+def conformal_quantile(residuals, alpha: float = DEFAULT_CONFORMAL_ALPHA) -> float:
+    """
+    Split-conformal half-width: the ceil((n + 1)(1 - alpha))-th smallest
+    absolute residual (clamped to the largest one for small n).
+    """
+    residuals = np.sort(np.abs(np.asarray(residuals, dtype=np.float64)))
+    residuals = residuals[np.isfinite(residuals)]
+    if len(residuals) == 0:
+        raise ValueError("No residuals to calibrate on")
+
+    rank = math.ceil((len(residuals) + 1) * (1 - alpha))
+    return float(residuals[min(rank, len(residuals)) - 1])
+
+
+@dataclass
+class ConformalIntervals:
+    """
+    Prediction interval half-widths calibrated once at training time on
+    held-out residuals and stored with the model, so applying them is a
+    lookup per forecast step.
+
+    widths[h - 1] is the half-width for h steps ahead. Horizons past the
+    calibrated ones grow with sqrt(h), as for independent errors
+    accumulating through a recursive forecast.
+    """
+    alpha: float
+    widths: List[float]
+    n_calibration: int
+    per_horizon: Dict[int, int] = field(default_factory=dict)  # horizon -> calibration size
+
+    @classmethod
+    def calibrate(cls, y_true, y_pred, alpha: float = DEFAULT_CONFORMAL_ALPHA) -> "ConformalIntervals":
+        residuals = np.asarray(y_true, dtype=np.float64) - np.asarray(y_pred, dtype=np.float64)
+        return cls(alpha=alpha, widths=[conformal_quantile(residuals, alpha)],
+                   n_calibration=len(residuals), per_horizon={1: len(residuals)})
+
+    @classmethod
+    def calibrate_horizons(cls, residuals_by_horizon: Dict[int, np.ndarray],
+                           alpha: float = DEFAULT_CONFORMAL_ALPHA) -> "ConformalIntervals":
+        """
+        residuals_by_horizon: {h: held-out residuals of h-step-ahead forecasts},
+        for consecutive horizons starting at 1.
+        """
+        horizons = sorted(residuals_by_horizon)
+        if horizons != list(range(1, len(horizons) + 1)):
+            raise ValueError("Horizons must be consecutive, starting at 1")
+
+        widths = [conformal_quantile(residuals_by_horizon[h], alpha) for h in horizons]
+        # Never narrower than a shorter horizon
+        widths = np.maximum.accumulate(widths).tolist()
+        sizes = {h: len(residuals_by_horizon[h]) for h in horizons}
+        return cls(alpha=alpha, widths=widths, n_calibration=sizes[1], per_horizon=sizes)
+
+    def half_widths(self, steps: int) -> np.ndarray:
+        calibrated = len(self.widths)
+        horizons = np.arange(1, steps + 1, dtype=np.float64)
+
+        widths = np.empty(steps, dtype=np.float64)
+        known = min(steps, calibrated)
+        widths[:known] = self.widths[:known]
+        widths[known:] = self.widths[-1] * np.sqrt(horizons[known:] / calibrated)
+        return widths
+
+    def to_dict(self) -> Dict:
+        return {
+            "alpha": self.alpha,
+            "coverage": round(1 - self.alpha, 4),
+            "widths": [round(w, 6) for w in self.widths],
+            "n_calibration": self.n_calibration,
+        }
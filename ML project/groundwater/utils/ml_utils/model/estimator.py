@@ -2,21 +2,40 @@ from groundwater.constant.training_pipeline import SAVED_MODEL_DIR, MODEL_FILE_N
 import sys
 from groundwater.exception.exception import GroundwaterException
 from groundwater.logging.logger import logging
+from groundwater.utils.ml_utils.model.compiled_preprocessor import CompiledPreprocessor
 
 class GroundwaterModel:
-    def __init__(self, preprocessor, model):
+    def __init__(self, preprocessor, model, intervals=None):
         try:
             self.preprocessor = preprocessor
             self.model = model
+            self.intervals = intervals  # ConformalIntervals (regression only)
+            self.compiled_preprocessor = CompiledPreprocessor.try_compile(preprocessor)
             logging.info("GroundwaterModel wrapper initialized")
         except Exception as e:
             raise GroundwaterException(e, sys)
 
+    def transform(self, x):
+        """
+        Numpy fast path when the preprocessor could be compiled, sklearn otherwise.
+        """
+        # Models pickled before the fast path existed compile on first use
+        if not hasattr(self, "compiled_preprocessor"):
+            self.compiled_preprocessor = CompiledPreprocessor.try_compile(self.preprocessor)
+
+        if self.compiled_preprocessor is not None:
+            try:
+                return self.compiled_preprocessor.transform(x)
+            except Exception as e:
+                logging.info(f"Compiled preprocessor failed, using sklearn: {e}")
+
+        return self.preprocessor.transform(x)
+
     def predict(self, x):
         try:
             logging.info("Starting prediction")
 
-            x_transform = self.preprocessor.transform(x)
+            x_transform = self.transform(x)
             y_hat = self.model.predict(x_transform)
 
             logging.info("Prediction completed")
@@ -27,3 +46,14 @@ class GroundwaterModel:
             raise GroundwaterException(e, sys)
 
 
+
+
+class DirectForecastModel(GroundwaterModel):
+    """
+    Multi-output model: predict(x) returns (n_rows, horizons) water levels,
+    column h-1 being the level h steps after each row.
+    """
+
+    def __init__(self, preprocessor, model, horizons, intervals=None):
+        super().__init__(preprocessor=preprocessor, model=model, intervals=intervals)
+        self.horizons = horizons
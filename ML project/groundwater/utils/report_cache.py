@@ -0,0 +1,101 @@
+import hashlib
+import os
+import sys
+import uuid
+from typing import Callable, Optional, Tuple
+
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
+
+REPORT_CACHE_MAX_ENTRIES = 200
+
+
+class ReportCache:
+    """
+    Bounded on-disk cache of generated reports, addressed by a hash of
+    everything that determines the report content.
+
+    Entries are written to a unique temp file and moved into place with
+    os.replace, so readers never see a partial file and concurrent writers
+    of the same key cannot clobber each other. Reads refresh the entry's
+    mtime, and the least recently used entries are evicted past max_entries.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int = REPORT_CACHE_MAX_ENTRIES, suffix: str = ".pdf"):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.suffix = suffix
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(*parts) -> str:
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+            digest.update(b"\x00")
+        return digest.hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)  # mark as recently used
+            return path
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, writer: Callable[[str], object]) -> str:
+        """
+        Calls writer(tmp_path) and atomically publishes the result under key.
+        """
+        try:
+            path = self.path_for(key)
+            tmp_path = os.path.join(self.cache_dir, f".{key}.{uuid.uuid4().hex}.tmp")
+
+            try:
+                writer(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            self._evict()
+            return path
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def get_or_create(self, key: str, writer: Callable[[str], object]) -> Tuple[str, bool]:
+        """
+        Returns (path, hit).
+        """
+        path = self.get(key)
+        if path is not None:
+            logging.info(f"Report cache hit: {key}")
+            return path, True
+
+        logging.info(f"Report cache miss: {key}")
+        return self.put(key, writer), False
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(self.suffix):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                continue
+
+        if len(entries) <= self.max_entries:
+            return
+
+        entries.sort()
+        for _, path in entries[: len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -1,10 +1,21 @@
 
 from fpdf import FPDF
 import os
+import sys
+import uuid
+import zipfile
+import threading
+import multiprocessing
 import pandas as pd
 from datetime import datetime
-from data_loader import get_latest_data
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from data_loader import get_latest_data, get_latest_rows, get_dataset_version
+from groundwater.exception.exception import GroundwaterException
+from groundwater.logging.logger import logging
 from groundwater.pipeline.forecasting import ForecastingPipeline
+from groundwater.utils.report_cache import ReportCache
 
 class PDF(FPDF):
     def header(self):
@@ -19,10 +30,98 @@ class PDF(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, 'Page ' + str(self.page_no()) + '/{nb}', 0, 0, 'C')
 
+# Reports rendered per bulk job in parallel
+BULK_REPORT_WORKERS = 4
+BULK_FORECAST_YEARS = 3
+MAX_BULK_JOBS = 50
+
+_REPORT_POOL = None
+
+
+def _add_row(pdf, label, value):
+    pdf.cell(60, 8, label, 0)
+    pdf.cell(0, 8, f": {value}", 0, 1)
+
+
+def build_station_pdf(station_id, latest, forecasts):
+    # Create PDF
+    pdf = PDF()
+    pdf.alias_nb_pages()
+    pdf.add_page()
+    pdf.set_font('Arial', '', 12)
+
+    # Title Section
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, f"Station Analysis: {station_id}", 0, 1)
+    pdf.ln(5)
+
+    # Current Status Table
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, "Current Status", 0, 1)
+    pdf.set_font('Arial', '', 11)
+    
+    # Simple data rows
+    _add_row(pdf, "Location (Lat, Lon)", f"{latest.get('LAT')}, {latest.get('LON')}")
+    _add_row(pdf, "Water Level", f"{round(latest.get('Water_Level', 0), 2)} mbgl")
+    _add_row(pdf, "Zone Classification", f"{latest.get('zone', 'Unknown')}")
+    _add_row(pdf, "Date of Last Record", f"{latest.get('Date')}")
+    
+    pdf.ln(10)
+
+    # Future Projection
+    pdf.set_font('Arial', 'B', 12)
+    pdf.cell(0, 10, "Future Projection (Next 3 Years)", 0, 1)
+    
+    # Table Header
+    pdf.set_font('Arial', 'B', 10)
+    pdf.cell(40, 10, 'Date', 1)
+    pdf.cell(40, 10, 'Predicted Level', 1)
+    pdf.cell(40, 10, 'Zone Status', 1)
+    pdf.ln()
+
+    # Table Body (first 12 entries - 3 years of quarterly)
+    pdf.set_font('Arial', '', 10)
+    for row in forecasts[:12]: 
+        pdf.cell(40, 10, str(row['Date']), 1)
+        pdf.cell(40, 10, f"{row['Water_Level']} m", 1)
+        pdf.cell(40, 10, str(row['Zone']), 1)
+        pdf.ln()
+
+    pdf.ln(10)
+    pdf.set_font('Arial', 'I', 9)
+    pdf.multi_cell(0, 10, "Disclaimer: These predictions are generated by an AI model based on historical trends. Actual values may vary due to environmental changes.")
+
+    return pdf
+
+
+def render_station_pdf_bytes(station_id, latest, forecasts) -> bytes:
+    """
+    Renders one station report in memory (runs inside the report pool).
+    """
+    output = build_station_pdf(station_id, latest, forecasts).output(dest='S')
+    return output.encode('latin-1') if isinstance(output, str) else bytes(output)
+
+
+def _get_report_pool() -> ProcessPoolExecutor:
+    global _REPORT_POOL
+    if _REPORT_POOL is None:
+        # spawn: the API process is multi-threaded, forking it is not safe
+        _REPORT_POOL = ProcessPoolExecutor(
+            max_workers=BULK_REPORT_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _REPORT_POOL
+
+
 class ReportGenerator:
+    # Part of cache_key: bump when the station report's layout or the
+    # forecast table it prints changes
+    TEMPLATE_VERSION = "1"
+
     def __init__(self):
         self.output_dir = "reports_generated"
         os.makedirs(self.output_dir, exist_ok=True)
+        self.cache = ReportCache(os.path.join(self.output_dir, "cache"))
         self.forecasting = ForecastingPipeline()
 
     def generate_report(self, station_id):
@@ -30,68 +129,163 @@ class ReportGenerator:
         latest = get_latest_data(station_id)
         if not latest:
             raise Exception("Station not found")
-            
+
+        key = self.cache_key(station_id, get_dataset_version(), self.forecasting.get_model_version())
+        cached = self.cache.get(key)
+        if cached is not None:
+            logging.info(f"Report cache hit: {key}")
+            return cached
+
         # 2. Get Forecast (Default parameters)
         try:
             forecasts = self.forecasting.predict_future(station_id=station_id, years=3)
-        except:
-            forecasts = []
-
-        # 3. Create PDF
-        pdf = PDF()
-        pdf.alias_nb_pages()
-        pdf.add_page()
-        pdf.set_font('Arial', '', 12)
-
-        # Title Section
-        pdf.set_font('Arial', 'B', 14)
-        pdf.cell(0, 10, f"Station Analysis: {station_id}", 0, 1)
-        pdf.ln(5)
-
-        # Current Status Table
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 10, "Current Status", 0, 1)
-        pdf.set_font('Arial', '', 11)
-        
-        # Simple data rows
-        self._add_row(pdf, "Location (Lat, Lon)", f"{latest.get('LAT')}, {latest.get('LON')}")
-        self._add_row(pdf, "Water Level", f"{round(latest.get('Water_Level', 0), 2)} mbgl")
-        self._add_row(pdf, "Zone Classification", f"{latest.get('zone', 'Unknown')}")
-        self._add_row(pdf, "Date of Last Record", f"{latest.get('Date')}")
-        
-        pdf.ln(10)
-
-        # Future Projection
-        pdf.set_font('Arial', 'B', 12)
-        pdf.cell(0, 10, "Future Projection (Next 3 Years)", 0, 1)
-        
-        # Table Header
-        pdf.set_font('Arial', 'B', 10)
-        pdf.cell(40, 10, 'Date', 1)
-        pdf.cell(40, 10, 'Predicted Level', 1)
-        pdf.cell(40, 10, 'Zone Status', 1)
-        pdf.ln()
+        except Exception as e:
+            logging.error(f"Forecast for report {station_id} failed: {e}")
+            forecasts = None
+
+        def write(path):
+            pdf = build_station_pdf(station_id, latest, forecasts or [])
+            pdf.output(path, 'F')
+
+        if forecasts is None:
+            # A report without forecasts is not cached, so the next request retries
+            filename = f"Report_{station_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
+            filepath = os.path.join(self.output_dir, filename)
+            write(filepath)
+            return filepath
+
+        return self.cache.put(key, write)
+
+    @classmethod
+    def cache_key(cls, station_id, dataset_version, model_version):
+        # Same station, data and model -> same report
+        return ReportCache.make_key(
+            "station", station_id, dataset_version, model_version, cls.TEMPLATE_VERSION
+        )
+
+
+
+@dataclass
+class BulkReportJob:
+    job_id: str
+    station_ids: List[str]
+    status: str = "queued"   # queued -> running -> done / failed
+    completed: int = 0
+    zip_path: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def total(self) -> int:
+        return len(self.station_ids)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "completed": self.completed,
+            "progress": round(self.completed / self.total, 4) if self.total else 1.0,
+            "error": self.error,
+        }
+
+
+class BulkReportGenerator:
+    """
+    Builds station reports for many stations into a single zip.
+
+    Each job forecasts every selected station in one batched model pass,
+    reuses any report already in the single-report cache, renders the rest
+    across a process pool and publishes the archive with os.replace once
+    complete. Jobs run on a background thread; progress is polled by job id.
+    """
+
+    def __init__(self, output_dir: str = "reports_generated"):
+        self.reports = ReportGenerator()
+        self.bulk_dir = os.path.join(output_dir, "bulk")
+        os.makedirs(self.bulk_dir, exist_ok=True)
+        self.jobs: Dict[str, BulkReportJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, station_ids=None, district=None, state=None) -> BulkReportJob:
+        try:
+            latest = get_latest_rows(station_ids=station_ids, district=district, state=state)
+            if latest.empty:
+                raise Exception("No stations match the requested filter")
+
+            job = BulkReportJob(job_id=uuid.uuid4().hex, station_ids=latest.index.tolist())
+
+            with self._lock:
+                self._prune_jobs()
+                self.jobs[job.job_id] = job
+
+            threading.Thread(target=self._run, args=(job, latest), daemon=True).start()
+            logging.info(f"Bulk report job {job.job_id} queued for {job.total} stations")
+            return job
+
+        except Exception as e:
+            raise GroundwaterException(e, sys)
+
+    def get_job(self, job_id: str) -> Optional[BulkReportJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _prune_jobs(self):
+        finished = [j for j in self.jobs.values() if j.status in ("done", "failed")]
+        for job in finished[: max(0, len(self.jobs) - MAX_BULK_JOBS + 1)]:
+            del self.jobs[job.job_id]
+            if job.zip_path and os.path.exists(job.zip_path):
+                os.remove(job.zip_path)
+
+    def _run(self, job: BulkReportJob, latest: pd.DataFrame):
+        job.status = "running"
+        zip_path = os.path.join(self.bulk_dir, f"{job.job_id}.zip")
+        tmp_path = zip_path + ".tmp"
+
+        try:
+            forecasting = self.reports.forecasting
+            # A failed forecast fails the job rather than zipping reports without one
+            forecasts = forecasting.predict_future_batch(
+                station_ids=job.station_ids, years=BULK_FORECAST_YEARS
+            )
+
+            dataset_version = get_dataset_version()
+            model_version = forecasting.get_model_version()
+            pool = _get_report_pool()
+
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                pending = {}
+                for station_id in job.station_ids:
+                    name = f"Report_{station_id}.pdf"
+                    cached = self.reports.cache.get(
+                        ReportGenerator.cache_key(station_id, dataset_version, model_version)
+                    )
+                    if cached is not None:
+                        archive.write(cached, name)
+                        job.completed += 1
+                        continue
+
+                    future = pool.submit(
+                        render_station_pdf_bytes,
+                        station_id,
+                        latest.loc[station_id].to_dict(),
+                        forecasts.get(station_id, [])[:12],
+                    )
+                    pending[future] = name
+
+                for future in as_completed(pending):
+                    archive.writestr(pending[future], future.result())
+                    job.completed += 1
+
+            os.replace(tmp_path, zip_path)
+            job.zip_path = zip_path
+            job.status = "done"
+            logging.info(f"Bulk report job {job.job_id} finished: {job.total} reports")
 
-        # Table Body (first 12 entries - 3 years of quarterly)
-        pdf.set_font('Arial', '', 10)
-        for row in forecasts[:12]: 
-            pdf.cell(40, 10, str(row['Date']), 1)
-            pdf.cell(40, 10, f"{row['Water_Level']} m", 1)
-            pdf.cell(40, 10, str(row['Zone']), 1)
-            pdf.ln()
-
-        pdf.ln(10)
-        pdf.set_font('Arial', 'I', 9)
-        pdf.multi_cell(0, 10, "Disclaimer: These predictions are generated by an AI model based on historical trends. Actual values may vary due to environmental changes.")
-
-        # Save
-        filename = f"Report_{station_id}_{datetime.now().strftime('%Y%m%d%H%M%S')}.pdf"
-        filepath = os.path.join(self.output_dir, filename)
-        pdf.output(filepath, 'F')
-        
-        return filepath
-
-    def _add_row(self, pdf, label, value):
-        pdf.cell(60, 8, label, 0)
-        pdf.cell(0, 8, f": {value}", 0, 1)
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logging.error(f"Bulk report job {job.job_id} failed: {e}")
 
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
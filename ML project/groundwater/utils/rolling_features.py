@@ -0,0 +1,91 @@
+import numpy as np
+from typing import Dict
+
+# Rolling windows, in readings, advanced during recursive forecasts:
+# {"WL_<n>m": readings} gives WL_<n>m_avg (mean of the last readings,
+# current included) and WL_<n>m_trend (current level minus that mean).
+# Empty on purpose: the code that built the dataset's WL_3m / WL_6m columns
+# is not in the repo, and with quarterly readings a 3 / 6 month window is
+# not 3 / 6 readings, so the windows cannot be derived here. Until they
+# are checked against dataset rows, forecasts keep the start row's WL_*
+# values, as before.
+ROLLING_WINDOWS = {}
+
+
+class RollingFeatureState:
+    """
+    Ring buffer of the latest water levels of N series, advanced together.
+
+    push() adds one reading per series and keeps a running sum and count
+    per window, so lag, change and rolling avg / trend features cost O(1)
+    per step whatever the horizon. NaN in the seed history means "no
+    reading" and is left out of the averages, as pandas rolling means with
+    min_periods=1 do.
+    """
+
+    def __init__(self, history, windows: Dict[str, int] = ROLLING_WINDOWS):
+        """
+        history: (N, k) past levels, oldest first; the last column is the
+        current level and must be finite.
+        """
+        history = np.asarray(history, dtype=np.float64)
+        self.windows = dict(windows)
+        self.size = self.history_size(self.windows)
+
+        # Left-pad / trim the history to exactly `size` columns
+        n_rows = history.shape[0]
+        self.buffer = np.full((n_rows, self.size), np.nan)
+        keep = min(self.size, history.shape[1])
+        self.buffer[:, self.size - keep:] = history[:, history.shape[1] - keep:]
+        self.pos = self.size - 1
+
+        self.sums, self.counts = {}, {}
+        for name, window in self.windows.items():
+            recent = self.buffer[:, self.size - window:]
+            self.sums[name] = np.nansum(recent, axis=1)
+            self.counts[name] = np.isfinite(recent).sum(axis=1).astype(np.float64)
+
+    @staticmethod
+    def history_size(windows: Dict[str, int] = ROLLING_WINDOWS) -> int:
+        # Enough readings for the widest window and for the lag
+        return max([2, *windows.values()])
+
+    @property
+    def current(self) -> np.ndarray:
+        return self.buffer[:, self.pos]
+
+    @property
+    def previous(self) -> np.ndarray:
+        return self.buffer[:, (self.pos - 1) % self.size]
+
+    def push(self, levels):
+        levels = np.asarray(levels, dtype=np.float64)
+        nxt = (self.pos + 1) % self.size
+
+        for name, window in self.windows.items():
+            # Reading that drops out of this window (for the widest window,
+            # the slot about to be overwritten)
+            leaving = self.buffer[:, (nxt - window) % self.size]
+            present = np.isfinite(leaving)
+            self.sums[name] += levels - np.where(present, leaving, 0.0)
+            self.counts[name] += 1.0 - present
+
+        self.buffer[:, nxt] = levels
+        self.pos = nxt
+
+    def features(self) -> Dict[str, np.ndarray]:
+        current = self.current
+        previous = self.previous
+        # First reading of a series: lag falls back to the level itself
+        lag1 = np.where(np.isfinite(previous), previous, current)
+
+        features = {
+            "Water_Level": current,
+            "Water_Level_Lag1": lag1,
+            "Water_Level_Change": current - lag1,
+        }
+        for name in self.windows:
+            avg = self.sums[name] / self.counts[name]
+            features[f"{name}_avg"] = avg
+            features[f"{name}_trend"] = current - avg
+        return features